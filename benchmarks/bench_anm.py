@@ -0,0 +1,30 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.causality import check_causal_direction_anm
+from src.loaders import load_causal_data
+
+pytest.importorskip('pytest_benchmark')
+
+
+def _nonlinear_pair(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    A = rng.uniform(-2, 2, n_rows)
+    return pd.DataFrame({'A': A, 'B': A ** 3 + rng.uniform(-1, 1, n_rows)})
+
+
+# The exact GP needs O(n^2) memory and O(n^3) time, so it is only swept over small pairs.
+@pytest.mark.parametrize('method, n_rows', [('gp', 200), ('gp', 500), ('gp', 1000),
+                                            ('nystrom', 1000), ('nystrom', 10000), ('nystrom', 100000)])
+def test_anm_synthetic(measure, method, n_rows):
+    direction, _, _ = measure(check_causal_direction_anm, _nonlinear_pair(n_rows), method=method,
+                              rounds=1 if n_rows > 500 else 3)
+    assert direction.startswith("A --> B")
+
+
+# The largest Tuebingen pairs (10k - 16k rows), on the linear-time backend.
+@pytest.mark.parametrize('filename', ['pair0044.txt', 'pair0045.txt', 'pair0046.txt', 'pair0069.txt'])
+def test_anm_tuebingen(measure, pairs_folder, filename):
+    df = load_causal_data(pairs_folder, filename)
+    direction, _, _ = measure(check_causal_direction_anm, df, method='nystrom', rounds=1)
+    assert direction
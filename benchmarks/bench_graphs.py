@@ -0,0 +1,34 @@
+import os
+import shutil
+import tempfile
+import pytest
+from contextlib import redirect_stdout
+from src.graphs import draw_causal_graph, export_graph_text
+from src.synthetic import random_dag
+
+pytest.importorskip('pytest_benchmark')
+
+
+@pytest.fixture
+def output_dir():
+    folder = tempfile.mkdtemp()
+    yield folder
+    shutil.rmtree(folder)
+
+
+def _render(render, graph, save_path, **kwargs):
+    with open(os.devnull, 'w') as fnull:
+        with redirect_stdout(fnull):
+            render(graph, save_path=save_path, **kwargs)
+
+
+@pytest.mark.parametrize('n_nodes', [3, 10, 30])
+def test_draw_headless(measure, output_dir, n_nodes):
+    graph = random_dag(n_nodes, density=0.2, rng=0)
+    measure(_render, draw_causal_graph, graph, os.path.join(output_dir, 'graph.png'), show=False, rounds=5)
+
+
+@pytest.mark.parametrize('n_nodes', [3, 10, 30])
+def test_export_svg(measure, output_dir, n_nodes):
+    graph = random_dag(n_nodes, density=0.2, rng=0)
+    measure(_render, export_graph_text, graph, os.path.join(output_dir, 'graph.svg'), rounds=5)
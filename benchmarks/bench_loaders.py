@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+import pytest
+from src.loaders import load_causal_data, stream_sufficient_statistics
+from src.synthetic import write_dataset
+
+pytest.importorskip('pytest_benchmark')
+
+TUEBINGEN_FILES = ['pair0044.txt', 'pair0045.txt', 'pair0046.txt', 'pair0069.txt']
+
+
+@pytest.fixture(scope='module')
+def csv_folder():
+    folder = tempfile.mkdtemp()
+    for n_rows, n_vars in [(10000, 10), (100000, 20)]:
+        write_dataset(os.path.join(folder, f"rows{n_rows}_vars{n_vars}.csv"), n_vars, n_rows, seed=0)
+    yield folder
+    shutil.rmtree(folder)
+
+
+@pytest.fixture
+def cache_dir():
+    folder = tempfile.mkdtemp()
+    yield folder
+    shutil.rmtree(folder)
+
+
+@pytest.mark.parametrize('filename', TUEBINGEN_FILES)
+def test_load_tuebingen(measure, pairs_folder, filename):
+    df = measure(load_causal_data, pairs_folder, filename, rounds=5)
+    assert len(df) > 10000
+
+
+@pytest.mark.parametrize('filename', TUEBINGEN_FILES)
+def test_load_tuebingen_cached(measure, pairs_folder, cache_dir, filename):
+    load_causal_data(pairs_folder, filename, cache_dir=cache_dir)
+    df = measure(load_causal_data, pairs_folder, filename, cache_dir=cache_dir, rounds=5)
+    assert len(df) > 10000
+
+
+@pytest.mark.parametrize('filename', ['rows10000_vars10.csv', 'rows100000_vars20.csv'])
+def test_load_synthetic(measure, csv_folder, filename):
+    df = measure(load_causal_data, csv_folder, filename, rounds=3)
+    assert df is not None
+
+
+@pytest.mark.parametrize('filename', ['rows10000_vars10.csv', 'rows100000_vars20.csv'])
+def test_stream_synthetic(measure, csv_folder, filename):
+    statistics = measure(stream_sufficient_statistics, csv_folder, filename, rounds=3)
+    assert statistics.n > 0
@@ -0,0 +1,28 @@
+import os
+import pytest
+from contextlib import redirect_stdout
+from src.causality import run_pc_algo_library
+
+pytest.importorskip('pytest_benchmark')
+
+
+# One axis at a time around a base case of 10,000 rows, 10 variables and edge density 0.2,
+# so the suite shows how each dimension scales without running the whole grid.
+BASE = {'n_rows': 10000, 'n_vars': 10, 'density': 0.2}
+SWEEP = ([dict(BASE, n_rows=n) for n in (1000, 10000, 100000)] +
+         [dict(BASE, n_vars=p) for p in (5, 20)] +
+         [dict(BASE, density=d) for d in (0.1, 0.4)])
+
+
+def _run_pc(df, test_name):
+    with open(os.devnull, 'w') as fnull:
+        with redirect_stdout(fnull):
+            return run_pc_algo_library(df, test_name=test_name)
+
+
+@pytest.mark.parametrize('test_name', ['pearsonr', 'cached_pearsonr'])
+@pytest.mark.parametrize('config', SWEEP, ids=lambda c: f"rows{c['n_rows']}-vars{c['n_vars']}-density{c['density']}")
+def test_pc_library(measure, synthetic_frame, config, test_name):
+    df = synthetic_frame(config['n_rows'], config['n_vars'], config['density'])
+    dag = measure(_run_pc, df, test_name, rounds=1 if test_name == 'pearsonr' else 3)
+    assert dag is not None
@@ -0,0 +1,179 @@
+import os
+import sys
+import json
+import multiprocessing
+import tracemalloc
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# ==========================================
+# Scaling Benchmarks (pytest-benchmark)
+# ==========================================
+#
+# INTENT: The files in this folder are named bench_*.py, so the normal 'python -m pytest' run
+# does not collect them. Run them explicitly (see README, 'Performance Benchmarks'):
+#
+#   python -m pytest benchmarks/bench_*.py --benchmark-autosave
+#
+# Timing baselines are stored by pytest-benchmark itself under .benchmarks/ (--benchmark-save).
+# benchmarks/pytest.ini compares every run with the latest saved one and fails if a median is
+# more than 25% slower, so a slowdown fails the run just like a memory regression. Timings depend
+# on the machine, so until a run has been saved there is nothing to compare with, and the check
+# is skipped with a warning (see pytest_sessionstart).
+# The peak memory of every benchmark is compared with benchmarks/baselines/memory.json, which
+# can be committed because it does not depend on the speed of the machine.
+
+BASELINE_FILE = os.path.join(current_dir, 'baselines', 'memory.json')
+
+# A benchmark fails if its traced peak memory grows by more than this fraction (plus 1 MB of slack).
+MEMORY_TOLERANCE = 0.25
+
+_measured_memory = {}
+
+
+def pytest_addoption(parser):
+    parser.addoption('--update-memory-baselines', action='store_true',
+                     help="Write the measured peak memory of every benchmark to benchmarks/baselines/memory.json")
+
+
+def pytest_sessionstart(session):
+    # pytest-benchmark raises a UsageError at the end of the run if --benchmark-compare-fail finds
+    # no saved run. On a machine without timing baselines, run the benchmarks and skip the check.
+    benchmark_session = getattr(session.config, '_benchmarksession', None)
+    if benchmark_session is None or not benchmark_session.compare_fail or benchmark_session.compared_mapping:
+        return
+
+    benchmark_session.compare_fail = None
+    session.config.issue_config_time_warning(pytest.PytestWarning(
+        "No saved benchmark run to compare timings with; the timing regression check is skipped. "
+        "Save a baseline with --benchmark-save=baseline."), stacklevel=2)
+
+
+def pytest_sessionfinish(session):
+    if not session.config.getoption('--update-memory-baselines', default=False) or not _measured_memory:
+        return
+
+    baselines = _load_baselines()
+    baselines.update(_measured_memory)
+    os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+    with open(BASELINE_FILE, 'w') as f:
+        json.dump(dict(sorted(baselines.items())), f, indent=2)
+        f.write('\n')
+
+
+def _load_baselines():
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE) as f:
+        return json.load(f)
+
+
+def _current_rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+def _measure_in_child(connection, func, args, kwargs):
+    rss_start = _current_rss_mb()
+    tracemalloc.start()
+    func(*args, **kwargs)
+    traced_peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+
+    # A forked child starts with the parent's resident set, so the growth of its
+    # high-water mark is the memory this call needed on top of it.
+    connection.send((traced_peak, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 - rss_start))
+    connection.close()
+
+
+def measure_memory(func, *args, **kwargs):
+    """
+    Runs func once more, outside the timed rounds, and measures its memory.
+
+    Returns:
+        tuple: (peak traced allocations in MB, peak RSS growth in MB or None where fork() or
+               /proc are not available). The traced peak covers Python and NumPy allocations and
+               is reproducible, which makes it the value compared with the baseline.
+    """
+    if resource is not None and os.path.exists('/proc/self/statm') and 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=_measure_in_child, args=(sender, func, args, kwargs))
+        process.start()
+        sender.close()
+        try:
+            return receiver.recv()
+        except EOFError:
+            pass
+        finally:
+            process.join()
+
+    tracemalloc.start()
+    func(*args, **kwargs)
+    traced_peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return traced_peak, None
+
+
+@pytest.fixture
+def measure(benchmark, request):
+    """
+    Times func with pytest-benchmark, then records its peak memory in the benchmark's extra_info
+    and fails if it exceeds the stored baseline.
+
+    Usage: measure(func, *args, rounds=3, **kwargs)
+    """
+    def run(func, *args, rounds=3, **kwargs):
+        result = benchmark.pedantic(func, args=args, kwargs=kwargs, rounds=rounds, iterations=1)
+
+        peak_mem_mb, peak_rss_mb = measure_memory(func, *args, **kwargs)
+        benchmark.extra_info['peak_mem_mb'] = round(peak_mem_mb, 2)
+        benchmark.extra_info['peak_rss_mb'] = None if peak_rss_mb is None else round(peak_rss_mb, 1)
+
+        key = request.node.nodeid.split('::', 1)[-1]
+        _measured_memory[key] = round(peak_mem_mb, 2)
+
+        baseline = _load_baselines().get(key)
+        if baseline is not None and not request.config.getoption('--update-memory-baselines', default=False):
+            limit = baseline * (1 + MEMORY_TOLERANCE) + 1.0
+            if peak_mem_mb > limit:
+                pytest.fail(f"Peak memory {peak_mem_mb:.1f} MB exceeds the baseline of {baseline:.1f} MB "
+                            f"(limit {limit:.1f} MB)")
+
+        return result
+
+    return run
+
+
+@pytest.fixture(scope='session')
+def synthetic_frame():
+    """
+    Returns a function (n_rows, n_vars, density) -> DataFrame that generates each linear-Gaussian
+    dataset once per session, with columns A, B, C... as load_causal_data would name them.
+    """
+    from src.synthetic import generate_dataset
+    cache = {}
+
+    def make(n_rows, n_vars, density=0.2, seed=0):
+        key = (n_rows, n_vars, density, seed)
+        if key not in cache:
+            df, _ = generate_dataset(n_vars, n_rows, density=density, seed=seed)
+            df.columns = [chr(65 + i) for i in range(n_vars)]
+            cache[key] = df
+        return cache[key]
+
+    return make
+
+
+@pytest.fixture(scope='session')
+def pairs_folder():
+    return os.path.join(parent_dir, 'data', 'pairs')
@@ -1,21 +1,242 @@
 import argparse
 import os
-from src.loaders import load_causal_data
-from src.causality import run_pc_algo_library, get_adjacency_matrix, check_causal_direction_anm
-from src.graphs import draw_causal_graph
+import sys
+from src.profiling import ImportProfiler
+
+# INTENT: The profiler has to be running before the first project import below, so it is
+# started from sys.argv rather than after argument parsing.
+IMPORT_PROFILER = ImportProfiler().start() if '--profile-import' in sys.argv[1:] else None
+
+from src.defaults import DEFAULT_CHUNK_SIZE, DEFAULT_CACHE_DIR
+from src.metrics import METRICS, phase
+
+# INTENT: The analysis modules (and through them pandas, scipy, pgmpy, causal-learn and
+# matplotlib) are imported inside main() at the point of use, so '--help' or a run that fails on
+# a missing file returns within a fraction of a second instead of several seconds.
+
+
+# INTENT: The pipeline options below are accepted both before a sub-command and after 'batch'
+# ('python main.py --alpha 0.01 batch ...' and 'python main.py batch ... --alpha 0.01'). Both
+# parsers share them through 'parents', with SUPPRESS defaults so that the batch parser does not
+# overwrite a value given before 'batch'. The defaults are filled in after parsing, from
+# PIPELINE_DEFAULTS and, for 'batch', BATCH_DEFAULTS.
+PIPELINE_DEFAULTS = {
+    'alpha': 0.05, 'ci_test': 'pearsonr', 'kci_approximation': 'rff', 'kci_rank': 100, 'bins': 5,
+    'anm_alpha': 0.05, 'anm_adaptive': False, 'anm_confidence': 0.9, 'pc_variant': 'pgmpy', 'jobs': 1,
+    'dtype': 'float64', 'format': 'png', 'no_cache': False, 'no_store': False,
+}
+
+# 'batch' spreads whole files over the cores.
+BATCH_DEFAULTS = {'jobs': None}
+
+
+def pipeline_options():
+    """
+    Returns the parent parser of the options shared by the single-file pipeline and 'batch'.
+    """
+    options = argparse.ArgumentParser(add_help=False, argument_default=argparse.SUPPRESS)
+
+    options.add_argument('--alpha', type=float,
+                         help="Significance level for independence tests")
+    options.add_argument('--ci-test', type=str,
+                         choices=['pearsonr', 'fisher-z', 'chi_square', 'g_sq', 'cached_pearsonr', 'kci'],
+                         help="Conditional independence test used by the PC algorithm ('kci': low-rank "
+                              "kernel test for nonlinear dependence)")
+    options.add_argument('--kci-approximation', type=str, choices=['rff', 'nystrom'],
+                         help="Feature approximation of the kernels of --ci-test kci")
+    options.add_argument('--kci-rank', type=int,
+                         help="Number of features per kernel of --ci-test kci (cost grows with its square)")
+    options.add_argument('--bins', type=int,
+                         help="Quantile bins of the continuous columns for --ci-test chi_square/g_sq")
+    options.add_argument('--anm-alpha', type=float,
+                         help="Significance level of the HSIC tests that decide the ANM direction")
+    options.add_argument('--anm-adaptive', action='store_true',
+                         help="Fit the ANM on growing random subsamples and stop once the direction is stable")
+    options.add_argument('--anm-confidence', type=float,
+                         help="Confidence at which --anm-adaptive accepts a direction")
+    options.add_argument('--pc-variant', type=str, choices=['pgmpy', 'stable'],
+                         help="'pgmpy' runs pgmpy's PC; 'stable' runs the order-independent stable PC, which "
+                              "tests the edges of each conditioning depth in parallel (see --jobs)")
+    options.add_argument('--jobs', type=int,
+                         help="Number of worker processes for the ANM edge refinement and the stable PC "
+                              "(default 1); for 'batch', the number of files processed at once (default: all cores)")
+    options.add_argument('--dtype', type=str, choices=['float64', 'float32'],
+                         help="Precision of the data and of the CI tests and ANM fits computed from it; float32 "
+                              "halves memory and bandwidth (accumulated statistics stay float64)")
+    options.add_argument('--format', type=str, choices=['png', 'svg', 'dot', 'edges'],
+                         help="File format of the saved graph. 'svg' and 'dot' are written as text without matplotlib; "
+                              "'edges' is the compact edge list of src/adjacency.py, for large graphs (in 'batch' "
+                              "it replaces the dense adjacency CSV)")
+    options.add_argument('--no-cache', action='store_true',
+                         help=f"Always parse the text file instead of reusing its binary copy in {DEFAULT_CACHE_DIR}")
+    options.add_argument('--no-store', action='store_true',
+                         help="Always recompute PC and ANM instead of reusing stored results for the same data and settings")
+
+    return options
 
 
 def main():
-    parser = argparse.ArgumentParser(description="PSee: Hybrid Causal Discovery Pipeline")
+    shared = pipeline_options()
+    parser = argparse.ArgumentParser(description="PSee: Hybrid Causal Discovery Pipeline", parents=[shared])
 
     parser.add_argument('--nodes', type=int, default=2, choices=[2, 3, 4],
                         help="Number of variables in the dataset")
     parser.add_argument('--pair', type=str, default=None,
                         help="Filename (e.g., pair0001.txt or fork_data.csv)")
-    parser.add_argument('--alpha', type=float, default=0.05,
-                        help="Significance level for independence tests")
+    parser.add_argument('--target', type=str, default=None, metavar='COLUMN',
+                        help="Only search the parents, children and spouses of COLUMN (local MMPC search) and run "
+                             "the ANM on the edges that touch it, instead of the whole graph")
+    parser.add_argument('--anm-method', type=str, default='gp', choices=['gp', 'nystrom'],
+                        help="ANM backend: exact Gaussian process or the linear-time native backend")
+    parser.add_argument('--alpha-sweep', type=float, nargs='+', default=None, metavar='ALPHA',
+                        help="Run PC at each of these significance levels, computing every CI test once, and "
+                             "report how the graph changes (replaces the ANM, bootstrap and plotting phases)")
+    parser.add_argument('--bootstrap', type=int, default=0, metavar='B',
+                        help="Rerun PC and ANM on B resamples of the rows (in --jobs processes) and draw every "
+                             "edge with a width proportional to how often it was found")
+    parser.add_argument('--stream', action='store_true',
+                        help="Read the file in chunks and run PC on its covariance only (for files larger "
+                             "than RAM). Uses the 'cached_pearsonr' test and skips the ANM refinement")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows per chunk in --stream mode and in the conversion of --mmap")
+    parser.add_argument('--mmap', action='store_true',
+                        help="Memory-map the data instead of loading it (for files larger than RAM): .npy files "
+                             "are mapped as they are, text files are converted once into data/.cache/mmap. "
+                             "PC uses 'cached_pearsonr'; the ANM refinement reads one column pair at a time")
+    parser.add_argument('--incremental', type=str, default=None, metavar='STATE_FILE',
+                        help="Incremental mode for files that grow by appended rows: runs the native PC and "
+                             "ANM, keeps their state in STATE_FILE and on later runs only processes the new rows")
+    parser.add_argument('--reuse-anm', action='store_true',
+                        help="In --incremental mode, keep the ANM p-values of unchanged edges after rows were "
+                             "appended instead of testing them again (faster, but can differ from a full rerun)")
+    parser.add_argument('--no-display', action='store_true',
+                        help="Save the graph without opening a plot window (for servers and batch jobs)")
+    parser.add_argument('--profile-import', action='store_true',
+                        help="Print how long the imports of each package took when the run ends")
+    parser.add_argument('--metrics', type=str, default=None, choices=['text', 'json'],
+                        help="Report the wall/CPU time of each phase, the CI tests per depth and the ANM fit sizes")
+    parser.add_argument('--metrics-output', type=str, default=None, metavar='FILE',
+                        help="Write the --metrics report to FILE instead of printing it")
+
+    # ---- Sub-commands ----
+    # INTENT: Running without a sub-command keeps the original single-file pipeline.
+    subparsers = parser.add_subparsers(dest='command')
+
+    bench_parser = subparsers.add_parser('bench', help="Run the ANM direction test over all Tuebingen pairs")
+    bench_parser.add_argument('--method', type=str, default='gp', choices=['gp', 'nystrom'],
+                              help="ANM backend to benchmark")
+    bench_parser.add_argument('--alpha', type=float, default=0.05,
+                              help="Significance level for the ANM tests")
+    bench_parser.add_argument('--jobs', type=int, default=None,
+                              help="Number of worker processes (default: all cores)")
+    bench_parser.add_argument('--adaptive', action='store_true',
+                              help="Use the adaptive ANM on growing subsamples (see --anm-adaptive)")
+    bench_parser.add_argument('--max-rows', type=int, default=None,
+                              help="Skip pairs with more rows than this (useful for the 'gp' backend)")
+    bench_parser.add_argument('--output', type=str, default=os.path.join('results', 'bench'),
+                              help="Folder for the per-pair CSV/JSON report")
+    bench_parser.add_argument('--no-cache', action='store_true',
+                              help=f"Always parse the text files instead of reusing their binary copies in {DEFAULT_CACHE_DIR}")
+
+    batch_parser = subparsers.add_parser('batch', parents=[shared],
+                                         help="Run the pipeline on many files (any number of variables) "
+                                              "in a worker pool")
+    batch_parser.add_argument('inputs', nargs='*',
+                              help="Data files, directories or quoted glob patterns (e.g. 'data/pairs/pair00*.txt')")
+    batch_parser.add_argument('--manifest', type=str, default=None,
+                              help="Text file listing one data file per line (relative to the manifest)")
+    batch_parser.add_argument('--anm-method', type=str, default=argparse.SUPPRESS, choices=['gp', 'nystrom', 'none'],
+                              help="ANM backend for the edge refinement, or 'none' to skip it")
+    batch_parser.add_argument('--output', type=str, default=os.path.join('results', 'batch'),
+                              help="Folder for the adjacency matrices, graphs and summary.csv")
+
+    generate_parser = subparsers.add_parser('generate', help="Write a synthetic dataset sampled from a random linear SEM")
+    generate_parser.add_argument('--n-nodes', type=int, default=10,
+                                 help="Number of variables")
+    generate_parser.add_argument('--n-rows', type=int, default=10000,
+                                 help="Number of rows")
+    generate_parser.add_argument('--family', type=str, default='random', choices=['random', 'chain', 'fork', 'collider'],
+                                 help="DAG family")
+    generate_parser.add_argument('--density', type=float, default=0.1,
+                                 help="Edge probability of the 'random' family")
+    generate_parser.add_argument('--noise', type=str, default='gaussian',
+                                 choices=['gaussian', 'uniform', 'laplace', 'exponential', 'student_t'],
+                                 help="Noise distribution (non-Gaussian noise makes edge directions identifiable)")
+    generate_parser.add_argument('--seed', type=int, default=None,
+                                 help="Seed for the graph and the data")
+    generate_parser.add_argument('--output', type=str, default=os.path.join('data', 'synthetic', 'generated.csv'),
+                                 help="Output .csv or .parquet file; the true edges go to <name>_truth.csv")
 
     args = parser.parse_args()
+    defaults = dict(PIPELINE_DEFAULTS, **(BATCH_DEFAULTS if args.command == 'batch' else {}))
+    for name, value in defaults.items():
+        if not hasattr(args, name):
+            setattr(args, name, value)
+
+    # INTENT: --stream and --mmap run PC on the covariance matrix, which only the correlation tests
+    # can use; the kernel and contingency tests need the rows, so they are refused rather than
+    # silently replaced by a correlation test.
+    if (getattr(args, 'stream', False) or getattr(args, 'mmap', False)) \
+            and args.ci_test in ('kci', 'chi_square', 'g_sq'):
+        parser.error(f"--ci-test {args.ci_test} needs the rows in memory; with --stream or --mmap use "
+                     f"'pearsonr', 'fisher-z' or 'cached_pearsonr'")
+
+    # INTENT: The kernel test's settings travel inside its name ('kci:nystrom:200'), so every
+    # entry point (PC variants, sweep, bootstrap, batch, result store) gets them unchanged.
+    if getattr(args, 'ci_test', None) == 'kci':
+        from src.kernel_ci import kci_name
+        if args.kci_rank < 1:
+            parser.error("--kci-rank must be at least 1")
+        args.ci_test = kci_name(args.kci_approximation, args.kci_rank)
+    elif getattr(args, 'ci_test', None) in ('chi_square', 'g_sq'):
+        from src.discrete import contingency_name
+        if args.bins < 2:
+            parser.error("--bins must be at least 2")
+        args.ci_test = contingency_name(args.ci_test, args.bins)
+
+    if getattr(args, 'target', None) is not None and (args.alpha_sweep or args.incremental):
+        parser.error("--target cannot be combined with --alpha-sweep or --incremental")
+
+    METRICS.reset()
+    try:
+        run(args)
+    finally:
+        if args.metrics:
+            emit_metrics(args.metrics, args.metrics_output)
+
+
+def run(args):
+    """
+    Runs the sub-command, or the single-file pipeline, selected on the command line.
+    """
+    if args.command == 'bench':
+        from src.bench import run_benchmark
+        run_benchmark(os.path.join('data', 'pairs'), alpha=args.alpha, method=args.method,
+                      jobs=args.jobs, max_rows=args.max_rows, output_dir=args.output,
+                      cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR, adaptive=args.adaptive)
+        return
+
+    if args.command == 'batch':
+        from src.batch import run_batch
+        from src.store import DEFAULT_STORE_DIR
+        if not args.inputs and args.manifest is None:
+            print("Error: Give at least one file, directory, glob pattern or --manifest.")
+            return
+        run_batch(args.inputs, manifest=args.manifest, output_dir=args.output, jobs=args.jobs, alpha=args.alpha,
+                  test_name=args.ci_test, pc_variant=args.pc_variant,
+                  anm_method=None if args.anm_method == 'none' else args.anm_method, anm_alpha=args.anm_alpha,
+                  adaptive=args.anm_adaptive, confidence=args.anm_confidence,
+                  graph_format=args.format, cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR,
+                  store_dir=None if args.no_store else DEFAULT_STORE_DIR,
+                  dtype=None if args.dtype == 'float64' else args.dtype)
+        return
+
+    if args.command == 'generate':
+        from src.synthetic import write_dataset
+        dag = write_dataset(args.output, args.n_nodes, args.n_rows, density=args.density, family=args.family,
+                            noise=args.noise, seed=args.seed)
+        print(f"Wrote {args.n_rows} rows of a {args.n_nodes}-node DAG ({dag.number_of_edges()} edges) to {args.output}")
+        return
 
     # ---- Smart Defaults Configuration ----
     # INTENT: This dictionary was created to make the use of this program form the command line
@@ -32,16 +253,92 @@ def main():
         data_folder = defaults[args.nodes][0]
         target_file = args.pair
 
+    # ---- Incremental Mode ----
+    # INTENT: For files that grow by appended rows, only the new rows are read and the previous
+    # result is reused where the new data cannot change it (see src/incremental.py).
+    if args.incremental:
+        from src.incremental import run_incremental
+        print(f"\n--- Updating: {target_file} (state: {args.incremental}) ---")
+        dag, _ = run_incremental(data_folder, target_file, args.incremental, alpha=args.alpha,
+                                 anm_method=args.anm_method, anm_alpha=args.anm_alpha, reuse_anm=args.reuse_anm,
+                                 jobs=args.jobs, cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR)
+        if dag is not None:
+            show_results(dag, target_file, args)
+        return
+
     # ---- Data Loading Phase ----
     print(f"\n--- Loading: {target_file} ---")
-    df = load_causal_data(data_folder, target_file)
+    # Checked before the loaders (and pandas) are imported, so a mistyped --pair fails fast.
+    if not os.path.exists(os.path.join(data_folder, target_file)):
+        print(f"Error: File not found at {os.path.join(data_folder, target_file)}")
+        return
+
+    from src.loaders import load_causal_data, stream_sufficient_statistics
+    if args.stream:
+        # INTENT: Only the covariance matrix is accumulated, so the file is never held in memory.
+        df = stream_sufficient_statistics(data_folder, target_file, chunksize=args.chunk_size)
+    elif args.mmap:
+        # INTENT: The data stays on disk; PC reads it in blocks of rows and ANM one column pair
+        # at a time (see src/matrix.py).
+        from src.matrix import load_matrix
+        df = load_matrix(data_folder, target_file, None if args.no_cache else DEFAULT_CACHE_DIR, dtype=args.dtype,
+                         chunksize=args.chunk_size)
+    else:
+        df = load_causal_data(data_folder, target_file, cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR,
+                              dtype=None if args.dtype == 'float64' else args.dtype)
 
     if df is None:
         return
 
+    # INTENT: Discrete and categorical columns are only handled as such by the contingency tests,
+    # so the user is told when the Gaussian default meets them.
+    if not args.stream and not args.mmap:
+        from src.discrete import infer_column_types
+        types = infer_column_types(df)
+        non_continuous = [f"{col} ({kind})" for col, kind in types.items() if kind != 'continuous']
+        if non_continuous:
+            print(f"Non-continuous columns: {', '.join(non_continuous)}")
+            if args.ci_test in ('pearsonr', 'fisher-z', 'cached_pearsonr'):
+                print("Hint: '--ci-test chi_square' or 'g_sq' treats them as discrete and bins the others.")
+
+    # ---- Alpha Sweep ----
+    # INTENT: The p-values of the CI tests do not depend on alpha, so every candidate alpha is
+    # replayed from one shared set of test results (see src/sweep.py).
+    if args.alpha_sweep:
+        run_sweep(df, target_file, args)
+        return
+
+    # ---- Local Structure ----
+    # INTENT: Only the neighbourhood of the target is searched and refined, so the cost depends on
+    # its size rather than on the number of columns (see src/local.py).
+    if args.target is not None:
+        run_target(df, target_file, args)
+        return
+
+    # ---- Result Store ----
+    # INTENT: Stages whose data and settings match an earlier run are read back instead of
+    # recomputed (see src/store.py). Streamed statistics have no rows to hash, and hashing a mapped
+    # file would read all of it on every run, so both bypass it.
+    store_digest = None
+    if not args.no_store and not args.stream and not args.mmap:
+        from src.store import data_hash, run_pc_stored, refine_edges_stored, DEFAULT_STORE_DIR
+        with phase('store'):
+            store_digest = data_hash(df)
+
     # ---- Phase 1: Structure Discovery (PC Algorithm) ----
     print(f"Running PC Algorithm on {len(df.columns)} variables...")
-    dag = run_pc_algo_library(data=df, alpha=args.alpha)
+    if store_digest is not None:
+        dag = run_pc_stored(df, DEFAULT_STORE_DIR, store_digest, alpha=args.alpha, test_name=args.ci_test,
+                            pc_variant=args.pc_variant, jobs=args.jobs)
+    elif args.pc_variant == 'stable':
+        from src.stable_pc import run_pc_algo_stable
+        dag = run_pc_algo_stable(data=df, alpha=args.alpha, test_name=args.ci_test, jobs=args.jobs)
+    else:
+        from src.causality import run_pc_algo_library
+        dag = run_pc_algo_library(data=df, alpha=args.alpha, test_name=args.ci_test)
+
+    if dag is None:
+        return
 
     # ---- Phase 2: Direction Refinement (Hybrid ANM) ----
     # NOTE: Initial testing revealed that while the PC algorithm
@@ -53,36 +350,143 @@ def main():
     # to every edge found by the PC algorithm, we hope to break the statistical ties
     # between Forks and Chains.
 
-    print("Refining edge orientations using Additive Noise Models...")
-    current_edges = list(dag.edges())
+    if args.stream:
+        print("Skipping the ANM refinement: it needs the individual rows, which --stream does not keep.")
+    else:
+        print("Refining edge orientations using Additive Noise Models...")
+        if store_digest is not None:
+            dag = refine_edges_stored(df, dag, DEFAULT_STORE_DIR, store_digest, alpha=args.anm_alpha,
+                                      method=args.anm_method, jobs=args.jobs, adaptive=args.anm_adaptive,
+                                      confidence=args.anm_confidence)
+        else:
+            from src.refinement import refine_edges_anm
+            dag = refine_edges_anm(df, dag, alpha=args.anm_alpha, method=args.anm_method, jobs=args.jobs,
+                                   adaptive=args.anm_adaptive, confidence=args.anm_confidence)
+
+    # ---- Phase 3: Edge Stability (Bootstrap) ----
+    # INTENT: Rerunning both phases on resampled rows shows how much of the graph is supported
+    # by the data rather than by this particular sample.
+    edge_frequencies = None
+    if args.bootstrap > 0 and args.stream:
+        print("Skipping the bootstrap: resampling needs the individual rows, which --stream does not keep.")
+    elif args.bootstrap > 0 and args.mmap:
+        print("Skipping the bootstrap: every resample would be a full copy of the mapped data in memory.")
+    elif args.bootstrap > 0:
+        from src.bootstrap import bootstrap_edge_frequencies
+        print(f"Bootstrapping the pipeline on {args.bootstrap} resamples...")
+        edge_frequencies, n_successful = bootstrap_edge_frequencies(
+            df, n_resamples=args.bootstrap, alpha=args.alpha, test_name=args.ci_test, pc_variant=args.pc_variant,
+            anm_method=args.anm_method, anm_alpha=args.anm_alpha, adaptive=args.anm_adaptive, jobs=args.jobs)
+        print(f"Edge frequencies over {n_successful} resamples (row -> column):\n{edge_frequencies.round(2)}")
 
-    for u, v in current_edges:
-        pair_df = df[[u, v]]
+        frequencies_path = os.path.join('results', f"{os.path.splitext(target_file)[0]}_bootstrap.csv")
+        os.makedirs('results', exist_ok=True)
+        edge_frequencies.to_csv(frequencies_path)
+        print(f"Edge frequencies saved to: {frequencies_path}")
 
-        # ANM check
-        direction, _, _ = check_causal_direction_anm(df=pair_df, alpha=0.05)
+    show_results(dag, target_file, args, edge_frequencies=edge_frequencies)
+
+
+def run_sweep(df, target_file, args):
+    """
+    Runs the --alpha-sweep, prints how the graph changes and saves the edge-by-alpha table.
+    """
+    from src.sweep import run_alpha_sweep, sweep_table, format_sweep_report
+    if any(not 0 < alpha < 1 for alpha in args.alpha_sweep):
+        print("Error: Every --alpha-sweep value must lie between 0 and 1.")
+        return
+
+    print(f"Sweeping PC over {len(set(args.alpha_sweep))} significance levels on {len(df.columns)} variables...")
+    results = run_alpha_sweep(df, sorted(set(args.alpha_sweep)), test_name=args.ci_test, pc_variant=args.pc_variant)
+    table = sweep_table(results)
+    print(format_sweep_report(results))
+    print(f"Edges by alpha:\n{table}")
+
+    table_path = os.path.join('results', f"{os.path.splitext(target_file)[0]}_alpha_sweep.csv")
+    os.makedirs('results', exist_ok=True)
+    table.to_csv(table_path)
+    print(f"Sweep table saved to: {table_path}")
 
-        # If ANM evidence suggests the reverse of the PC orientation, we flip it.
-        # This correction is what allows the 'Fork' data to be correctly visualized.
-        if direction == "B --> A":  # 'B' represents the second node in the pair (v)
-            print(f"  [ANM Correction] Reversing edge {u}->{v} to {v}->{u}")
-            dag.remove_edge(u, v)
-            dag.add_edge(v, u)
-        else:
-            print(f"  [ANM Confirmed] Direction: {u}->{v}")
 
+def run_target(df, target_file, args):
+    """
+    Runs the --target mode: the local search around one column, the ANM on the edges that touch
+    it, and the report of its parents, children and spouses.
+    """
+    from src.local import discover_local_structure, refine_target_edges, format_local_structure
+    print(f"Searching the Markov blanket of {args.target} among {len(df.columns)} variables...")
+    result = discover_local_structure(df, args.target, alpha=args.alpha, test_name=args.ci_test)
+    if result is None:
+        return
+
+    dag = result['dag']
+    print(f"{result['tests']} CI tests computed; {dag.number_of_nodes()} variables in the local graph.")
+
+    if args.stream:
+        print("Skipping the ANM refinement: it needs the individual rows, which --stream does not keep.")
+    else:
+        print(f"Refining the edges of {args.target} using Additive Noise Models...")
+        dag = refine_target_edges(df, dag, args.target, alpha=args.anm_alpha, method=args.anm_method,
+                                  jobs=args.jobs, adaptive=args.anm_adaptive, confidence=args.anm_confidence)
+
+    if args.bootstrap > 0:
+        print("Skipping the bootstrap: --target only runs the local search.")
+
+    print(format_local_structure(dag, args.target, result['spouses']))
+    show_results(dag, f"{os.path.splitext(target_file)[0]}_{args.target}", args)
+
+
+def emit_metrics(output_format, output_path=None):
+    """
+    Prints the metrics recorded during the run (see src/metrics.py), or writes them to 'output_path'.
+    """
+    text = METRICS.to_json(indent=2) if output_format == 'json' else METRICS.report()
+
+    if output_path is None:
+        print(text)
+        return
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_path, 'w') as f:
+        f.write(text + "\n")
+    print(f"Metrics written to {output_path}")
+
+
+def show_results(dag, target_file, args, edge_frequencies=None):
+    """
+    Prints the final graph and saves (and optionally displays) it under results/.
+    With bootstrap 'edge_frequencies', the edges are drawn with proportional widths.
+    """
     # ---- Visualization and Export ----
+    from src.causality import get_adjacency_matrix
+    from src.adjacency import describe_edges, DENSE_PRINT_LIMIT
+    from src.graphs import draw_causal_graph, export_graph_text
     base_name = os.path.splitext(target_file)[0]
-    output_path = os.path.join('results', f"{base_name}.png")
+    output_path = os.path.join('results', f"{base_name}.{args.format}")
     display_title = f"Causal Analysis: {base_name}"
 
     print(f"\nFinal Graph: {dag.number_of_nodes()} nodes, {dag.number_of_edges()} edges.")
-    print(f"Adjacency Matrix:\n{get_adjacency_matrix(dag=dag)}")
+    if dag.number_of_nodes() <= DENSE_PRINT_LIMIT:
+        print(f"Adjacency Matrix:\n{get_adjacency_matrix(dag=dag)}")
+    else:
+        # A dense matrix of this size is unreadable (and slow to build); the edges say the same.
+        print(f"Edges:\n{describe_edges(dag, limit=100)}")
 
-    draw_causal_graph(dag,
-                      title=display_title,
-                      save_path=output_path)
+    if args.format == 'png':
+        draw_causal_graph(dag,
+                          title=display_title,
+                          save_path=output_path,
+                          show=not args.no_display,
+                          edge_frequencies=edge_frequencies)
+    else:
+        export_graph_text(dag, output_path, title=display_title, edge_frequencies=edge_frequencies)
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        if IMPORT_PROFILER is not None:
+            print(IMPORT_PROFILER.stop().report())
@@ -0,0 +1,299 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+# ==========================================
+# Compact Adjacency Representations
+# ==========================================
+#
+# INTENT: get_adjacency_matrix and get_matrix build dense n x n tables, which for 1,000+
+# variables take megabytes, print as an unreadable wall of zeros and are slow to serialize,
+# although a causal DAG rarely has more than a few edges per node. This module keeps the
+# adjacency as a scipy CSR matrix (one entry per edge) or as a bitset (one bit per pair, for
+# fast membership tests), and reads and writes a compact edge-list text format.
+#
+# SparseDAG offers the read-only part of the networkx DiGraph interface the exports use
+# (nodes(), edges(), number_of_edges(), ...), so graph_to_dot, graph_to_svg and
+# export_graph_text accept a graph read from an edge list without rebuilding a DiGraph.
+#
+# Edge-list format ('.edges'), nodes referred to by their 0-based position:
+#
+#     psee-edges 1 <n_nodes> <n_edges>
+#     <one node name per line>
+#     <one 'cause effect' index pair per line>
+
+EDGE_LIST_HEADER = 'psee-edges'
+EDGE_LIST_VERSION = 1
+
+# Graphs with more nodes are printed as an edge list instead of a dense matrix.
+DENSE_PRINT_LIMIT = 20
+
+
+class SparseDAG:
+    """
+    A directed graph stored as a CSR matrix over a fixed, ordered list of nodes.
+    """
+
+    def __init__(self, matrix, nodes):
+        self.matrix = sparse.csr_matrix(matrix, dtype=np.int8)
+        self.matrix.eliminate_zeros()
+        self.matrix.sort_indices()
+        self._nodes = list(nodes)
+        self._index = {node: i for i, node in enumerate(self._nodes)}
+        self._incoming = None
+
+        if self.matrix.shape != (len(self._nodes), len(self._nodes)):
+            raise ValueError(f"Matrix of shape {self.matrix.shape} does not match {len(self._nodes)} nodes.")
+
+    @classmethod
+    def from_graph(cls, graph, nodes=None):
+        """
+        Builds the CSR matrix of a networkx graph. The nodes are sorted, as in get_adjacency_matrix.
+        """
+        return cls(to_csr(graph, nodes), sorted(graph.nodes()) if nodes is None else nodes)
+
+    @classmethod
+    def from_edges(cls, nodes, edges):
+        """
+        Builds the graph from (cause, effect) pairs of node names.
+        """
+        index = {node: i for i, node in enumerate(nodes)}
+        pairs = np.array([(index[u], index[v]) for u, v in edges], dtype=np.int64).reshape(-1, 2)
+        return cls(_pairs_to_csr(pairs[:, 0], pairs[:, 1], len(index)), nodes)
+
+    # ---- networkx-compatible, read-only view ----
+
+    def nodes(self):
+        return list(self._nodes)
+
+    def edges(self):
+        """
+        Returns:
+            list: The (cause, effect) pairs, ordered by the position of the cause, then of the effect.
+        """
+        rows, cols = self.edge_indices()
+        return [(self._nodes[i], self._nodes[j]) for i, j in zip(rows.tolist(), cols.tolist())]
+
+    def number_of_nodes(self):
+        return len(self._nodes)
+
+    def number_of_edges(self):
+        return int(self.matrix.nnz)
+
+    def has_edge(self, u, v):
+        i, j = self._index.get(u), self._index.get(v)
+        if i is None or j is None:
+            return False
+        row = self.matrix.indices[self.matrix.indptr[i]:self.matrix.indptr[i + 1]]
+        # Column indices of a row are sorted, so a binary search finds the edge.
+        position = np.searchsorted(row, j)
+        return bool(position < len(row) and row[position] == j)
+
+    def successors(self, node):
+        i = self._index[node]
+        return [self._nodes[j] for j in self.matrix.indices[self.matrix.indptr[i]:self.matrix.indptr[i + 1]]]
+
+    def predecessors(self, node):
+        if self._incoming is None:
+            self._incoming = self.matrix.tocsc()
+        j = self._index[node]
+        return [self._nodes[i] for i in self._incoming.indices[self._incoming.indptr[j]:self._incoming.indptr[j + 1]]]
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, node):
+        return node in self._index
+
+    # ---- conversions ----
+
+    def edge_indices(self):
+        """
+        Returns:
+            tuple: (cause positions, effect positions) as two int arrays.
+        """
+        counts = np.diff(self.matrix.indptr)
+        return np.repeat(np.arange(len(self._nodes)), counts), self.matrix.indices.astype(np.int64)
+
+    def to_graph(self):
+        """
+        Returns:
+            nx.DiGraph: The same graph as a networkx DiGraph (for the stages that need one).
+        """
+        import networkx as nx
+        graph = nx.DiGraph()
+        graph.add_nodes_from(self._nodes)
+        graph.add_edges_from(self.edges())
+        return graph
+
+    def to_dense(self):
+        """
+        Returns:
+            pd.DataFrame: The dense 0/1 matrix, laid out like get_adjacency_matrix's.
+        """
+        return pd.DataFrame(self.matrix.toarray().astype(int), index=self._nodes, columns=self._nodes)
+
+    def to_bitset(self):
+        return csr_to_bitset(self.matrix)
+
+
+def _pairs_to_csr(rows, cols, n_nodes):
+    data = np.ones(len(rows), dtype=np.int8)
+    matrix = sparse.csr_matrix((data, (rows, cols)), shape=(n_nodes, n_nodes), dtype=np.int8)
+    # Repeated pairs are summed by the constructor; an edge is an edge, however often it is listed.
+    matrix.data[:] = 1
+    return matrix
+
+
+def to_csr(graph, nodes=None):
+    """
+    Returns the adjacency of a graph as a scipy CSR matrix, without a dense intermediate.
+
+    Args:
+        graph (nx.DiGraph | SparseDAG): The graph.
+        nodes (list): Row and column order (default: the sorted nodes, as in get_adjacency_matrix).
+
+    Returns:
+        scipy.sparse.csr_matrix: int8 matrix with a 1 at (cause, effect).
+    """
+    if isinstance(graph, SparseDAG) and (nodes is None or list(nodes) == graph.nodes()):
+        return graph.matrix.copy()
+
+    nodes = sorted(graph.nodes()) if nodes is None else list(nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    pairs = np.array([(index[u], index[v]) for u, v in graph.edges()], dtype=np.int64).reshape(-1, 2)
+
+    return _pairs_to_csr(pairs[:, 0], pairs[:, 1], len(nodes))
+
+
+def csr_to_bitset(matrix):
+    """
+    Packs an adjacency matrix into one bit per node pair.
+
+    Returns:
+        np.ndarray: uint8 array of shape (n, ceil(n / 8)); bit j of row i (numpy's big-endian
+                    bit order, as in np.packbits) is set if there is an edge i -> j.
+    """
+    matrix = sparse.csr_matrix(matrix, copy=True)
+    matrix.eliminate_zeros()
+    n_rows, n_cols = matrix.shape
+    bits = np.zeros((n_rows, (n_cols + 7) // 8), dtype=np.uint8)
+
+    rows = np.repeat(np.arange(n_rows), np.diff(matrix.indptr))
+    cols = matrix.indices.astype(np.int64)
+    np.bitwise_or.at(bits, (rows, cols >> 3), (0x80 >> (cols & 7)).astype(np.uint8))
+
+    return bits
+
+
+def bitset_to_csr(bits):
+    """
+    Unpacks a square adjacency bitset from csr_to_bitset, touching only the bytes that hold edges.
+    """
+    rows, byte_cols = np.nonzero(bits)
+    set_bits = np.unpackbits(bits[rows, byte_cols][:, None], axis=1)
+    hits, bit_positions = np.nonzero(set_bits)
+
+    return _pairs_to_csr(rows[hits], byte_cols[hits] * 8 + bit_positions, bits.shape[0])
+
+
+def bitset_has_edge(bits, i, j):
+    """
+    Tests the edge i -> j of a bitset in constant time.
+    """
+    return bool(bits[i, j >> 3] & (0x80 >> (j & 7)))
+
+
+# ==========================================
+# Edge-List Serialization
+# ==========================================
+
+def format_edge_list(graph, nodes=None):
+    """
+    Serializes a graph in the edge-list format described at the top of this module.
+
+    Args:
+        graph (nx.DiGraph | SparseDAG): The graph.
+        nodes (list): Node order (default: the sorted nodes, or the order of a SparseDAG).
+
+    Returns:
+        str: The text, ending with a newline.
+    """
+    dag = graph if isinstance(graph, SparseDAG) and nodes is None else SparseDAG.from_graph(graph, nodes)
+    for node in dag.nodes():
+        if '\n' in str(node) or '\r' in str(node):
+            raise ValueError(f"Node name {node!r} contains a line break.")
+
+    rows, cols = dag.edge_indices()
+    lines = [f"{EDGE_LIST_HEADER} {EDGE_LIST_VERSION} {dag.number_of_nodes()} {dag.number_of_edges()}"]
+    lines += [str(node) for node in dag.nodes()]
+    lines += [f"{i} {j}" for i, j in zip(rows.tolist(), cols.tolist())]
+
+    return "\n".join(lines) + "\n"
+
+
+def parse_edge_list(text):
+    """
+    Parses the text written by format_edge_list.
+
+    Returns:
+        SparseDAG: The graph. Node names are read back as strings.
+    """
+    lines = text.splitlines()
+    header = lines[0].split() if lines else []
+    if len(header) != 4 or header[0] != EDGE_LIST_HEADER:
+        raise ValueError("Not a PSee edge list (missing 'psee-edges' header).")
+    if int(header[1]) != EDGE_LIST_VERSION:
+        raise ValueError(f"Unsupported edge-list version {header[1]}.")
+
+    n_nodes, n_edges = int(header[2]), int(header[3])
+    nodes = lines[1:1 + n_nodes]
+    # One split over all index lines is much faster than parsing them one by one.
+    pairs = np.array(" ".join(lines[1 + n_nodes:]).split(), dtype=np.int64).reshape(-1, 2)
+
+    if len(nodes) != n_nodes or len(pairs) != n_edges:
+        raise ValueError(f"Truncated edge list: expected {n_nodes} nodes and {n_edges} edges, "
+                         f"found {len(nodes)} and {len(pairs)}.")
+    if len(pairs) and (pairs.min() < 0 or pairs.max() >= n_nodes):
+        raise ValueError("Edge list refers to a node that does not exist.")
+
+    return SparseDAG(_pairs_to_csr(pairs[:, 0], pairs[:, 1], n_nodes), nodes)
+
+
+def write_edge_list(graph, path, nodes=None):
+    """
+    Writes a graph to 'path' in the edge-list format.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(format_edge_list(graph, nodes))
+
+
+def read_edge_list(path):
+    """
+    Reads a file written by write_edge_list.
+
+    Returns:
+        SparseDAG: The graph.
+    """
+    with open(path, encoding='utf-8') as f:
+        return parse_edge_list(f.read())
+
+
+def describe_edges(graph, limit=None):
+    """
+    Lists the edges as 'cause -> effect' lines, the readable alternative to printing a dense
+    matrix for large graphs.
+
+    Args:
+        limit (int): Maximum number of edges to list (None: all of them).
+    """
+    edges = list(graph.edges())
+    lines = [f"  {u} -> {v}" for u, v in (edges if limit is None else edges[:limit])]
+    if limit is not None and len(edges) > limit:
+        lines.append(f"  ... and {len(edges) - limit} more edges")
+
+    return "\n".join(lines) if lines else "  (no edges)"
@@ -0,0 +1,286 @@
+import numpy as np
+from scipy import optimize, stats
+
+
+# ==========================================
+# Native Additive Noise Model (ANM) backend
+# ==========================================
+#
+# INTENT: causal-learn's ANM fits a full Gaussian process in both directions and then
+# runs a kernel HSIC test on n x n kernel matrices. Both steps cost O(n^3) time and
+# O(n^2) memory, which rules out pairs with more than a few thousand rows.
+# This module approximates the GP with inducing points (Nystroem) and the HSIC test with
+# Random Fourier Features (RFF), so both steps are linear in the number of rows.
+# The kernels, hyperparameter bounds, kernel widths and gamma approximation mirror
+# causal-learn, which keeps the p-values comparable to the 'gp' backend.
+
+# Rows processed at once. Feature matrices never grow beyond BLOCK_SIZE x n_features.
+BLOCK_SIZE = 65536
+
+# INTENT: float32 pairs (main.py --dtype float32) stay float32: the standardized columns, the
+# residuals and the feature blocks use half the memory and bandwidth, while the hyperparameter
+# search (on a subsample) and every accumulated product (m x m or D x D) are kept in float64.
+# On the bundled pairs the p-values move by less than 0.004, except on borderline pairs where
+# rounding the data itself moves them (README.md, 'float32 Mode').
+
+
+def _float_dtype(values):
+    """
+    np.float32 for float32 input, np.float64 for anything else.
+    """
+    return np.float32 if np.asarray(values).dtype == np.float32 else np.float64
+
+
+def _blocks(n_samples, block_size=BLOCK_SIZE):
+    for start in range(0, n_samples, block_size):
+        yield slice(start, min(start + block_size, n_samples))
+
+
+def _standardize(values):
+    """
+    Z-scores a 1-D array with ddof=1. Constant columns become all zeros. float32 stays float32.
+    """
+    values = np.asarray(values, dtype=_float_dtype(values)).ravel()
+    std = values.std(ddof=1, dtype=np.float64) if values.size > 1 else 0.0
+
+    if not np.isfinite(std) or std == 0:
+        return np.zeros_like(values)
+
+    return ((values - values.mean(dtype=np.float64)) / std).astype(values.dtype, copy=False)
+
+
+def _hsic_kernel_width(n_samples):
+    """
+    Empirical Gaussian kernel width used by causal-learn's KCI_UInd (on z-scored data).
+    """
+    if n_samples < 200:
+        return 0.8
+    elif n_samples < 1200:
+        return 0.5
+    return 0.3
+
+
+def random_fourier_features(x, frequencies, phases):
+    """
+    Maps a 1-D sample onto Random Fourier Features of a Gaussian kernel.
+
+    Args:
+        x (np.ndarray): The sample, shape (n,).
+        frequencies (np.ndarray): Frequencies drawn from N(0, 1 / width^2), shape (D,).
+        phases (np.ndarray): Phases drawn from U(0, 2 * pi), shape (D,).
+
+    Returns:
+        np.ndarray: Feature matrix of shape (n, D) with phi(x) @ phi(y) ~= k(x, y).
+    """
+    n_features = frequencies.shape[0]
+    projection = np.multiply.outer(x, frequencies.astype(x.dtype, copy=False))
+    projection += phases.astype(x.dtype, copy=False)
+
+    projection = np.cos(projection, out=projection)
+    projection *= np.sqrt(2.0 / n_features)
+    return projection
+
+
+def _rbf(a, b, lengthscale):
+    # In the precision of 'a', so float32 rows give float32 kernel blocks.
+    return np.exp(-0.5 * np.subtract.outer(a, b.astype(a.dtype, copy=False)) ** 2 / a.dtype.type(lengthscale ** 2))
+
+
+def _nystroem_projection(inducing_points, lengthscale):
+    """
+    Returns the m x r matrix P such that rbf(x, z) @ P are the Nystroem features of x.
+    """
+    eigvals, eigvecs = np.linalg.eigh(_rbf(inducing_points, inducing_points, lengthscale))
+    keep = eigvals > eigvals.max() * 1e-10
+
+    return eigvecs[:, keep] / np.sqrt(eigvals[keep])
+
+
+def _inducing_points(x, n_inducing):
+    """
+    Uses every distinct value when there are few of them, so the sparse GP becomes exact
+    on heavily discretized Tuebingen columns; otherwise spreads the points over the quantiles.
+    """
+    unique = np.unique(x)
+    if unique.shape[0] <= n_inducing:
+        return unique
+
+    return np.quantile(unique, np.linspace(0, 1, n_inducing))
+
+
+def _log_evidence(eigvals, proj_sq, yty, n_samples, signal_var, noise_var):
+    """
+    Log marginal likelihood of Bayesian linear regression on a feature map,
+    evaluated from the eigen-decomposition of phi.T @ phi (m x m) rather than the n x n Gram matrix.
+    """
+    n_features = eigvals.shape[0]
+    shrunk = signal_var * eigvals + noise_var
+
+    log_det = (n_samples - n_features) * np.log(noise_var) + np.sum(np.log(shrunk))
+    quad = (yty - np.sum(signal_var * proj_sq / shrunk)) / noise_var
+
+    return -0.5 * (log_det + quad + n_samples * np.log(2 * np.pi))
+
+
+def fit_sparse_gp(x, y, n_inducing=100, max_tuning_samples=2000, rng=None):
+    """
+    Fits y = f(x) + noise with an inducing-point approximation of the GP used by causal-learn's ANM.
+
+    The GP there uses ConstantKernel * RBF + WhiteKernel on the raw (unscaled) data with a
+    zero prior mean, and picks its hyperparameters by maximizing the marginal likelihood.
+    We keep that parameterization (including the hyperparameter bounds and the starting
+    point), but evaluate the marginal likelihood on a subsample of at most
+    'max_tuning_samples' rows. The final fit then runs blockwise on all rows in O(n * m^2).
+
+    Args:
+        x (np.ndarray): Hypothetical cause, shape (n,).
+        y (np.ndarray): Hypothetical effect, shape (n,).
+        n_inducing (int): Number of inducing points (m).
+        max_tuning_samples (int): Rows used for hyperparameter selection.
+        rng (np.random.Generator): Source of randomness for subsampling.
+
+    Returns:
+        np.ndarray: The fitted values of y, shape (n,).
+    """
+    rng = np.random.default_rng(rng)
+
+    dtype = _float_dtype(x)
+    x = np.asarray(x, dtype=dtype).ravel()
+    y = np.asarray(y, dtype=dtype).ravel()
+    inducing_points = _inducing_points(x, n_inducing).astype(np.float64)
+
+    # Hyperparameter selection on a subsample keeps tuning cost independent of n.
+    if x.shape[0] > max_tuning_samples:
+        idx = rng.choice(x.shape[0], size=max_tuning_samples, replace=False)
+    else:
+        idx = slice(None)
+    x_tune, y_tune = x[idx].astype(np.float64), y[idx].astype(np.float64)
+    yty = y_tune @ y_tune
+
+    def negative_log_evidence(log_params):
+        signal_var, lengthscale, noise_var = np.exp(log_params)
+        phi = _rbf(x_tune, inducing_points, lengthscale) @ _nystroem_projection(inducing_points, lengthscale)
+        eigvals, eigvecs = np.linalg.eigh(phi.T @ phi)
+        eigvals = np.clip(eigvals, 0, None)
+        proj_sq = (eigvecs.T @ (phi.T @ y_tune)) ** 2
+        return -_log_evidence(eigvals, proj_sq, yty, x_tune.shape[0], signal_var, noise_var)
+
+    # Same starting point and bounds as causal-learn:
+    # C(1.0, (1e-3, 1e3)) * RBF(1.0, (1e-2, 1e2)) + WhiteKernel(0.1, (1e-10, 1e+1))
+    bounds = np.log([(1e-3, 1e3), (1e-2, 1e2), (1e-10, 1e1)])
+    result = optimize.minimize(negative_log_evidence, np.log([1.0, 1.0, 0.1]),
+                               method='L-BFGS-B', bounds=bounds)
+    signal_var, lengthscale, noise_var = np.exp(result.x)
+
+    # Posterior mean on all rows: accumulate phi.T @ phi and phi.T @ y block by block.
+    projection = _nystroem_projection(inducing_points, lengthscale)
+    block_projection = projection.astype(dtype)
+    gram = np.zeros((projection.shape[1], projection.shape[1]))
+    phi_y = np.zeros(projection.shape[1])
+    for block in _blocks(x.shape[0]):
+        phi = _rbf(x[block], inducing_points, lengthscale) @ block_projection
+        gram += phi.T @ phi
+        phi_y += phi.T @ y[block]
+
+    gram[np.diag_indices_from(gram)] += noise_var / signal_var
+    weights = (projection @ np.linalg.solve(gram, phi_y)).astype(dtype)
+
+    fitted = np.empty_like(y)
+    for block in _blocks(x.shape[0]):
+        fitted[block] = _rbf(x[block], inducing_points, lengthscale) @ weights
+
+    return fitted
+
+
+def hsic_test_rff(x, y, n_features=100, rng=None):
+    """
+    Linear-time HSIC independence test with the gamma approximation of the null distribution.
+
+    Every quantity of causal-learn's KCI_UInd (the V-statistic, the traces and the squared
+    Frobenius norms of the centered kernel matrices) is computed from D x D feature products
+    instead of n x n kernel matrices.
+
+    Returns:
+        tuple: (p_value, test_statistic)
+    """
+    rng = np.random.default_rng(rng)
+
+    x = _standardize(x)
+    y = _standardize(y)
+    n_samples = x.shape[0]
+    width = _hsic_kernel_width(n_samples)
+
+    frequencies = [rng.standard_normal(n_features) / width for _ in range(2)]
+    phases = [rng.uniform(0, 2 * np.pi, n_features) for _ in range(2)]
+
+    # Raw sums are accumulated blockwise and centered at the end:
+    # sum((a - mean_a)(b - mean_b)^T) = sum(a b^T) - n * mean_a mean_b^T
+    sum_x, sum_y = np.zeros(n_features), np.zeros(n_features)
+    prod_xx = np.zeros((n_features, n_features))
+    prod_yy = np.zeros((n_features, n_features))
+    prod_xy = np.zeros((n_features, n_features))
+    for block in _blocks(n_samples):
+        phi_x = random_fourier_features(x[block], frequencies[0], phases[0])
+        phi_y = random_fourier_features(y[block], frequencies[1], phases[1])
+        sum_x += phi_x.sum(axis=0)
+        sum_y += phi_y.sum(axis=0)
+        prod_xx += phi_x.T @ phi_x
+        prod_yy += phi_y.T @ phi_y
+        prod_xy += phi_x.T @ phi_y
+
+    mean_x, mean_y = sum_x / n_samples, sum_y / n_samples
+    cov_xx = prod_xx - n_samples * np.outer(mean_x, mean_x)
+    cov_yy = prod_yy - n_samples * np.outer(mean_y, mean_y)
+    cov_xy = prod_xy - n_samples * np.outer(mean_x, mean_y)
+
+    test_stat = np.sum(cov_xy ** 2)
+
+    mean_appr = np.trace(cov_xx) * np.trace(cov_yy) / n_samples
+    var_appr = 2 * np.sum(cov_xx ** 2) * np.sum(cov_yy ** 2) / n_samples / n_samples
+    if mean_appr <= 0 or var_appr <= 0:
+        return 1.0, float(test_stat)
+
+    k_appr = mean_appr ** 2 / var_appr
+    theta_appr = var_appr / mean_appr
+    # Same expression as causal-learn's KCI_UInd: a p-value beyond double precision is exactly 0,
+    # as it is for the 'gp' backend, so both backends report the same verdict for such pairs.
+    p_value = 1 - stats.gamma.cdf(test_stat, k_appr, 0, theta_appr)
+
+    return float(p_value), float(test_stat)
+
+
+def cause_or_effect_native(data_x, data_y, n_features=100, seed=0):
+    """
+    Drop-in replacement for causal-learn's ANM().cause_or_effect using the sparse backend.
+
+    On the 74 two-variable Tuebingen pairs with at most 1500 rows, the verdict of _anm_direction
+    agrees with the 'gp' backend on 56 pairs, and the ordering of the two p-values on 61 of the 67
+    pairs where the 'gp' p-values differ. Most of the gap comes from the regression: the exact
+    Gaussian process often picks a length scale at its lower bound, which interpolates every
+    distinct value, and n_features inducing points cannot follow it. n_features=200 lifts the
+    verdict agreement only to 58, at 2.4 times the cost.
+
+    Args:
+        data_x (np.ndarray): First variable, shape (n,) or (n, 1).
+        data_y (np.ndarray): Second variable, shape (n,) or (n, 1). If both are float32, the
+                             fits and tests run in float32 (see the note at BLOCK_SIZE).
+        n_features (int): Number of inducing points and Random Fourier Features.
+        seed (int): Seed so that repeated calls on the same data return the same p-values.
+
+    Returns:
+        tuple: (p_forward, p_backward) for x -> y and y -> x respectively.
+    """
+    rng = np.random.default_rng(seed)
+    dtype = np.float32 if _float_dtype(data_x) == _float_dtype(data_y) == np.float32 else np.float64
+    x = np.asarray(data_x, dtype=dtype).ravel()
+    y = np.asarray(data_y, dtype=dtype).ravel()
+
+    # test x->y
+    res_y = y - fit_sparse_gp(x, y, n_inducing=n_features, rng=rng)
+    p_forward, _ = hsic_test_rff(x, res_y, n_features=n_features, rng=rng)
+
+    # test y->x
+    res_x = x - fit_sparse_gp(y, x, n_inducing=n_features, rng=rng)
+    p_backward, _ = hsic_test_rff(y, res_x, n_features=n_features, rng=rng)
+
+    return p_forward, p_backward
@@ -0,0 +1,261 @@
+import fnmatch
+import glob
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+import pandas as pd
+from threadpoolctl import threadpool_limits
+from src.loaders import load_causal_data
+from src.metrics import timed
+
+
+# ==========================================
+# Batch Mode ('python main.py batch')
+# ==========================================
+#
+# INTENT: Running main.py once per file pays the interpreter start-up and the import of pgmpy,
+# causal-learn and matplotlib for every file, which takes longer than the analysis of most
+# datasets. Batch mode collects the files from globs, directories and manifests and runs the
+# pipeline (PC plus ANM refinement) on each of them in a pool of worker processes. The heavy
+# libraries are imported once per worker (or once in total, where workers are forked), and every
+# file writes its adjacency matrix and graph, plus one row of a summary table, into the output
+# folder. Any number of variables is supported; the 2/3/4-variable defaults of main.py do not apply.
+#
+# The workers are the only level of parallelism: BLAS is limited to its share of the cores, and
+# pgmpy's PC runs sequentially (src.causality.PGMPY_SEQUENTIAL), so a worker never starts a
+# process pool of its own.
+
+# Data files picked up from directories.
+DATA_EXTENSIONS = ('.csv', '.txt')
+
+# Files in data folders that are not datasets (descriptions, metadata, ground truths).
+EXCLUDED_PATTERNS = ('*_des.txt', 'pairmeta.txt', '*_truth.csv', 'README*')
+
+_worker_limits = []
+
+
+def _is_data_file(path):
+    name = os.path.basename(path)
+    return (os.path.splitext(name)[1].lower() in DATA_EXTENSIONS
+            and not any(fnmatch.fnmatch(name, pattern) for pattern in EXCLUDED_PATTERNS))
+
+
+def read_manifest(manifest_path):
+    """
+    Reads a manifest: one data file per line, relative paths are relative to the manifest.
+    Empty lines and lines starting with '#' are ignored.
+    """
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path) as f:
+        entries = [line.strip() for line in f]
+
+    return [os.path.normpath(os.path.join(base, entry)) for entry in entries if entry and not entry.startswith('#')]
+
+
+def collect_inputs(inputs, manifest=None):
+    """
+    Expands directories, glob patterns and a manifest into a sorted list of data files.
+
+    Args:
+        inputs (list): Files, directories (every .csv/.txt data file inside) or glob patterns
+                       (quote them, e.g. 'data/pairs/pair00*.txt').
+        manifest (str): Optional manifest file, see read_manifest.
+
+    Returns:
+        list: Unique paths of existing files. Unmatched inputs are reported and skipped.
+    """
+    files = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            files += [path for path in glob.glob(os.path.join(entry, '*')) if os.path.isfile(path) and _is_data_file(path)]
+        elif os.path.isfile(entry):
+            files.append(entry)
+        else:
+            matches = [path for path in glob.glob(entry) if os.path.isfile(path)]
+            if not matches:
+                print(f"Warning: '{entry}' matches no file.")
+            files += matches
+
+    if manifest is not None:
+        for path in read_manifest(manifest):
+            if os.path.isfile(path):
+                files.append(path)
+            else:
+                print(f"Warning: '{path}' (listed in {manifest}) does not exist.")
+
+    return sorted({os.path.normpath(path) for path in files})
+
+
+def output_names(files):
+    """
+    Returns the base name for the outputs of every file. Files with the same name in different
+    folders are told apart by the name of their folder.
+    """
+    names = [os.path.splitext(os.path.basename(path))[0] for path in files]
+    duplicates = {name for name in names if names.count(name) > 1}
+
+    return [f"{os.path.basename(os.path.dirname(os.path.abspath(path)))}_{name}" if name in duplicates else name
+            for path, name in zip(files, names)]
+
+
+def _import_libraries(anm_method, graph_format):
+    """
+    Imports the libraries every file needs, so the first file of a worker does not pay for them.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        import pgmpy.estimators  # noqa: F401
+        if anm_method == 'gp':
+            import causallearn.search.FCMBased.ANM.ANM  # noqa: F401
+        if graph_format == 'png':
+            import matplotlib.backends.backend_agg  # noqa: F401
+
+
+def _init_worker(anm_method, graph_format, blas_threads):
+    _worker_limits.append(threadpool_limits(limits=blas_threads))
+    _import_libraries(anm_method, graph_format)
+
+
+def run_file(file_path, name, output_dir, alpha=0.05, test_name='pearsonr', pc_variant='pgmpy', anm_method='gp',
+             anm_alpha=0.05, adaptive=False, confidence=0.9, graph_format='png', cache_dir=None, store_dir=None,
+             dtype=None):
+    """
+    Runs the pipeline on one file and writes '<name>_adjacency.csv' and '<name>.<graph_format>'
+    (only '<name>.edges' for the edge-list format).
+
+    Args:
+        anm_method (str): ANM backend, or None to keep the PC orientation.
+        anm_alpha (float): Significance level of the HSIC tests that decide the ANM direction.
+        confidence (float): Confidence at which the adaptive ANM accepts a direction.
+        store_dir (str): Result store (see src.store) for the PC and ANM stages, or None.
+        dtype (str): 'float32' to run the file in float32 (see load_causal_data), None for float64.
+
+    Returns:
+        dict: One summary record. 'status' is 'ok' or 'error' (with the reason in 'error').
+    """
+    from src.causality import run_pc_algo_library, get_adjacency_matrix
+    from src.refinement import refine_edges_anm
+    from src.graphs import draw_causal_graph, export_graph_text
+    from src.store import data_hash, run_pc_stored, refine_edges_stored
+
+    record = {'file': file_path, 'name': name, 'n_rows': None, 'n_vars': None, 'n_edges': None, 'edges': None,
+              'load_s': None, 'pc_s': None, 'anm_s': None, 'plot_s': None, 'runtime_s': None,
+              'status': 'ok', 'error': None}
+    start = time.perf_counter()
+
+    try:
+        # The pipeline's progress messages would interleave across workers; the summary replaces them.
+        with open(os.devnull, 'w') as fnull, warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            with redirect_stdout(fnull):
+                step = time.perf_counter()
+                df = load_causal_data(os.path.dirname(file_path), os.path.basename(file_path), cache_dir=cache_dir,
+                                      dtype=dtype)
+                record['load_s'] = time.perf_counter() - step
+                if df is None or df.empty:
+                    raise ValueError("the file could not be loaded")
+                record['n_rows'], record['n_vars'] = df.shape
+
+                digest = data_hash(df) if store_dir is not None else None
+
+                step = time.perf_counter()
+                if digest is not None:
+                    dag = run_pc_stored(df, store_dir, digest, alpha=alpha, test_name=test_name,
+                                        pc_variant=pc_variant)
+                elif pc_variant == 'stable':
+                    from src.stable_pc import run_pc_algo_stable
+                    dag = run_pc_algo_stable(df, alpha=alpha, test_name=test_name, jobs=1)
+                else:
+                    dag = run_pc_algo_library(df, alpha=alpha, test_name=test_name)
+                record['pc_s'] = time.perf_counter() - step
+                if dag is None:
+                    raise ValueError("the PC algorithm failed")
+
+                if anm_method is not None and dag.number_of_edges() > 0:
+                    step = time.perf_counter()
+                    if digest is not None:
+                        dag = refine_edges_stored(df, dag, store_dir, digest, alpha=anm_alpha, method=anm_method,
+                                                  adaptive=adaptive, confidence=confidence)
+                    else:
+                        dag = refine_edges_anm(df, dag, alpha=anm_alpha, method=anm_method, jobs=1,
+                                               adaptive=adaptive, confidence=confidence)
+                    record['anm_s'] = time.perf_counter() - step
+
+                step = time.perf_counter()
+                # The edge list already holds the adjacency, without the n x n zeros of the CSV.
+                if graph_format != 'edges':
+                    get_adjacency_matrix(dag).to_csv(os.path.join(output_dir, f"{name}_adjacency.csv"))
+                graph_path = os.path.join(output_dir, f"{name}.{graph_format}")
+                title = f"Causal Analysis: {name}"
+                if graph_format == 'png':
+                    draw_causal_graph(dag, title=title, save_path=graph_path, show=False)
+                else:
+                    export_graph_text(dag, graph_path, title=title)
+                record['plot_s'] = time.perf_counter() - step
+
+        record['n_edges'] = dag.number_of_edges()
+        record['edges'] = ";".join(f"{u}->{v}" for u, v in dag.edges())
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = str(e)
+    finally:
+        record['runtime_s'] = time.perf_counter() - start
+
+    return record
+
+
+@timed('batch')
+def run_batch(inputs, manifest=None, output_dir=os.path.join('results', 'batch'), jobs=None, alpha=0.05,
+              test_name='pearsonr', pc_variant='pgmpy', anm_method='gp', anm_alpha=0.05, adaptive=False,
+              confidence=0.9, graph_format='png', cache_dir=None, store_dir=None, dtype=None):
+    """
+    Runs the pipeline on every file given by 'inputs' and 'manifest' (see collect_inputs) across
+    a process pool, and writes 'summary.csv' (one row per file) into 'output_dir'.
+
+    Returns:
+        pd.DataFrame: The summary table, or None if no file was found.
+    """
+    files = collect_inputs(inputs, manifest=manifest)
+    if not files:
+        print("Error: No data files found.")
+        return None
+
+    os.makedirs(output_dir, exist_ok=True)
+    names = output_names(files)
+    options = {'alpha': alpha, 'test_name': test_name, 'pc_variant': pc_variant, 'anm_method': anm_method,
+               'anm_alpha': anm_alpha, 'adaptive': adaptive, 'confidence': confidence, 'graph_format': graph_format,
+               'cache_dir': cache_dir, 'store_dir': store_dir, 'dtype': dtype}
+
+    jobs = min(jobs or os.cpu_count() or 1, len(files))
+    print(f"Processing {len(files)} files on {jobs} worker{'s' if jobs != 1 else ''}...")
+    wall_start = time.perf_counter()
+
+    # Imported here once: forked workers inherit the modules, and jobs=1 runs in this process.
+    _import_libraries(anm_method, graph_format)
+
+    if jobs == 1:
+        records = [run_file(path, name, output_dir, **options) for path, name in zip(files, names)]
+    else:
+        blas_threads = max(1, (os.cpu_count() or 1) // jobs)
+        # Largest files first, so the long ones do not end up as the last tasks of the pool.
+        order = sorted(range(len(files)), key=lambda i: os.path.getsize(files[i]), reverse=True)
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(anm_method, graph_format, blas_threads)) as pool:
+            futures = {i: pool.submit(run_file, files[i], names[i], output_dir, **options) for i in order}
+            records = [futures[i].result() for i in range(len(files))]
+
+    summary = pd.DataFrame(records)
+    summary_path = os.path.join(output_dir, 'summary.csv')
+    summary.to_csv(summary_path, index=False)
+
+    n_errors = int((summary['status'] == 'error').sum())
+    print(f"{'Files processed':<20}: {len(files) - n_errors} ({n_errors} errors)")
+    for record in records:
+        if record['status'] == 'error':
+            print(f"  {record['file']}: {record['error']}")
+    print(f"{'Wall time':<20}: {time.perf_counter() - wall_start:.1f}s")
+    print(f"Results saved to: {output_dir} (summary: {summary_path})")
+
+    return summary
@@ -0,0 +1,172 @@
+import json
+import os
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+import pandas as pd
+from threadpoolctl import threadpool_limits
+from src.loaders import load_causal_data, get_ground_truth, load_pair_metadata, get_meta_ground_truth
+from src.causality import check_causal_direction_anm, check_causal_direction_anm_adaptive
+
+
+# ==========================================
+# Tuebingen Benchmark ('python main.py bench')
+# ==========================================
+#
+# INTENT: Runs the ANM direction test over every pair listed in pairmeta.txt, so that a change of
+# backend or parameters can be checked for accuracy and speed regressions in a single command.
+# Accuracy is weighted with the pairmeta.txt dataset weights, as recommended in data/pairs/README,
+# so that near-duplicate pairs (e.g. pair0056 - pair0063) do not dominate the score.
+
+_worker_limits = []
+
+
+def _init_worker(blas_threads):
+    _worker_limits.append(threadpool_limits(limits=blas_threads))
+
+
+def run_pair(data_folder, filename, meta, alpha=0.05, method='gp', max_rows=None, cache_dir=None,
+             adaptive=False):
+    """
+    Runs the ANM direction test on a single Tuebingen pair.
+    'cache_dir' is passed on to load_causal_data. With 'adaptive', the test runs on growing
+    subsamples (see check_causal_direction_anm_adaptive) and 'n_used' records their size.
+
+    Returns:
+        dict: One benchmark record. 'status' is 'ok', 'skipped' (multi-dimensional pair or more
+              than 'max_rows' rows) or 'error'.
+    """
+    truth = get_ground_truth(data_folder, filename)
+    if truth not in ("A --> B", "B --> A"):
+        truth = get_meta_ground_truth(meta)
+
+    record = {'pair': filename, 'weight': meta['weight'], 'truth': truth, 'n_rows': None, 'n_used': None,
+              'direction': None, 'p_forward': None, 'p_backward': None, 'correct': None,
+              'load_s': None, 'runtime_s': None, 'peak_mem_mb': None, 'status': 'ok'}
+
+    if meta['cause'][0] != meta['cause'][1] or meta['effect'][0] != meta['effect'][1]:
+        record['status'] = 'skipped'
+        return record
+
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as fnull:
+        with redirect_stdout(fnull):
+            df = load_causal_data(data_folder, filename, cache_dir=cache_dir)
+    record['load_s'] = time.perf_counter() - start
+
+    if df is None or df.empty:
+        record['status'] = 'error'
+        return record
+
+    # Keep only the cause and effect columns, in file order, so that 'A' is always the first one.
+    first, second = sorted((meta['cause'][0], meta['effect'][0]))
+    pair_df = df.iloc[:, [first - 1, second - 1]].set_axis(['A', 'B'], axis=1)
+    record['n_rows'] = len(pair_df)
+
+    if max_rows is not None and len(pair_df) > max_rows:
+        record['status'] = 'skipped'
+        return record
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        if adaptive:
+            direction, p_forward, p_backward, record['n_used'] = check_causal_direction_anm_adaptive(
+                pair_df, alpha=alpha, method=method)
+        else:
+            direction, p_forward, p_backward = check_causal_direction_anm(pair_df, alpha=alpha, method=method)
+            record['n_used'] = len(pair_df)
+    except Exception as e:
+        print(f"An error occurred while testing {filename}: {e}")
+        record['status'] = 'error'
+        return record
+    finally:
+        record['runtime_s'] = time.perf_counter() - start
+        record['peak_mem_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+
+    record['direction'] = direction
+    record['p_forward'] = float(p_forward)
+    record['p_backward'] = float(p_backward)
+    if truth in ("A --> B", "B --> A"):
+        record['correct'] = direction.split(" (")[0] == truth
+
+    return record
+
+
+def summarize(records):
+    """
+    Aggregates benchmark records into plain and weighted accuracy plus total runtime.
+    """
+    scored = [r for r in records if r['status'] == 'ok' and r['correct'] is not None]
+    total_weight = sum(r['weight'] for r in scored)
+
+    return {
+        'n_pairs': len(records),
+        'n_scored': len(scored),
+        'n_skipped': sum(r['status'] == 'skipped' for r in records),
+        'n_errors': sum(r['status'] == 'error' for r in records),
+        'accuracy': sum(r['correct'] for r in scored) / len(scored) if scored else None,
+        'weighted_accuracy': (sum(r['weight'] for r in scored if r['correct']) / total_weight
+                              if total_weight > 0 else None),
+        'total_runtime_s': sum(r['runtime_s'] or 0 for r in records),
+        'max_peak_mem_mb': max((r['peak_mem_mb'] or 0 for r in records), default=0),
+    }
+
+
+def run_benchmark(data_folder, alpha=0.05, method='gp', jobs=None, max_rows=None, output_dir='results',
+                  cache_dir=None, adaptive=False):
+    """
+    Runs the ANM direction test over all pairs in pairmeta.txt across a process pool and
+    writes 'bench_<method>.csv' (one row per pair) and 'bench_<method>.json'
+    (summary plus the per-pair records) into 'output_dir'. Adaptive runs are written to
+    'bench_<method>_adaptive.*', so they can be compared with the full runs.
+
+    Returns:
+        dict: The summary, see summarize().
+    """
+    metadata = load_pair_metadata(data_folder)
+    if not metadata:
+        print(f"Error: No pairmeta.txt found in {data_folder}")
+        return None
+
+    jobs = jobs or os.cpu_count() or 1
+    blas_threads = max(1, (os.cpu_count() or 1) // jobs)
+
+    # Largest files first, so the long pairs do not end up as the last tasks of the pool.
+    def file_size(name):
+        path = os.path.join(data_folder, name)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    pairs = sorted(metadata, key=file_size, reverse=True)
+
+    print(f"Benchmarking {len(pairs)} pairs with method='{method}'{' (adaptive)' if adaptive else ''}, "
+          f"alpha={alpha} on {jobs} workers...")
+    wall_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(blas_threads,)) as pool:
+        futures = [pool.submit(run_pair, data_folder, name, metadata[name], alpha, method, max_rows, cache_dir,
+                               adaptive)
+                   for name in pairs]
+        records = sorted((f.result() for f in futures), key=lambda r: r['pair'])
+
+    summary = summarize(records)
+    summary.update({'method': method, 'adaptive': adaptive, 'alpha': alpha, 'jobs': jobs, 'max_rows': max_rows,
+                    'wall_time_s': time.perf_counter() - wall_start})
+
+    os.makedirs(output_dir, exist_ok=True)
+    report_name = f"bench_{method}_adaptive" if adaptive else f"bench_{method}"
+    csv_path = os.path.join(output_dir, f"{report_name}.csv")
+    json_path = os.path.join(output_dir, f"{report_name}.json")
+    pd.DataFrame(records).convert_dtypes().to_csv(csv_path, index=False)
+    with open(json_path, 'w') as f:
+        json.dump({'summary': summary, 'pairs': records}, f, indent=2)
+
+    print(f"{'Pairs scored':<20}: {summary['n_scored']} (skipped {summary['n_skipped']}, errors {summary['n_errors']})")
+    if summary['accuracy'] is not None:
+        print(f"{'Accuracy':<20}: {summary['accuracy'] * 100:.1f}%")
+        print(f"{'Weighted accuracy':<20}: {summary['weighted_accuracy'] * 100:.1f}%")
+    print(f"{'ANM time':<20}: {summary['total_runtime_s']:.1f}s (wall {summary['wall_time_s']:.1f}s)")
+    print(f"Results saved to: {csv_path} and {json_path}")
+
+    return summary
@@ -0,0 +1,136 @@
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+from src.metrics import timed
+from src.refinement import share_dataframe, attach_shared_data, refine_edges_anm
+
+
+# ==========================================
+# Bootstrap Edge Stability ('python main.py --bootstrap B')
+# ==========================================
+#
+# INTENT: A single run reports one DAG without any measure of how much it depends on the
+# particular sample. The bootstrap reruns the whole pipeline (PC plus ANM refinement) on B
+# resamples of the rows, drawn with replacement, and counts how often every directed edge
+# appears. The resamples are independent, so they run in a process pool; the data is copied
+# once into shared memory (as in src.refinement) and every worker draws its own resamples from
+# it. Resample i always uses the seed (seed, i), so the result does not depend on 'jobs'.
+# Inside a worker, PC and the ANM refinement run sequentially (pgmpy through
+# src.causality.PGMPY_SEQUENTIAL), so the pool is the only level of parallelism.
+
+DEFAULT_RESAMPLES = 100
+
+# Per-worker view of the shared data, set by _attach_data.
+_worker_data = {}
+
+
+def _attach_data(spec, blas_threads):
+    _worker_data['limits'] = threadpool_limits(limits=blas_threads)
+
+    shm, values, columns = attach_shared_data(spec)
+    _worker_data['shm'] = shm
+    _worker_data['df'] = pd.DataFrame(values, columns=columns, copy=False)
+
+
+def resample_edges(df, index, seed=0, alpha=0.05, test_name='cached_pearsonr', pc_variant='pgmpy',
+                   anm_method='gp', anm_alpha=0.05, adaptive=False):
+    """
+    Runs PC (and the ANM refinement) on bootstrap resample number 'index' of the rows.
+
+    Returns:
+        list: The (cause, effect) edges of the resulting DAG, or None if PC failed.
+    """
+    rng = np.random.default_rng([seed, index])
+    rows = rng.integers(0, len(df), size=len(df))
+    sample = pd.DataFrame(df.to_numpy()[rows], columns=df.columns)
+
+    # Every resample would repeat the progress messages and library warnings of the pipeline.
+    with open(os.devnull, 'w') as fnull, warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        with redirect_stdout(fnull):
+            if pc_variant == 'stable':
+                from src.stable_pc import run_pc_algo_stable
+                dag = run_pc_algo_stable(sample, alpha=alpha, test_name=test_name, jobs=1)
+            else:
+                from src.causality import run_pc_algo_library
+                dag = run_pc_algo_library(sample, alpha=alpha, test_name=test_name)
+
+            if dag is None:
+                return None
+
+            if anm_method is not None and dag.number_of_edges() > 0:
+                dag = refine_edges_anm(sample, dag, alpha=anm_alpha, method=anm_method, jobs=1, adaptive=adaptive)
+
+    return list(dag.edges())
+
+
+def _resample_shared(task):
+    index, options = task
+    return resample_edges(_worker_data['df'], index, **options)
+
+
+@timed('bootstrap')
+def bootstrap_edge_frequencies(df, n_resamples=DEFAULT_RESAMPLES, alpha=0.05, test_name='cached_pearsonr',
+                               pc_variant='pgmpy', anm_method='gp', anm_alpha=0.05, adaptive=False, jobs=1,
+                               seed=0):
+    """
+    Estimates how often every directed edge is found, over bootstrap resamples of the rows.
+
+    Args:
+        df (pd.DataFrame): The loaded data.
+        n_resamples (int): Number of resamples (B).
+        alpha (float): Significance level of the PC tests.
+        test_name (str): CI test of the PC algorithm. 'pearsonr' is replaced by 'cached_pearsonr',
+                         which gives the same decisions without re-reading the rows for every test.
+        pc_variant (str): 'pgmpy' (run_pc_algo_library) or 'stable' (run_pc_algo_stable).
+        anm_method (str): ANM backend for the refinement, or None to skip it.
+        anm_alpha (float): Significance level of the ANM tests.
+        adaptive (bool): Use the adaptive ANM (see check_causal_direction_anm_adaptive).
+        jobs (int): Number of worker processes. Every worker runs whole resamples.
+        seed (int): Seed of the resampling.
+
+    Returns:
+        tuple: (pd.DataFrame, int). The first is a matrix like get_adjacency_matrix's, with the
+               fraction of successful resamples that contain the edge row -> column. The second
+               is the number of successful resamples.
+    """
+    if test_name == 'pearsonr':
+        test_name = 'cached_pearsonr'
+
+    options = {'seed': seed, 'alpha': alpha, 'test_name': test_name, 'pc_variant': pc_variant,
+               'anm_method': anm_method, 'anm_alpha': anm_alpha, 'adaptive': adaptive}
+
+    if jobs <= 1 or n_resamples <= 1:
+        results = [resample_edges(df, index, **options) for index in range(n_resamples)]
+    else:
+        workers = min(jobs, n_resamples)
+        blas_threads = max(1, (os.cpu_count() or 1) // workers)
+
+        shm, spec = share_dataframe(df)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach_data,
+                                     initargs=(spec, blas_threads)) as pool:
+                tasks = [(index, options) for index in range(n_resamples)]
+                results = list(pool.map(_resample_shared, tasks, chunksize=max(1, n_resamples // (4 * workers))))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    nodes = sorted(df.columns)
+    position = {node: i for i, node in enumerate(nodes)}
+    counts = np.zeros((len(nodes), len(nodes)))
+
+    successful = [edges for edges in results if edges is not None]
+    for edges in successful:
+        for u, v in edges:
+            counts[position[u], position[v]] += 1
+
+    if len(successful) < n_resamples:
+        print(f"Warning: PC failed on {n_resamples - len(successful)} of {n_resamples} resamples.")
+
+    frequencies = pd.DataFrame(counts / max(len(successful), 1), index=nodes, columns=nodes)
+    return frequencies, len(successful)
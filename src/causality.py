@@ -1,9 +1,19 @@
+import time
 import networkx as nx
 import numpy as np
 import pandas as pd
-from pgmpy.estimators import PC
-from causallearn.search.FCMBased.ANM.ANM import ANM
+from itertools import combinations
+from src.ci_tests import SufficientStatistics, PartialCorrelationTest, partial_correlations, fisher_z_pvalues
+from src.discrete import ContingencyTest, parse_contingency_name
+from src.kernel_ci import KernelCITest, parse_kci_name
+from src.adjacency import SparseDAG
+from src.matrix import ColumnMatrix, as_statistics
+from src.metrics import timed, count_ci_tests
 import warnings
+
+# INTENT: pgmpy, causal-learn (with its torch/sklearn stack) and the native ANM backend take
+# seconds to import, so they are imported inside the functions that use them. Runs that stop
+# early (missing file, '--help') or only need the native PC never pay for them.
 # from sklearn.exceptions import ConvergenceWarning
 # warnings.filterwarnings("ignore", category=ConvergenceWarning)
 
@@ -12,25 +22,107 @@ import warnings
 # OPTION A: The Library Way (pgmpy)
 # ==========================================
 
+# INTENT: pgmpy's default 'parallel' variant sends every test to a loky worker process with a
+# pickled copy of the CI test. The state this module keeps in the test (memoized results, the
+# shared covariance, the counters of src.metrics, the separating sets) would then only change in
+# the workers and be lost, and a PC run inside a pool worker (batch, bootstrap) would start
+# n_cpu more processes. 'stable' runs the same order-independent PC in this process; parallel
+# CI tests are available through src.stable_pc ('--pc-variant stable --jobs N').
+PGMPY_SEQUENTIAL = {'variant': 'stable', 'n_jobs': 1}
+
+
+def _counted_ci_test(ci_test, sep_sets=None):
+    """
+    Wraps a pgmpy CI test (a test name or a callable) so that every call is recorded in
+    src.metrics by the size of its conditioning set. Unknown names are returned unchanged,
+    so pgmpy still reports them.
 
-def run_pc_algo_library(data, alpha=0.05, test_name='pearsonr'):
+    If 'sep_sets' is a dict, every conditioning set that makes a pair independent is stored in
+    it under frozenset({X, Y}). pgmpy removes an edge at its first independence, so these are the
+    separating sets it uses for the orientation (it does not return them with a DAG). Both only
+    work if pgmpy calls the wrapper in this process, i.e. with PGMPY_SEQUENTIAL.
+    """
+    if isinstance(ci_test, str):
+        from pgmpy.estimators import CITests
+        test = getattr(CITests, ci_test, None)
+        if not callable(test):
+            return ci_test
+    else:
+        test = ci_test
+
+    def counted_test(X, Y, Z, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = test(X, Y, Z, *args, **kwargs)
+        finally:
+            count_ci_tests(len(Z), 1, time.perf_counter() - start)
+
+        if sep_sets is not None and isinstance(result, (bool, np.bool_)) and result:
+            sep_sets.setdefault(frozenset((X, Y)), set(Z))
+        return result
+
+    return counted_test
+
+
+@timed('pc')
+def run_pc_algo_library(data, alpha=0.05, test_name='pearsonr', cache_size=100000, sep_sets=None):
     """
     Runs the PC algorithm.
     
     Args:
-        data (pd.DataFrame): The data.
+        data (pd.DataFrame | SufficientStatistics | ColumnMatrix): The data, its streamed sufficient
+                         statistics, or a memory-mapped matrix (see src.matrix) whose statistics
+                         are accumulated in blocks. The last two always use 'cached_pearsonr'.
         alpha (float): Significance level (default 0.05).
         test_name (str): The statistical test to use. 
-                         Options: 'pearsonr', 'fisher-z', 'chi_square', 'g_sq'.
+                         Options: 'pearsonr', 'fisher-z', 'chi_square', 'g_sq', 'cached_pearsonr',
+                         'kci' (or 'kci:<rff|nystrom>:<rank>', see src.kernel_ci).
+                         'chi_square' and 'g_sq' (or '<test>:<bins>') run on integer codes of the
+                         columns, continuous ones cut into quantile bins (see src.discrete).
                          Default is 'pearsonr' (best for continuous data).
+                         'cached_pearsonr' gives the same results as 'pearsonr' but computes the
+                         covariance matrix once and memoizes every test (see src.ci_tests), so
+                         the cost of each test no longer grows with the number of rows.
+                         'fisher-z' runs the Fisher-z test of run_pc_algo_manual on the same
+                         cached statistics (pgmpy has no test of that name).
+        cache_size (int): Maximum number of memoized test results for 'cached_pearsonr', 'chi_square' and 'g_sq'.
+        sep_sets (dict): Optional dict that receives the separating sets, keyed by frozenset({u, v}).
     """
     try:
         print("Running PC Algorithm...")
-        est = PC(data)
+        from pgmpy.estimators import PC
+
+        data = as_statistics(data)
+        method = 'fisher-z' if test_name == 'fisher-z' else 'pearsonr'
+        if isinstance(data, SufficientStatistics):
+            # Streamed data (see src.loaders.stream_sufficient_statistics): only the
+            # covariance-based test can run without the rows.
+            ci_test = PartialCorrelationTest(data, cache_size=cache_size, method=method)
+            est = PC(pd.DataFrame(columns=data.columns, dtype=float))
+        elif parse_kci_name(test_name) is not None:
+            # The kernel test also keeps its own (standardized) copy of the data.
+            ci_test = KernelCITest.from_name(test_name, data)
+            est = PC(data.iloc[:0])
+        elif parse_contingency_name(test_name) is not None:
+            # Encodes the columns once and counts each table with one bincount, instead of a
+            # pandas groupby over all rows per test.
+            ci_test = ContingencyTest.from_name(test_name, data, cache_size=cache_size)
+            est = PC(data.iloc[:0])
+        elif test_name in ('cached_pearsonr', 'fisher-z'):
+            ci_test = PartialCorrelationTest(SufficientStatistics.from_data(data), cache_size=cache_size,
+                                             method=method)
+            # pgmpy only needs the column names once the test no longer reads the data,
+            # so we avoid its per-column preprocessing of all rows.
+            est = PC(data.iloc[:0])
+        else:
+            ci_test = test_name
+            est = PC(data)
+
         model = est.estimate(return_type='dag', 
                              significance_level=alpha, 
-                             ci_test=test_name,
-                             show_progress=False)
+                             ci_test=_counted_ci_test(ci_test, sep_sets),
+                             show_progress=False,
+                             **PGMPY_SEQUENTIAL)
         dag = nx.DiGraph(model)
         return dag
         
@@ -43,33 +135,62 @@ def get_adjacency_matrix(dag):
     """
     Returns the adjacency matrix of the DAG as a pandas DataFrame.
     Dynamically scales to n-variable networks and sorts the nodes alphabetically.
+    'dag' can be an nx.DiGraph or a SparseDAG (see src.adjacency), which is read from its CSR matrix.
     """
 
     # Intent: Extracting and sorting the nodes ensures that the matrix always prints
     # in a predictable order (A, B, C...) regardless of how many variables are in the dataset.
     nodes = sorted(dag.nodes())
 
+    if isinstance(dag, SparseDAG):
+        return dag.to_dense().loc[nodes, nodes]
+
     # Generate the adjacency matrix using the dynamic node list
     adj_matrix = nx.to_pandas_adjacency(dag, nodelist=nodes, dtype=int, weight=None)
 
     return adj_matrix
 
 
-def check_causal_direction_anm(df, alpha=0.05):
+def check_causal_direction_anm(df, alpha=0.05, method='gp'):
     """
     Determines the causal direction between a pair of variables using Additive Noise Models (ANM).
+
+    Args:
+        df (pd.DataFrame | ColumnMatrix): Two columns; the first column is 'A', the second 'B'.
+                      A ColumnMatrix (e.g. matrix[[u, v]] of a memory-mapped file) is read
+                      without copying the rest of the data.
+        alpha (float): Significance level for the HSIC independence tests (default 0.05).
+        method (str): The ANM backend to use.
+                      Options: 'gp', 'nystrom'.
+                      'gp' is causal-learn's exact Gaussian process, O(n^3) in the number of rows.
+                      'nystrom' is the native inducing-point/RFF backend in src.anm, linear in the
+                      number of rows and intended for pairs with more than a few thousand rows.
     """
 
     cols = df.columns
-    data_x = df[cols[0]].to_numpy().reshape(-1, 1)
-    data_y = df[cols[1]].to_numpy().reshape(-1, 1)
+    data_x = np.asarray(df[cols[0]]).reshape(-1, 1)
+    data_y = np.asarray(df[cols[1]]).reshape(-1, 1)
+
+    if method == 'gp':
+        from causallearn.search.FCMBased.ANM.ANM import ANM
+        anm = ANM()
 
-    anm = ANM()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            p_forward, p_backward = anm.cause_or_effect(data_x, data_y)
+    elif method == 'nystrom':
+        from src.anm import cause_or_effect_native
+        p_forward, p_backward = cause_or_effect_native(data_x, data_y)
+    else:
+        raise ValueError(f"Unknown ANM method '{method}'. Options: 'gp', 'nystrom'.")
 
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore")
-        p_forward, p_backward = anm.cause_or_effect(data_x, data_y)
+    return _anm_direction(p_forward, p_backward, alpha), p_forward, p_backward
 
+
+def _anm_direction(p_forward, p_backward, alpha):
+    """
+    Turns the p-values of the two HSIC tests into the direction verdict.
+    """
     direction = "Inconclusive"
 
     if p_forward > alpha and p_backward < alpha:
@@ -81,60 +202,295 @@ def check_causal_direction_anm(df, alpha=0.05):
     elif p_backward > p_forward:
         direction = "B --> A (Weak)"
 
-    return direction, p_forward, p_backward
+    return direction
+
+
+def required_agreement(confidence):
+    """
+    Number of independent subsamples that must order the two p-values the same way before the
+    adaptive ANM stops. If the ordering were a coin flip, k subsamples would agree with
+    probability 0.5 ** (k - 1), which has to stay below 1 - confidence.
+    """
+    return 1 + max(1, int(np.ceil(np.log2(1 / (1 - confidence)))))
+
+
+def check_causal_direction_anm_adaptive(df, alpha=0.05, method='gp', start_size=100, growth=2.0,
+                                        max_size=None, confidence=0.9, seed=0):
+    """
+    ANM direction test that only uses as many rows as the decision needs.
+
+    INTENT: On long pairs the direction is usually clear from a few hundred rows, while the 'gp'
+    backend costs O(n^3) on all of them. The test therefore runs on random subsamples of
+    'start_size' rows. If required_agreement(confidence) independent subsamples in a row agree on
+    which direction has the larger p-value, that ordering is accepted. As soon as one subsample
+    disagrees, the ordering is not stable at that size and the subsample grows by 'growth'.
+    Once the subsample would reach the full data, the plain test on every row is returned, so a
+    direction either meets the requested confidence or comes from all the rows. An optional
+    'max_size' caps the subsamples for callers that cannot afford the full fit; a pair whose
+    ordering is still unstable there is reported as "Inconclusive" instead of a direction the
+    subsamples did not agree on.
+
+    Args:
+        start_size (int): Rows of the first subsamples.
+        growth (float): Factor by which the subsample size grows after a disagreement.
+        max_size (int): Largest subsample (default None: grow up to the full data).
+        confidence (float): See required_agreement.
+        seed (int): Seed of the subsampling, so repeated runs give the same result.
+
+    Returns:
+        tuple: (direction, p_forward, p_backward, rows per fit). The p-values are the medians
+               over the subsamples of the last size.
+    """
+    n_rows = len(df)
+    agreement = required_agreement(confidence)
+    rng = np.random.default_rng(seed)
+    size = min(int(start_size), n_rows)
+
+    while size < n_rows:
+        p_values = []
+        for _ in range(agreement):
+            rows = np.sort(rng.choice(n_rows, size=size, replace=False))
+            _, p_forward, p_backward = check_causal_direction_anm(df.take(rows), alpha=alpha, method=method)
+            p_values.append((p_forward, p_backward))
+
+            orderings = np.sign([p_f - p_b for p_f, p_b in p_values])
+            if orderings[0] == 0 or np.any(orderings != orderings[0]):
+                break
+
+        stable = len(p_values) == agreement and orderings[0] != 0 and np.all(orderings == orderings[0])
+        if stable or (max_size is not None and size >= max_size):
+            p_forward, p_backward = np.median(p_values, axis=0)
+            direction = _anm_direction(p_forward, p_backward, alpha) if stable else "Inconclusive"
+            return direction, p_forward, p_backward, size
+
+        limit = n_rows if max_size is None else min(n_rows, max(int(max_size), size))
+        size = min(max(int(size * growth), size + 1), limit)
+
+    direction, p_forward, p_backward = check_causal_direction_anm(df, alpha=alpha, method=method)
+    return direction, p_forward, p_backward, n_rows
 
 
 # ==========================================
 # OPTION B: The Manual Way (From Scratch)
 # ==========================================
 
-def check_independence(data, var_a, var_b):
+# Upper bound on the number of CI tests evaluated in one NumPy batch, which caps the memory
+# used by the stacked (k x (depth + 2) x (depth + 2)) correlation submatrices.
+CI_BATCH_SIZE = 100000
+
+
+def check_independence(data, var_a, var_b, cond_set=(), alpha=0.05):
     """
     Helper for Manual Mode.
-    
+
     Checks the math to see if two variables are related.
+    Calculates the (partial) correlation between A and B given 'cond_set' and runs Fisher's Z-test.
+
+    Returns:
+        bool: True if the p-value is high (independent), False if low (related).
     """
-    # TODO: Calculate the correlation between A and B
-    # TODO: Run Fisher's Z-test (or a simple T-test for now)
-    # TODO: Return True if the p-value is high (independent), False if low (related)
-    return None
+    columns = [var_a, var_b] + list(cond_set)
+    corr = SufficientStatistics.from_data(data[columns]).correlation
 
+    r = partial_correlations(corr, [0], [1], [list(range(2, len(columns)))])
+    p_value = fisher_z_pvalues(r, len(data), len(cond_set))[0]
 
-def orient_edges(skeleton):
+    return bool(p_value > alpha)
+
+
+@timed('pc.skeleton')
+def estimate_skeleton(corr, n_samples, columns, alpha=0.05, max_depth=None, test_log=None):
     """
     Helper for Manual Mode.
-    
+
+    Skeleton phase of the PC algorithm with Fisher-z tests on partial correlations.
+
+    INTENT: This follows the order-independent 'stable' PC variant: the adjacency sets are
+    frozen at the start of each conditioning depth, every test of that depth is evaluated
+    as a single NumPy batch, and only then are edges removed.
+
+    Args:
+        test_log (list): Optional list that receives one (tests, p_values) pair per depth, where
+                         'tests' holds the column indices (x, y, *cond) of every test of that depth.
+                         Since the result depends on nothing but these decisions, the log is enough
+                         to tell whether new data could change the skeleton (see src.incremental).
+
+    Returns:
+        tuple: (nx.Graph skeleton, dict of separating sets keyed by frozenset({u, v}))
+    """
+    n_vars = len(columns)
+    adjacent = ~np.eye(n_vars, dtype=bool)
+    sep_sets = {}
+    depth = 0
+
+    while max_depth is None or depth <= max_depth:
+        neighbors = [np.flatnonzero(adjacent[i]) for i in range(n_vars)]
+
+        tests = []
+        for x in range(n_vars):
+            for y in neighbors[x]:
+                others = neighbors[x][neighbors[x] != y]
+                tests.extend((x, y) + cond for cond in combinations(others, depth))
+
+        if not tests:
+            break
+
+        tests = np.array(tests, dtype=int).reshape(len(tests), depth + 2)
+        logged = []
+        for start in range(0, len(tests), CI_BATCH_SIZE):
+            batch = tests[start:start + CI_BATCH_SIZE]
+            batch_start = time.perf_counter()
+            r = partial_correlations(corr, batch[:, 0], batch[:, 1], batch[:, 2:])
+            p_values = fisher_z_pvalues(r, n_samples, depth)
+            count_ci_tests(depth, len(batch), time.perf_counter() - batch_start)
+            logged.append(p_values)
+
+            for x, y, *cond in batch[p_values > alpha]:
+                if adjacent[x, y]:
+                    adjacent[x, y] = adjacent[y, x] = False
+                    sep_sets[frozenset((columns[x], columns[y]))] = {columns[c] for c in cond}
+
+        if test_log is not None:
+            test_log.append((tests, np.concatenate(logged)))
+
+        depth += 1
+
+    skeleton = nx.Graph()
+    skeleton.add_nodes_from(columns)
+    skeleton.add_edges_from((columns[i], columns[j]) for i, j in zip(*np.nonzero(np.triu(adjacent))))
+
+    return skeleton, sep_sets
+
+
+def _apply_meek_rules(pdag):
+    """
+    Orients as many undirected edges as possible with Meek's rules R1-R3.
+    Undirected edges are stored as two opposite directed edges.
+    """
+    def undirected(a, b):
+        return pdag.has_edge(a, b) and pdag.has_edge(b, a)
+
+    def directed(a, b):
+        return pdag.has_edge(a, b) and not pdag.has_edge(b, a)
+
+    def adjacent(a, b):
+        return pdag.has_edge(a, b) or pdag.has_edge(b, a)
+
+    changed = True
+    while changed:
+        changed = False
+        for b, c in sorted(pdag.edges()):
+            if not undirected(b, c):
+                continue
+
+            # R1: a -> b - c and a, c not adjacent  =>  b -> c
+            rule_1 = any(directed(a, b) and not adjacent(a, c) for a in pdag.predecessors(b) if a != c)
+            # R2: b -> a -> c and b - c  =>  b -> c
+            rule_2 = any(directed(b, a) and directed(a, c) for a in pdag.successors(b) if a != c)
+            # R3: b - a1 -> c, b - a2 -> c, a1 and a2 not adjacent, b - c  =>  b -> c
+            parents = [a for a in pdag.successors(b) if undirected(b, a) and directed(a, c)]
+            rule_3 = any(not adjacent(a1, a2) for a1, a2 in combinations(parents, 2))
+
+            if rule_1 or rule_2 or rule_3:
+                pdag.remove_edge(c, b)
+                changed = True
+
+    return pdag
+
+
+def _pdag_to_dag(pdag):
+    """
+    Extends a PDAG to a DAG without adding new v-structures (Dor & Tarsi, 1992).
+    Falls back to orienting the remaining edges by node order if no consistent extension exists.
+    """
+    dag = nx.DiGraph()
+    dag.add_nodes_from(pdag.nodes())
+    dag.add_edges_from((a, b) for a, b in pdag.edges() if not pdag.has_edge(b, a))
+
+    remaining = pdag.copy()
+    while remaining.number_of_nodes() > 0:
+        for x in sorted(remaining.nodes()):
+            undirected_nbrs = [y for y in remaining.successors(x) if remaining.has_edge(y, x)]
+            is_sink = len(undirected_nbrs) == remaining.out_degree(x)
+            adjacent_nodes = set(remaining.successors(x)) | set(remaining.predecessors(x))
+
+            if is_sink and all(adjacent_nodes - {y} <= (set(remaining.successors(y)) | set(remaining.predecessors(y)))
+                               for y in undirected_nbrs):
+                dag.add_edges_from((y, x) for y in undirected_nbrs)
+                remaining.remove_node(x)
+                break
+        else:
+            order = {node: i for i, node in enumerate(sorted(remaining.nodes()))}
+            dag.add_edges_from((a, b) for a, b in remaining.edges()
+                               if remaining.has_edge(b, a) and order[a] < order[b])
+            break
+
+    return dag
+
+
+@timed('pc.orientation')
+def orient_edges(skeleton, sep_sets):
+    """
+    Helper for Manual Mode.
+
     Decides which way the arrow points (Issue #4).
-    For a 2-variable system, we might just look at the raw statistics 
-    or just leave it undirected if we can't tell.
+    First looks for V-structures (X -> Z <- Y, where Z is not in the separating set of X and Y),
+    then propagates orientations with Meek's rules, and finally picks a consistent direction
+    for the edges that remain undirected. The statistics cannot orient the single edge of a
+    2-variable system: the extension makes the alphabetically first node the sink, so the
+    skeleton A - B becomes B -> A, and the ANM refinement decides the real direction.
+
+    Returns:
+        nx.DiGraph: A DAG over the skeleton's nodes.
     """
-    # TODO: If we have 3 variables, look for V-structures (X -> Z <- Y)
-    # TODO: For 2 variables, we might return the graph as is
-    return skeleton
+    pdag = skeleton.to_directed()
+
+    for x, y in combinations(sorted(skeleton.nodes()), 2):
+        if skeleton.has_edge(x, y):
+            continue
+        for z in sorted(set(skeleton.neighbors(x)) & set(skeleton.neighbors(y))):
+            if z not in sep_sets.get(frozenset((x, y)), set()):
+                # Only orient edges that are still undirected, so earlier v-structures win.
+                for parent in (x, y):
+                    if pdag.has_edge(z, parent) and pdag.has_edge(parent, z):
+                        pdag.remove_edge(z, parent)
+
+    pdag = _apply_meek_rules(pdag)
 
-def run_pc_algo_manual(data):
+    return _pdag_to_dag(pdag)
+
+
+@timed('pc')
+def run_pc_algo_manual(data, alpha=0.05):
     """
     Addresses Issue #1 & #4 manually.
+
+    A from-scratch PC algorithm for continuous data. The correlation matrix is computed once,
+    and every conditional independence test afterwards works on that p x p matrix only, so
+    the cost of the tests does not depend on the number of rows.
+
+    Args:
+        data (pd.DataFrame | SufficientStatistics | ColumnMatrix): The data, its streamed sufficient
+                         statistics, or a memory-mapped matrix (see src.matrix).
+        alpha (float): Significance level for the Fisher-z tests (default 0.05).
+
+    Returns:
+        nx.DiGraph: The estimated DAG, the same type as run_pc_algo_library returns.
     """
     print("Running PC Algorithm (Manual Implementation)...")
-    
-    # 1. Start with a full graph (A connected to B)
-    columns = data.columns
-    graph = nx.complete_graph(columns)
-    
+
+    # 1. Start with a full graph and compute the correlation matrix once
+    if isinstance(data, (SufficientStatistics, ColumnMatrix)):
+        statistics = as_statistics(data)
+    else:
+        statistics = SufficientStatistics.from_data(data)
+
     # 2. Check for independence (Skeleton Phase)
-    # We look at every pair of variables
-    for u, v in list(graph.edges()):
-        independent = check_independence(data, u, v)
-        if independent:
-            print(f"Removing edge between {u} and {v}")
-            graph.remove_edge(u, v)
-    
+    skeleton, sep_sets = estimate_skeleton(statistics.correlation, statistics.n, statistics.columns, alpha=alpha)
+
     # 3. Orient the edges (make it a Directed Graph)
-    # Turn the skeleton into a Directed Graph (DiGraph)
-    final_graph = nx.DiGraph(graph)
-    final_graph = orient_edges(final_graph)
-    
+    final_graph = orient_edges(skeleton, sep_sets)
+
     return final_graph
 
 
@@ -147,10 +503,14 @@ def get_matrix(graph):
     """
     Addresses Issue #3: Produces an adjacency matrix.
     
-    Takes the graph (from either Option A or B) and turns it into a grid.
+    Takes the graph (from either Option A or B, or a SparseDAG) and turns it into a grid.
     """
     if graph is None:
         return None
+
+    if isinstance(graph, SparseDAG):
+        # Same node order as for a DiGraph: the graph's own.
+        return graph.matrix.toarray().astype(float)
         
     # Convert graph to a numpy matrix (0s and 1s)
     matrix = nx.to_numpy_array(graph)
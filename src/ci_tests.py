@@ -0,0 +1,239 @@
+from collections import OrderedDict
+import numpy as np
+from scipy import special
+
+
+# ==========================================
+# Conditional Independence (CI) Test Layer
+# ==========================================
+#
+# INTENT: For Gaussian data every partial-correlation test only needs the sample size and the
+# covariance matrix. Computing these once turns each CI test into a small (|S| + 2) x (|S| + 2)
+# matrix inversion, whose cost does not depend on the number of rows.
+
+# Rows per cross-product of float32 data. Each block is multiplied in float32 (half the memory
+# traffic of float64) and the blocks are merged in float64, which bounds the rounding error of
+# the covariance to the length of one block.
+FLOAT32_BLOCK_ROWS = 65536
+
+
+class SufficientStatistics:
+    """
+    Sample size, column means and the matrix of centered cross-products of a dataset.
+    """
+
+    def __init__(self, columns, n=0, mean=None, m2=None):
+        self.columns = list(columns)
+        self.n = n
+        self.mean = np.zeros(len(self.columns)) if mean is None else mean
+        self.m2 = np.zeros((len(self.columns), len(self.columns))) if m2 is None else m2
+        self._index = {col: i for i, col in enumerate(self.columns)}
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        Computes the statistics of a DataFrame in a single pass over its values.
+        """
+        return cls(data.columns).update(data)
+
+    def update(self, chunk):
+        """
+        Adds a chunk of rows (DataFrame or 2-D array, columns in the same order) to the statistics.
+        float32 chunks are multiplied in float32, FLOAT32_BLOCK_ROWS rows at a time; anything
+        else in float64.
+
+        Returns:
+            SufficientStatistics: self, so calls can be chained.
+        """
+        values = np.asarray(chunk)
+        if values.dtype != np.float32:
+            values = values.astype(float, copy=False)
+        if values.shape[0] == 0:
+            return self
+
+        if values.dtype == np.float32:
+            for start in range(0, values.shape[0], FLOAT32_BLOCK_ROWS):
+                block = values[start:start + FLOAT32_BLOCK_ROWS]
+                mean = block.mean(axis=0, dtype=np.float64)
+                centered = block - mean.astype(np.float32)
+                self.merge(SufficientStatistics(self.columns, n=block.shape[0], mean=mean,
+                                                m2=(centered.T @ centered).astype(np.float64)))
+            return self
+
+        mean = values.mean(axis=0)
+        centered = values - mean
+        return self.merge(SufficientStatistics(self.columns, n=values.shape[0], mean=mean, m2=centered.T @ centered))
+
+    def merge(self, other):
+        """
+        Combines the statistics of another, disjoint sample into this one (in place).
+
+        INTENT: Chan et al.'s pairwise update adds the two centered cross-product matrices plus a
+        correction for the difference of the means. Unlike summing raw products, it does not lose
+        precision when the means are large compared to the spread, so chunks (or the results of
+        several workers) can be combined in any order.
+
+        Returns:
+            SufficientStatistics: self, so calls can be chained.
+        """
+        if list(other.columns) != self.columns:
+            raise ValueError(f"Cannot merge statistics over columns {other.columns} into {self.columns}")
+
+        if other.n == 0:
+            return self
+
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.m2 = self.m2 + other.m2 + np.outer(delta, delta) * (self.n * other.n / n)
+        self.mean = self.mean + delta * (other.n / n)
+        self.n = n
+        return self
+
+    def index(self, column):
+        return self._index[column]
+
+    @property
+    def covariance(self):
+        return self.m2 / max(self.n - 1, 1)
+
+    @property
+    def correlation(self):
+        """
+        The correlation matrix. Constant columns are treated as uncorrelated with everything.
+        """
+        std = np.sqrt(np.diag(self.m2))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.m2 / np.outer(std, std)
+
+        corr = np.nan_to_num(corr)
+        np.fill_diagonal(corr, 1.0)
+        return corr
+
+
+def partial_correlations(corr, x_idx, y_idx, cond_idx):
+    """
+    Computes many partial correlations r(x, y | S) at once from a correlation matrix.
+
+    INTENT: The partial correlation is read off the inverse of the correlation submatrix
+    over T = {x, y} + S. Every distinct set T is inverted only once (in one batched
+    np.linalg.pinv call), and the inverse is shared by every test that uses the same set,
+    e.g. (x, y | S) and (y, x | S), which PC always tests from both endpoints.
+
+    Args:
+        corr (np.ndarray): The p x p correlation matrix.
+        x_idx (np.ndarray): Column indices of x, shape (k,).
+        y_idx (np.ndarray): Column indices of y, shape (k,).
+        cond_idx (np.ndarray): Column indices of the conditioning sets, shape (k, depth).
+
+    Returns:
+        np.ndarray: The k partial correlations.
+    """
+    x_idx = np.asarray(x_idx, dtype=int)
+    y_idx = np.asarray(y_idx, dtype=int)
+    cond_idx = np.asarray(cond_idx, dtype=int).reshape(x_idx.shape[0], -1)
+
+    var_sets = np.sort(np.column_stack([x_idx, y_idx, cond_idx]), axis=1)
+    unique_sets, inverse = np.unique(var_sets, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+
+    precision = np.linalg.pinv(corr[unique_sets[:, :, None], unique_sets[:, None, :]], hermitian=True)
+
+    # Position of x and y inside their (sorted) variable set.
+    pos_x = np.argmax(var_sets == x_idx[:, None], axis=1)
+    pos_y = np.argmax(var_sets == y_idx[:, None], axis=1)
+
+    p_xy = precision[inverse, pos_x, pos_y]
+    p_xx = precision[inverse, pos_x, pos_x]
+    p_yy = precision[inverse, pos_y, pos_y]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = -p_xy / np.sqrt(p_xx * p_yy)
+
+    return np.nan_to_num(r, nan=0.0)
+
+
+def fisher_z_pvalues(r, n_samples, depth):
+    """
+    Two-sided Fisher's Z-test p-values for an array of (partial) correlations,
+    all conditioned on sets of the same size 'depth'.
+    """
+    r = np.clip(r, -1 + 1e-12, 1 - 1e-12)
+    dof = max(n_samples - depth - 3, 1)
+    z = np.arctanh(r) * np.sqrt(dof)
+
+    # ndtr(-|z|) is the standard normal survival function; scipy.special imports much faster than scipy.stats.
+    return 2 * special.ndtr(-np.abs(z))
+
+
+def t_test_pvalues(r, n_samples, depth):
+    """
+    Two-sided t-test p-values for an array of (partial) correlations, with n - depth - 2 degrees of freedom.
+    """
+    r = np.clip(r, -1 + 1e-12, 1 - 1e-12)
+    dof = max(n_samples - depth - 2, 1)
+    t_statistic = r * np.sqrt(dof / (1 - r ** 2))
+
+    return 2 * special.stdtr(dof, -np.abs(t_statistic))
+
+
+class PartialCorrelationTest:
+    """
+    Partial-correlation CI test on SufficientStatistics, with a bounded LRU memo of results.
+
+    The instance is callable with pgmpy's CI-test signature, so it can be passed directly as
+    'ci_test' to pgmpy's PC. With method='pearsonr' it gives the same p-values as pgmpy's
+    'pearsonr' test, without touching the data again; method='fisher-z' runs the Fisher-z
+    test of the native PC (run_pc_algo_manual) instead.
+    """
+
+    def __init__(self, statistics, cache_size=100000, method='pearsonr'):
+        if method not in ('pearsonr', 'fisher-z'):
+            raise ValueError(f"Unknown partial correlation test '{method}'. Options: pearsonr, fisher-z.")
+
+        self.statistics = statistics
+        self.cache_size = cache_size
+        self.method = method
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._corr = statistics.correlation
+
+    def test(self, x, y, cond=()):
+        """
+        Returns:
+            tuple: (partial correlation, p-value) of x and y given the variables in 'cond'.
+        """
+        # The test is symmetric in x and y, so both orders share one cache entry.
+        x, y = sorted((x, y))
+        key = (x, y, frozenset(cond))
+
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        self.misses += 1
+        stats_ = self.statistics
+        cond_idx = [[stats_.index(c) for c in sorted(cond)]]
+        r = partial_correlations(self._corr, [stats_.index(x)], [stats_.index(y)], cond_idx)
+        if self.method == 'fisher-z':
+            p_value = fisher_z_pvalues(r, stats_.n, len(cond))[0]
+        else:
+            # pgmpy runs scipy's pearsonr on the regression residuals, which always uses n - 2
+            # degrees of freedom. Testing with depth 0 keeps the p-values (and so the PC
+            # decisions) identical to the 'pearsonr' test.
+            p_value = t_test_pvalues(r, stats_.n, 0)[0]
+        result = (float(r[0]), float(p_value))
+
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+        return result
+
+    def __call__(self, X, Y, Z, data=None, boolean=True, significance_level=0.05, **kwargs):
+        coef, p_value = self.test(X, Y, Z)
+
+        if boolean:
+            return p_value >= significance_level
+        return coef, p_value
@@ -0,0 +1,16 @@
+import os
+
+
+# ==========================================
+# Shared Defaults
+# ==========================================
+#
+# INTENT: main.py needs these values to build its command line, before it knows whether the run
+# will load any data. They live in this module, which imports nothing heavy, so that '--help' or
+# a missing file never pays for pandas and scipy (src.loaders re-exports them).
+
+# Rows per chunk when streaming a file, see src.loaders.iter_causal_data.
+DEFAULT_CHUNK_SIZE = 100000
+
+# Default location of the parsed-data cache, see src.loaders.load_causal_data.
+DEFAULT_CACHE_DIR = os.path.join('data', '.cache')
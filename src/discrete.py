@@ -0,0 +1,323 @@
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from scipy import special
+
+
+# ==========================================
+# Mixed-Type Data and Contingency CI Tests ('--ci-test chi_square' / 'g_sq')
+# ==========================================
+#
+# INTENT: load_causal_data used to coerce every column to a number, so a column of labels
+# ('red', 'green') became NaN and took its rows with it, and integer-coded columns were treated
+# as Gaussian. Text columns are now encoded as integer codes (encode_columns), and every column
+# is classified as 'continuous', 'discrete' (few integer levels) or 'categorical'
+# (infer_column_types).
+#
+# The contingency tests need every variable as small integer codes: discrete and categorical
+# columns keep one code per level, continuous ones are cut into quantile bins (discretize).
+# pgmpy's chi_square and g_sq group the DataFrame by the conditioning set with pandas for every
+# test, which takes seconds per test on a million rows. ContingencyTest encodes the columns once;
+# a test (X, Y | S) then combines the codes of S into one stratum index (cached per S, since PC
+# tests many pairs against the same set) and counts the whole (S, X, Y) table with a single
+# np.bincount. The statistic and its degrees of freedom are those of pgmpy's tests: per stratum,
+# the levels of X and Y that do not occur are left out, 2 x 2 strata get Yates' correction, and
+# the statistics and degrees of freedom of all strata are summed.
+
+DEFAULT_BINS = 5
+
+# Integer-valued columns with more distinct values than this are binned like continuous ones.
+DEFAULT_MAX_LEVELS = 20
+
+CONTINGENCY_TESTS = ('chi_square', 'g_sq')
+
+# Largest (strata x levels of X x levels of Y) table counted at once; larger tables are counted
+# in blocks of strata, so the memory of a test stays bounded however many strata there are.
+MAX_TABLE_CELLS = 2 ** 22
+
+
+def is_label_column(n_present, n_numeric):
+    """
+    A column is categorical when less than half of its values are numbers, so a numeric column
+    with a few typos still loses only the affected rows.
+    """
+    return bool(n_present) and n_numeric * 2 < n_present
+
+
+def encode_columns(df):
+    """
+    Converts every column to numbers: numeric text is parsed (unparseable cells become NaN, as
+    before), while columns that are mostly text are replaced by integer codes of their sorted
+    labels (missing labels become NaN). Booleans become 0/1.
+
+    Returns:
+        pd.DataFrame: The numeric DataFrame. Rows with missing values are not removed here.
+    """
+    encoded = {}
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_bool_dtype(values):
+            encoded[col] = values.astype(int)
+            continue
+
+        numeric = pd.to_numeric(values, errors='coerce')
+        if is_label_column(values.notna().sum(), numeric.notna().sum()):
+            codes, _ = pd.factorize(values, sort=True)
+            encoded[col] = pd.Series(np.where(codes < 0, np.nan, codes), index=values.index)
+        else:
+            encoded[col] = numeric
+
+    return pd.DataFrame(encoded, index=df.index)
+
+
+def infer_column_types(df, max_levels=DEFAULT_MAX_LEVELS):
+    """
+    Classifies the columns of a DataFrame.
+
+    Returns:
+        dict: column -> 'categorical' (not numeric), 'discrete' (integer values, at most
+              'max_levels' of them) or 'continuous'.
+    """
+    types = {}
+    for col in df.columns:
+        values = df[col]
+        if not (pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values)):
+            types[col] = 'categorical'
+            continue
+
+        array = values.to_numpy(dtype=float)
+        finite = array[np.isfinite(array)]
+        is_integer = finite.size > 0 and np.array_equal(finite, np.round(finite))
+        # nunique hashes the values in one pass; it is only needed for integer columns.
+        types[col] = 'discrete' if is_integer and values.nunique() <= max_levels else 'continuous'
+
+    return types
+
+
+def discretize(values, bins=DEFAULT_BINS):
+    """
+    Cuts continuous values into (at most) 'bins' quantile bins, vectorized.
+
+    Returns:
+        np.ndarray: int64 codes 0..k-1. Tied quantiles are merged, so k can be less than 'bins'.
+    """
+    values = np.asarray(values, dtype=float)
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+    return np.searchsorted(edges, values, side='right').astype(np.int64)
+
+
+def level_codes(values):
+    """
+    Returns:
+        tuple: (int64 codes 0..k-1 of the distinct values, in sorted order, and k).
+    """
+    values = np.asarray(values)
+    if values.size and np.issubdtype(values.dtype, np.number) and np.array_equal(values, np.round(values)):
+        low, high = values.min(), values.max()
+        if high - low < 4 * values.size:
+            # Small integer ranges: a bincount finds the levels without sorting the column.
+            shifted = (values - low).astype(np.int64)
+            present = np.bincount(shifted) > 0
+            lookup = np.cumsum(present) - 1
+            return lookup[shifted], int(present.sum())
+
+    levels, codes = np.unique(values, return_inverse=True)
+    return codes.ravel().astype(np.int64), len(levels)
+
+
+def encode_for_contingency(df, bins=DEFAULT_BINS, max_levels=DEFAULT_MAX_LEVELS, types=None):
+    """
+    Turns every column into small integer codes: discrete and categorical columns by level,
+    continuous columns by discretize.
+
+    Returns:
+        tuple: (dict column -> int64 codes, dict column -> number of levels).
+    """
+    types = infer_column_types(df, max_levels) if types is None else types
+    codes, cardinalities = {}, {}
+    for col in df.columns:
+        if types[col] == 'continuous':
+            codes[col] = discretize(df[col].to_numpy(dtype=float), bins)
+            cardinalities[col] = int(codes[col].max()) + 1 if codes[col].size else 0
+        else:
+            codes[col], cardinalities[col] = level_codes(df[col].to_numpy())
+
+    return codes, cardinalities
+
+
+def contingency_name(statistic='chi_square', bins=DEFAULT_BINS):
+    """
+    Returns the test name of a configuration ('chi_square' / 'g_sq' for the default number of
+    bins, else '<statistic>:<bins>'), in the manner of src.kernel_ci.kci_name.
+    """
+    if statistic not in CONTINGENCY_TESTS:
+        raise ValueError(f"Unknown contingency test '{statistic}'. Options: {', '.join(CONTINGENCY_TESTS)}.")
+    if bins == DEFAULT_BINS:
+        return statistic
+    return f"{statistic}:{int(bins)}"
+
+
+def parse_contingency_name(test_name):
+    """
+    Returns:
+        tuple: (statistic, bins) of a contingency_name, or None if 'test_name' is not one.
+    """
+    if not isinstance(test_name, str):
+        return None
+    statistic, _, bins = test_name.partition(':')
+    if statistic not in CONTINGENCY_TESTS:
+        return None
+    if not bins:
+        return statistic, DEFAULT_BINS
+    if not bins.isdigit() or int(bins) < 2:
+        raise ValueError(f"Invalid contingency test '{test_name}'. Use '{statistic}' or '{statistic}:<bins>'.")
+    return statistic, int(bins)
+
+
+def _table_statistic(table, statistic):
+    """
+    Statistic and degrees of freedom of a stack of contingency tables, shape (strata, kx, ky),
+    as pgmpy sums them over scipy.stats.chi2_contingency of each stratum.
+    """
+    rows = table.sum(axis=2)
+    cols = table.sum(axis=1)
+    totals = rows.sum(axis=1)
+    # Levels that do not occur in a stratum are not part of its table.
+    dof = np.maximum((rows > 0).sum(axis=1) - 1, 0) * np.maximum((cols > 0).sum(axis=1) - 1, 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = rows[:, :, None] * cols[:, None, :] / totals[:, None, None]
+    expected = np.nan_to_num(expected)
+    observed = table.astype(float)
+
+    # Yates' correction of scipy's chi2_contingency for tables with one degree of freedom.
+    yates = dof == 1
+    if yates.any():
+        observed[yates] += np.clip(expected[yates] - observed[yates], -0.5, 0.5)
+
+    cells = expected > 0
+    if statistic == 'chi_square':
+        value = np.sum((observed[cells] - expected[cells]) ** 2 / expected[cells])
+    else:
+        value = 2 * np.sum(special.xlogy(observed[cells], observed[cells] / expected[cells]))
+
+    return float(value), int(dof.sum())
+
+
+class ContingencyTest:
+    """
+    Chi-square or G-test of conditional independence on integer-coded data, callable with
+    pgmpy's CI-test signature like src.ci_tests.PartialCorrelationTest.
+    """
+
+    def __init__(self, data, statistic='chi_square', bins=DEFAULT_BINS, max_levels=DEFAULT_MAX_LEVELS,
+                 cache_size=100000, strata_cache_bytes=256 * 2 ** 20):
+        """
+        Args:
+            data (pd.DataFrame): The data. Every column is encoded once (encode_for_contingency).
+            statistic (str): 'chi_square' (Pearson) or 'g_sq' (log-likelihood ratio).
+            bins (int): Quantile bins of the continuous columns.
+            max_levels (int): See infer_column_types.
+            cache_size (int): Maximum number of memoized test results.
+            strata_cache_bytes (int): Memory for the cached stratum indices of conditioning sets.
+        """
+        if statistic not in CONTINGENCY_TESTS:
+            raise ValueError(f"Unknown contingency test '{statistic}'. Options: {', '.join(CONTINGENCY_TESTS)}.")
+
+        self.statistic = statistic
+        self.types = infer_column_types(data, max_levels)
+        self.codes, self.cardinalities = encode_for_contingency(data, bins, max_levels, self.types)
+        self.n = len(data)
+
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.strata_cache_bytes = strata_cache_bytes
+        self.strata = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_name(cls, test_name, data, **kwargs):
+        statistic, bins = parse_contingency_name(test_name)
+        return cls(data, statistic=statistic, bins=bins, **kwargs)
+
+    def _strata(self, cond):
+        """
+        Returns:
+            tuple: (int64 stratum of every row, number of strata) for a conditioning set.
+                   Only the combinations that occur are numbered.
+        """
+        key = frozenset(cond)
+        if key in self.strata:
+            self.strata.move_to_end(key)
+            return self.strata[key]
+
+        strata, n_strata = np.zeros(self.n, dtype=np.int64), 1
+        for var in sorted(cond):
+            strata = strata * self.cardinalities[var] + self.codes[var]
+            n_strata *= self.cardinalities[var]
+            # Renumbering the combinations that occur keeps the index small (at most n strata),
+            # however many variables and levels the set has.
+            if n_strata > self.n:
+                strata, n_strata = level_codes(strata)
+        if len(cond) > 1:
+            strata, n_strata = level_codes(strata)
+
+        self.strata[key] = (strata, n_strata)
+        while len(self.strata) > 1 and sum(s.nbytes for s, _ in self.strata.values()) > self.strata_cache_bytes:
+            self.strata.popitem(last=False)
+
+        return strata, n_strata
+
+    def test(self, x, y, cond=()):
+        """
+        Returns:
+            tuple: (statistic, p-value, degrees of freedom) of x and y given the variables in 'cond'.
+        """
+        # The test is symmetric in x and y, so both orders share one cache entry.
+        x, y = sorted((x, y))
+        key = (x, y, frozenset(cond))
+
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        self.misses += 1
+        strata, n_strata = self._strata(cond)
+        kx, ky = self.cardinalities[x], self.cardinalities[y]
+        cells = strata * (kx * ky) + self.codes[x] * ky + self.codes[y]
+
+        value, dof = 0.0, 0
+        block = max(1, MAX_TABLE_CELLS // max(kx * ky, 1))
+        if n_strata <= block:
+            table = np.bincount(cells, minlength=n_strata * kx * ky).reshape(n_strata, kx, ky)
+            value, dof = _table_statistic(table, self.statistic)
+        else:
+            # Rows sorted by stratum, so every block of strata is one contiguous slice.
+            order = np.argsort(strata, kind='stable')
+            bounds = np.searchsorted(strata[order], np.arange(0, n_strata + block, block))
+            for i in range(len(bounds) - 1):
+                rows = order[bounds[i]:bounds[i + 1]]
+                size = min(block, n_strata - i * block)
+                table = np.bincount(cells[rows] - i * block * kx * ky, minlength=size * kx * ky)
+                block_value, block_dof = _table_statistic(table.reshape(size, kx, ky), self.statistic)
+                value += block_value
+                dof += block_dof
+
+        # Without degrees of freedom (X or Y constant in every stratum) there is no evidence of dependence.
+        p_value = float(special.chdtrc(dof, value)) if dof > 0 else 1.0
+        result = (value, p_value, dof)
+
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+        return result
+
+    def __call__(self, X, Y, Z, data=None, boolean=True, significance_level=0.05, **kwargs):
+        value, p_value, dof = self.test(X, Y, Z)
+
+        if boolean:
+            return p_value >= significance_level
+        return value, p_value, dof
@@ -1,14 +1,46 @@
-import matplotlib
-matplotlib.use('TkAgg')
-import matplotlib.pyplot as plt
-import networkx as nx
+import math
 import os
+from xml.sax.saxutils import escape, quoteattr
+import networkx as nx
+from src.metrics import timed
+
 
+# INTENT: pyplot is only imported when a window is requested. Importing it selects a GUI backend,
+# which blocks or fails on machines without a display (batch jobs, servers, CI). Headless
+# rendering draws on a standalone Agg figure instead, which is freed as soon as it goes out of
+# scope, so rendering many graphs in one process does not accumulate open figures.
+# matplotlib itself is only imported by draw_causal_graph, so the text exports stay cheap.
 
-def draw_causal_graph(graph, title="Causal Graph", node_color='lightblue', save_path=None):
+
+def edge_widths(graph, edge_frequencies, min_width=0.5, max_width=6.0):
+    """
+    Maps the bootstrap frequency of every edge of the graph (see src.bootstrap) onto a line width.
+
+    Args:
+        edge_frequencies (pd.DataFrame): Frequency matrix, edge row -> column, values in [0, 1].
+
+    Returns:
+        list: One width per edge, in the order of graph.edges().
+    """
+    return [min_width + (max_width - min_width) * float(edge_frequencies.loc[u, v]) for u, v in graph.edges()]
+
+
+@timed('plot')
+def draw_causal_graph(graph, title="Causal Graph", node_color='lightblue', save_path=None, show=True,
+                      edge_frequencies=None):
     """
     This takes our two-variable graph and draws it nicely. We'll make sure
     the nodes look clean and the arrow (if there is one) is clear.
+
+    Args:
+        graph (nx.DiGraph): The graph to draw.
+        title (str): Title of the plot (and of the window).
+        node_color (str): Matplotlib color of the nodes.
+        save_path (str): Optional path of the image file (the extension picks the format, e.g. .png or .svg).
+        show (bool): Opens an interactive window. With False nothing is displayed and pyplot is never
+                     touched, which is the mode to use in batch jobs and workers.
+        edge_frequencies (pd.DataFrame): Optional bootstrap frequencies (see src.bootstrap); each
+                     edge is drawn with a width proportional to how often it was found.
     """
 
     # Safety check: We prevent execution on None values to avoid crashes 
@@ -17,8 +49,23 @@ def draw_causal_graph(graph, title="Causal Graph", node_color='lightblue', save_
         print("Error: No graph provided for visualization.")
         return
 
-    fig, ax = plt.subplots(figsize=(8, 6))
-    fig.canvas.manager.set_window_title(title)  # This sets the text in the actual window border/taskbar
+    # The layout and drawing functions of networkx need a real graph, not a SparseDAG view. A plot
+    # is only readable for a few dozen nodes, where the conversion costs nothing; large graphs go
+    # through the text exports, which read a SparseDAG directly.
+    if not isinstance(graph, nx.Graph):
+        graph = graph.to_graph()
+
+    if show:
+        import matplotlib.pyplot as plt
+        fig = plt.figure(figsize=(8, 6))
+        fig.canvas.manager.set_window_title(title)  # This sets the text in the actual window border/taskbar
+    else:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        fig = Figure(figsize=(8, 6))
+        FigureCanvasAgg(fig)
+
+    ax = fig.add_subplot()
     ax.set_title(title)
 
     pos = nx.circular_layout(graph)
@@ -36,6 +83,7 @@ def draw_causal_graph(graph, title="Causal Graph", node_color='lightblue', save_
             font_weight='bold',
             arrows=True,
             arrowsize=20,
+            width=1.0 if edge_frequencies is None else edge_widths(graph, edge_frequencies),
             connectionstyle='arc3, rad=0.1') 
 
     if save_path:
@@ -43,11 +91,13 @@ def draw_causal_graph(graph, title="Causal Graph", node_color='lightblue', save_
         if directory: 
             os.makedirs(directory, exist_ok=True)
             
-        plt.savefig(save_path)
+        fig.savefig(save_path)
         print(f"Graph successfully saved to: {save_path}")
 
-    print("Opening plot window...")
-    plt.show()
+    if show:
+        print("Opening plot window...")
+        plt.show()
+        plt.close(fig)
 
 
 def save_graph_to_file(graph, filename):
@@ -56,5 +106,110 @@ def save_graph_to_file(graph, filename):
     in a report.
     """
     if graph is not None:
+        import matplotlib.pyplot as plt
         plt.savefig(filename)
         print(f"Graph successfully saved to {filename}")
+
+
+def graph_to_dot(graph, title="Causal Graph", edge_frequencies=None):
+    """
+    Describes the graph in the Graphviz DOT language, without any rendering.
+    Bootstrap frequencies, if given, become the pen width and label of every edge.
+
+    Returns:
+        str: The DOT source, e.g. for 'dot -Tpng'.
+    """
+    def quote(name):
+        return '"' + str(name).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+    lines = [f"digraph {quote(title)} {{", f"  label={quote(title)};", "  node [shape=circle, style=filled, fillcolor=lightblue];"]
+    lines += [f"  {quote(node)};" for node in graph.nodes()]
+    if edge_frequencies is None:
+        lines += [f"  {quote(u)} -> {quote(v)};" for u, v in graph.edges()]
+    else:
+        for (u, v), width in zip(graph.edges(), edge_widths(graph, edge_frequencies)):
+            label = f"{edge_frequencies.loc[u, v]:.0%}"
+            lines.append(f"  {quote(u)} -> {quote(v)} [penwidth={width:.2f}, label={quote(label)}];")
+    lines.append("}")
+
+    return "\n".join(lines) + "\n"
+
+
+def graph_to_svg(graph, title="Causal Graph", node_color='lightblue', width=800, height=600, node_radius=30,
+                 edge_frequencies=None):
+    """
+    Renders the graph as a standalone SVG document with the same circular layout as
+    draw_causal_graph, using string formatting only (no matplotlib).
+    Bootstrap frequencies, if given, set the stroke width of every edge.
+
+    Returns:
+        str: The SVG document.
+    """
+    pos = nx.circular_layout(graph)
+
+    # Map the layout from [-1, 1] onto the canvas, leaving room for the title and the node circles.
+    scale = min(width, height) / 2 - node_radius - 30
+    coords = {node: (width / 2 + scale * x, height / 2 + 15 - scale * y) for node, (x, y) in pos.items()}
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">',
+        # The arrow head has a fixed size (8 x the default 1.5 stroke), whatever the width of the edge.
+        '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerUnits="userSpaceOnUse" '
+        'markerWidth="12" markerHeight="12" orient="auto-start-reverse">'
+        '<path d="M 0 0 L 10 5 L 0 10 z" fill="black"/></marker></defs>',
+        '<rect width="100%" height="100%" fill="white"/>',
+        f'<text x="{width / 2:.1f}" y="24" text-anchor="middle" font-family="sans-serif" font-size="16">'
+        f'{escape(str(title))}</text>',
+    ]
+
+    if edge_frequencies is None:
+        widths = [1.5] * graph.number_of_edges()
+    else:
+        widths = edge_widths(graph, edge_frequencies)
+
+    # Edges end on the circle's border rather than its centre, so the arrow heads stay visible.
+    for (u, v), stroke_width in zip(graph.edges(), widths):
+        (x1, y1), (x2, y2) = coords[u], coords[v]
+        length = math.hypot(x2 - x1, y2 - y1) or 1.0
+        dx, dy = (x2 - x1) / length * node_radius, (y2 - y1) / length * node_radius
+        parts.append(f'<line x1="{x1 + dx:.1f}" y1="{y1 + dy:.1f}" x2="{x2 - dx:.1f}" y2="{y2 - dy:.1f}" '
+                     f'stroke="black" stroke-width="{stroke_width:.2f}" marker-end="url(#arrow)"/>')
+
+    for node, (x, y) in coords.items():
+        parts.append(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="{node_radius}" fill={quoteattr(node_color)}/>')
+        parts.append(f'<text x="{x:.1f}" y="{y:.1f}" text-anchor="middle" dominant-baseline="central" '
+                     f'font-family="sans-serif" font-size="14" font-weight="bold">{escape(str(node))}</text>')
+
+    parts.append('</svg>')
+    return "\n".join(parts) + "\n"
+
+
+@timed('plot')
+def export_graph_text(graph, save_path, title="Causal Graph", edge_frequencies=None):
+    """
+    Writes the graph as DOT ('.dot' or '.gv'), SVG ('.svg') or edge-list ('.edges', see
+    src.adjacency) text, bypassing matplotlib. This is the fastest way to save many result graphs.
+    The edge list has no title or frequencies; it is the compact format for large graphs.
+    """
+    if graph is None:
+        print("Error: No graph provided for export.")
+        return
+
+    extension = os.path.splitext(save_path)[1].lower()
+    if extension in ('.dot', '.gv'):
+        text = graph_to_dot(graph, title=title, edge_frequencies=edge_frequencies)
+    elif extension == '.svg':
+        text = graph_to_svg(graph, title=title, edge_frequencies=edge_frequencies)
+    elif extension == '.edges':
+        from src.adjacency import format_edge_list
+        text = format_edge_list(graph)
+    else:
+        raise ValueError(f"Unknown text export format '{extension}'. Use .dot, .gv, .svg or .edges.")
+
+    directory = os.path.dirname(save_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(save_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    print(f"Graph successfully saved to: {save_path}")
@@ -0,0 +1,335 @@
+import hashlib
+import io
+import json
+import os
+import time
+import networkx as nx
+import numpy as np
+import pandas as pd
+from src.ci_tests import SufficientStatistics, partial_correlations, fisher_z_pvalues
+from src.causality import CI_BATCH_SIZE, estimate_skeleton, orient_edges, _anm_direction
+from src.loaders import sniff_layout, load_causal_data, encode_chunk, text_columns, collect_labels
+from src.refinement import run_edge_tests, apply_edge_directions
+from src.metrics import phase
+
+
+# ==========================================
+# Incremental Discovery for Appended Files ('python main.py --incremental STATE')
+# ==========================================
+#
+# INTENT: When a file only grows by appended rows, a full rerun repeats work whose result is
+# mostly known. The state file keeps the sufficient statistics of the rows read so far, the byte
+# offset where reading stopped, and the log of every CI test of the native stable PC. On the next
+# run only the new bytes are parsed and merged into the statistics. The logged tests are then
+# re-evaluated in one batch from the updated correlation matrix: stable PC depends on nothing but
+# these decisions, so if none of them crossed 'alpha' the skeleton, the separating sets and the
+# orientation are exactly those of a full rerun, and the skeleton search is skipped.
+#
+# The state also keeps the ANM p-values of every edge with the number of rows they were computed
+# on. They are reused for an edge that PC returns unchanged only if no rows were added since (or
+# if the caller accepts stale p-values with 'reuse_anm'), and the verdict is always derived again
+# from them at the current alpha, so the graph is the one a full rerun would return.
+#
+# Text columns are coded by their sorted labels, as load_causal_data (which the ANM stage uses)
+# codes them, so both stages see the same rows. The labels and the per-column counts that decide
+# which columns are text are kept in the state. A label the earlier rows did not have would
+# change the codes of those rows, and appended text can turn a column into a text column; in
+# both cases the file is processed from scratch.
+
+STATE_VERSION = 3
+
+# Bytes parsed at once when reading new rows.
+READ_BLOCK_BYTES = 64 * 2 ** 20
+
+# Bytes at the start of the file whose hash detects a rewritten (rather than appended) file.
+HEAD_BYTES = 65536
+
+
+def _complete_lines_end(file_path):
+    """
+    Returns the byte offset just past the last newline, so that a row that is still being
+    written is left for the next run.
+    """
+    with open(file_path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        while position > 0:
+            step = min(READ_BLOCK_BYTES, position)
+            position -= step
+            f.seek(position)
+            newline = f.read(step).rfind(b'\n')
+            if newline >= 0:
+                return position + newline + 1
+
+    return 0
+
+
+def _head_hash(file_path, offset):
+    with open(file_path, 'rb') as f:
+        return hashlib.sha1(f.read(min(offset, HEAD_BYTES))).hexdigest()
+
+
+def iter_new_rows(file_path, layout, start, end, block_bytes=READ_BLOCK_BYTES, labels=None, counts=None,
+                  unknown=None):
+    """
+    Parses the rows stored between the byte offsets 'start' and 'end' (both at line boundaries).
+
+    Args:
+        layout (tuple): (separator, header, usecols) as returned by src.loaders.sniff_layout.
+        labels, counts, unknown: See src.loaders.encode_chunk.
+
+    Yields:
+        pd.DataFrame: Numeric blocks with columns A, B, C..., rows with missing values removed.
+    """
+    separator, header, usecols = layout
+    names = [chr(65 + i) for i in range(len(usecols))]
+    labels = labels or {}
+    text_dtype = {usecols[names.index(col)]: str for col in labels}
+
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        if start == 0 and header is not None:
+            f.readline()
+
+        while f.tell() < end:
+            block = f.read(min(block_bytes, end - f.tell()))
+            if f.tell() < end and not block.endswith(b'\n'):
+                block += f.readline()
+            if not block.strip():
+                continue
+
+            chunk = pd.read_csv(io.BytesIO(block), sep=separator, header=None, usecols=usecols,
+                                dtype=text_dtype or None)
+            chunk.columns = names
+            yield encode_chunk(chunk, labels, counts, unknown)
+
+
+def _read_rows(file_path, layout, start, end, statistics, labels, counts):
+    """
+    Merges the rows between 'start' and 'end' into 'statistics'.
+
+    Returns:
+        tuple: (rows added, True if the rows are coded consistently with the earlier ones)
+    """
+    rows, unknown = 0, set()
+    for chunk in iter_new_rows(file_path, layout, start, end, labels=labels, counts=counts, unknown=unknown):
+        statistics.update(chunk)
+        rows += len(chunk)
+
+    return rows, not unknown and sorted(text_columns(counts)) == sorted(labels)
+
+
+def save_state(state_path, state):
+    """
+    Writes the incremental state as a single .npz file (arrays plus a JSON 'meta' entry).
+    """
+    arrays = {'n': np.array(state['statistics'].n), 'mean': state['statistics'].mean, 'm2': state['statistics'].m2}
+    for depth, (tests, p_values) in enumerate(state['test_log']):
+        arrays[f'tests_{depth}'] = tests
+        arrays[f'p_{depth}'] = p_values
+
+    meta = {key: state[key] for key in ('version', 'file', 'layout', 'offset', 'head_sha1', 'labels', 'counts',
+                                        'alpha', 'pc_edges', 'sep_sets', 'anm_method', 'anm')}
+    meta['columns'] = state['statistics'].columns
+    meta['depths'] = len(state['test_log'])
+
+    directory = os.path.dirname(state_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    temp_path = f"{state_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+    os.replace(temp_path, state_path)
+
+
+def load_state(state_path):
+    """
+    Returns:
+        dict: The state written by save_state, or None if there is no (readable) state file.
+    """
+    if not os.path.exists(state_path):
+        return None
+
+    try:
+        with np.load(state_path, allow_pickle=False) as archive:
+            state = json.loads(str(archive['meta']))
+            state['statistics'] = SufficientStatistics(state.pop('columns'), n=int(archive['n']),
+                                                       mean=archive['mean'], m2=archive['m2'])
+            state['test_log'] = [(archive[f'tests_{d}'], archive[f'p_{d}']) for d in range(state.pop('depths'))]
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ignoring unreadable state file {state_path}: {e}")
+        return None
+
+    if state.get('version') != STATE_VERSION:
+        return None
+
+    state['layout'] = tuple(state['layout'])
+    return state
+
+
+def recheck_tests(test_log, old_alpha, corr, n_samples, alpha):
+    """
+    Re-evaluates every logged CI test on new statistics, in one batch per depth.
+
+    Returns:
+        tuple: (updated test log, number of tests whose decision changed)
+    """
+    updated, flipped = [], 0
+    for depth, (tests, old_p) in enumerate(test_log):
+        new_p = np.concatenate([
+            fisher_z_pvalues(partial_correlations(corr, batch[:, 0], batch[:, 1], batch[:, 2:]), n_samples, depth)
+            for batch in (tests[start:start + CI_BATCH_SIZE] for start in range(0, len(tests), CI_BATCH_SIZE))
+        ]) if len(tests) else old_p
+
+        flipped += int(np.count_nonzero((new_p > alpha) != (old_p > old_alpha)))
+        updated.append((tests, new_p))
+
+    return updated, flipped
+
+
+def run_incremental(folder_path, filename, state_path, alpha=0.05, anm_method='gp', anm_alpha=0.05,
+                    reuse_anm=False, jobs=1, cache_dir=None):
+    """
+    Runs (or updates) the native PC plus ANM pipeline on a file that grows by appended rows.
+
+    Args:
+        state_path (str): The state file. It is created on the first run and updated on every run.
+        alpha (float): Significance level of the Fisher-z tests.
+        anm_method (str): ANM backend (see check_causal_direction_anm), or None to skip the refinement.
+        anm_alpha (float): Significance level of the HSIC tests that decide the ANM direction.
+        reuse_anm (bool): Also reuse the ANM p-values of unchanged edges after rows were appended,
+                          instead of testing them again on all the rows. Faster, but the verdicts
+                          can differ from those of a full rerun.
+        jobs (int): Worker processes for the ANM tests.
+        cache_dir (str): Passed to load_causal_data when ANM needs the rows.
+
+    Returns:
+        tuple: (nx.DiGraph, report dict), or (None, None) if the file cannot be read.
+    """
+    file_path = os.path.join(folder_path, filename)
+    if not os.path.exists(file_path):
+        print(f"Error: File not found at {file_path}")
+        return None, None
+
+    start_time = time.perf_counter()
+    state = load_state(state_path)
+    end = _complete_lines_end(file_path)
+
+    # The state only applies to the same file, if it was appended to rather than rewritten.
+    if state is not None and (state['file'] != os.path.abspath(file_path) or end < state['offset']
+                              or _head_hash(file_path, state['offset']) != state['head_sha1']):
+        print("The data file was replaced or rewritten since the last run; starting from scratch.")
+        state = None
+
+    try:
+        with phase('load'):
+            if state is not None:
+                layout, statistics, labels, counts = state['layout'], state['statistics'], state['labels'], state['counts']
+                new_rows, consistent = _read_rows(file_path, layout, state['offset'], end, statistics, labels, counts)
+                if not consistent:
+                    print("The new rows change the coding of a text column; starting from scratch.")
+                    state = None
+
+            if state is None:
+                layout = sniff_layout(file_path)
+                columns = [chr(65 + i) for i in range(len(layout[2]))]
+                statistics, labels, counts = SufficientStatistics(columns), {}, {}
+                new_rows, consistent = _read_rows(file_path, layout, 0, end, statistics, labels, counts)
+                if not consistent:
+                    # The text columns are only known after a first pass; the rows are read again
+                    # with their labels coded.
+                    labels = collect_labels(folder_path, filename, text_columns(counts))
+                    statistics, counts = SufficientStatistics(columns), {}
+                    new_rows, _ = _read_rows(file_path, layout, 0, end, statistics, labels, counts)
+    except Exception as e:
+        print(f"An error occurred while loading {filename}: {e}")
+        return None, None
+
+    if statistics.n < 3:
+        print(f"Error: {filename} has too few complete rows for the PC algorithm.")
+        return None, None
+
+    corr = statistics.correlation
+    columns = statistics.columns
+
+    # ---- Skeleton: reuse it unless a logged decision crossed alpha ----
+    flipped, rechecked = None, None
+    if state is not None:
+        rechecked = sum(len(tests) for tests, _ in state['test_log'])
+        with phase('pc.recheck'):
+            test_log, flipped = recheck_tests(state['test_log'], state['alpha'], corr, statistics.n, alpha)
+
+    if state is not None and flipped == 0:
+        skeleton_rerun = False
+        pc_edges = [tuple(edge) for edge in state['pc_edges']]
+        sep_sets = [(u, v, list(cond)) for u, v, cond in state['sep_sets']]
+    else:
+        skeleton_rerun = True
+        test_log = []
+        skeleton, sep_set_map = estimate_skeleton(corr, statistics.n, columns, alpha=alpha, test_log=test_log)
+        pc_edges = list(orient_edges(skeleton, sep_set_map).edges())
+        sep_sets = [(*sorted(pair), sorted(cond)) for pair, cond in sep_set_map.items()]
+
+    dag = nx.DiGraph()
+    dag.add_nodes_from(columns)
+    dag.add_edges_from(pc_edges)
+
+    # ---- ANM: p-values are reused for unchanged edges on unchanged rows ----
+    anm = {}
+    anm_tested = 0
+    if anm_method is not None and pc_edges:
+        previous = {}
+        if state is not None and state['anm_method'] == anm_method:
+            previous = {(u, v): (p_f, p_b, rows) for u, v, p_f, p_b, rows in state['anm']
+                        if rows == statistics.n or reuse_anm}
+
+        pending = [edge for edge in pc_edges if edge not in previous]
+        anm_tested = len(pending)
+        if pending:
+            df = load_causal_data(folder_path, filename, cache_dir=cache_dir)
+            if df is None:
+                return None, None
+            results = run_edge_tests(df, pending, alpha=anm_alpha, method=anm_method, jobs=jobs)
+            previous.update((edge, (p_f, p_b, statistics.n)) for edge, (_, p_f, p_b) in zip(pending, results))
+
+        anm = {edge: previous[edge] for edge in pc_edges}
+        # The verdict depends on alpha, so it is derived from the p-values on every run.
+        verdicts = [(_anm_direction(p_f, p_b, anm_alpha), p_f, p_b) for p_f, p_b, _ in anm.values()]
+        dag = apply_edge_directions(dag, pc_edges, verdicts)
+
+    save_state(state_path, {
+        'version': STATE_VERSION,
+        'file': os.path.abspath(file_path),
+        'layout': list(layout),
+        'offset': end,
+        'head_sha1': _head_hash(file_path, end),
+        'labels': labels,
+        'counts': counts,
+        'alpha': alpha,
+        'statistics': statistics,
+        'test_log': test_log,
+        'pc_edges': [list(edge) for edge in pc_edges],
+        'sep_sets': [list(entry) for entry in sep_sets],
+        'anm_method': anm_method,
+        'anm': [[u, v, float(p_f), float(p_b), int(rows)] for (u, v), (p_f, p_b, rows) in anm.items()],
+    })
+
+    report = {
+        'new_rows': new_rows,
+        'total_rows': statistics.n,
+        'tests_rechecked': rechecked,
+        'decisions_flipped': flipped,
+        'skeleton_rerun': skeleton_rerun,
+        'anm_tested': anm_tested,
+        'anm_reused': len(anm) - anm_tested,
+        'runtime_s': time.perf_counter() - start_time,
+    }
+
+    print(f"{'New rows':<20}: {new_rows} (total {statistics.n})")
+    if flipped is not None:
+        print(f"{'Tests re-checked':<20}: {report['tests_rechecked']} ({flipped} crossed alpha)")
+    print(f"{'Skeleton search':<20}: {'re-run' if skeleton_rerun else 'reused'}")
+    if anm_method is not None:
+        print(f"{'ANM edge tests':<20}: {anm_tested} run, {report['anm_reused']} reused")
+
+    return dag, report
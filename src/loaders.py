@@ -1,6 +1,14 @@
 import pandas as pd
 import os
 import glob
+import csv
+import hashlib
+import itertools
+import numpy as np
+from src.ci_tests import SufficientStatistics
+from src.discrete import encode_columns, is_label_column
+from src.defaults import DEFAULT_CHUNK_SIZE, DEFAULT_CACHE_DIR
+from src.metrics import timed
 
 
 def load_tuebingen_pair(folder_path, file_name):
@@ -78,12 +86,157 @@ def get_all_ground_truths(data_folder):
     return ground_truths
 
 
-def load_causal_data(folder_path, filename):
+def load_pair_metadata(data_folder):
+    """
+    Parses 'pairmeta.txt' from the Tuebingen dataset directory.
+
+    Each line reads: number of pair | 1st column of cause | last column of cause |
+    1st column of effect | last column of effect | dataset weight
+
+    Returns a dictionary keyed by pair file name, with 1-based inclusive column ranges:
+    {'pair0001.txt': {'cause': (1, 1), 'effect': (2, 2), 'weight': 0.166}, ...}
+    """
+    meta_path = os.path.join(data_folder, 'pairmeta.txt')
+    metadata = {}
+
+    if not os.path.exists(meta_path):
+        return metadata
+
+    with open(meta_path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) != 6:
+                continue
+
+            number, cause_first, cause_last, effect_first, effect_last, weight = fields
+            metadata[f"pair{number}.txt"] = {
+                'cause': (int(cause_first), int(cause_last)),
+                'effect': (int(effect_first), int(effect_last)),
+                'weight': float(weight),
+            }
+
+    return metadata
+
+
+def get_meta_ground_truth(meta):
+    """
+    Derives the ground truth of a one-dimensional pair from its pairmeta.txt entry.
+    Returns: 'A --> B', 'B --> A', or 'Unknown' for multi-dimensional pairs.
+    """
+    if meta['cause'][0] != meta['cause'][1] or meta['effect'][0] != meta['effect'][1]:
+        return "Unknown"
+
+    return "A --> B" if meta['cause'][0] < meta['effect'][0] else "B --> A"
+
+
+def detect_separator(file_path, n_lines=20):
+    """
+    Sniffs the delimiter from the first lines of a data file.
+
+    Returns:
+        str: ',' or ';' for delimited text, otherwise a whitespace regex so that space- and
+             tab-aligned files (including leading or mixed whitespace) parse with the C engine.
+    """
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        lines = [line for line in itertools.islice(f, n_lines) if line.strip()]
+
+    try:
+        delimiter = csv.Sniffer().sniff(''.join(lines), delimiters=',;\t ').delimiter
+    except csv.Error:
+        delimiter = ' '
+
+    if delimiter in (',', ';'):
+        return delimiter
+    return r'\s+'
+
+
+def sniff_layout(file_path, n_rows=1000):
+    """
+    Determines how a data file has to be parsed, from its first rows only.
+
+    Returns:
+        tuple: (separator, header, usecols) for pd.read_csv. 'header' is None when the first row
+               is numeric data, 'usecols' lists the positions of the columns that are not empty.
+    """
+    separator = detect_separator(file_path)
+    sample = pd.read_csv(file_path, sep=separator, nrows=0)
+
+    # Check if the 'header' columns are actually numeric data.
+    # If all column labels can be converted to numbers, the file likely lacks a header.
+    is_numeric_header = pd.to_numeric(sample.columns, errors='coerce').notnull().all()
+
+    # Intent: We avoid hard coding the 'header' parameter so the loader can dynamically
+    # transition between benchmark datasets (no headers) and synthetic CSV exports (with headers).
+    header = None if is_numeric_header else 0
+
+    # Trailing delimiters (common in the Tuebingen files) produce an empty last column.
+    sample = pd.read_csv(file_path, sep=separator, header=header, nrows=n_rows)
+    usecols = [i for i in range(sample.shape[1]) if sample.iloc[:, i].notna().any()]
+
+    return separator, header, usecols
+
+
+def _cache_file(file_path, cache_dir):
+    """
+    Returns the cache entry of a data file and the prefix shared by all entries of that file.
+
+    The entry name contains the file's modification time and size, so an edited file
+    never matches its old entry.
+    """
+    stat = os.stat(file_path)
+    prefix = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{prefix}-{stat.st_mtime_ns}-{stat.st_size}.npy"), prefix
+
+
+def _read_cache(cache_file):
+    """
+    Maps a cache entry as a DataFrame without copying it.
+
+    The copy-on-write mapping ('c') lets callers modify the DataFrame without touching the file.
+    """
+    values = np.load(cache_file, mmap_mode='c')
+    return pd.DataFrame(values, columns=[chr(65 + i) for i in range(values.shape[1])], copy=False)
+
+
+def _write_cache(df, cache_file, prefix):
+    values = df.to_numpy()
+    if values.dtype == object:
+        return
+
+    cache_dir = os.path.dirname(cache_file)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Entries of earlier versions of the same file are stale now.
+    for stale in glob.glob(os.path.join(cache_dir, f"{prefix}-*.npy")):
+        try:
+            os.remove(stale)
+        except OSError:
+            pass
+
+    # Column-major, so every column is one contiguous slice of the mapped file.
+    # Written under a temporary name first, so a concurrent reader never sees a partial file.
+    temp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(temp_file, 'wb') as f:
+        np.save(f, np.asfortranarray(values))
+    os.replace(temp_file, cache_file)
+
+
+@timed('load')
+def load_causal_data(folder_path, filename, cache_dir=None, dtype=None):
     """
     INTENT: Robustly loads causal data by automatically detecting separators and headers.
     Current data sets have file extension .csv and .txt. This function is file extension agnostic.
     This function is an evolution of the function 'load_tuebingen_pair'. The original function remains
     because we wish to keep the history of this project.
+
+    INTENT: Parsing text is far slower than the analysis of most files. With 'cache_dir' set, the
+    cleaned and relabelled data is stored there as a binary .npy file, keyed by the file's path,
+    modification time and size. Later loads memory-map that file instead of parsing the text again.
+    A cached DataFrame has a fresh RangeIndex and the common dtype of its columns.
+
+    INTENT: With dtype='float32' every column is converted after cleaning (and after reading the
+    cache, which keeps the full-precision values), so the DataFrame and everything computed
+    from it by the float32 mode takes half the memory.
     """
 
     file_path = os.path.join(folder_path, filename)
@@ -92,25 +245,26 @@ def load_causal_data(folder_path, filename):
         print(f"Error: File not found at {file_path}")
         return None
 
+    if cache_dir is not None:
+        cache_file, prefix = _cache_file(file_path, cache_dir)
+        if os.path.exists(cache_file):
+            try:
+                return _as_dtype(_read_cache(cache_file), dtype)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable cache entry for {filename}: {e}")
+
     try:
         # We use the try except construct to avoid code crashes.
         # The logic for testing the different formats that data might be in goes in the try section
         # As far as we can determine upfront the logic should prevent crashes.
 
-        # Use sep=None with engine='python' to automatically detect the delimiter.
-        # We first read just the column names to check if a header row exists.
-        sample = pd.read_csv(file_path, sep=None, engine='python', nrows=0)
-
-        # Check if the 'header' columns are actually numeric data.
-        # If all column labels can be converted to numbers, the file likely lacks a header.
-        is_numeric_header = pd.to_numeric(sample.columns, errors='coerce').notnull().all()
+        # Detect the delimiter and the header row once from the start of the file.
+        separator, header, _ = sniff_layout(file_path)
+        df = pd.read_csv(file_path, sep=separator, header=header)
 
-        # Intent: We avoid hard coding the 'header' parameter so the loader can dynamically
-        # transition between benchmark datasets (no headers) and synthetic CSV exports (with headers).
-        if is_numeric_header:
-            df = pd.read_csv(file_path, sep=None, engine='python', header=None)
-        else:
-            df = pd.read_csv(file_path, sep=None, engine='python')
+        # Trailing delimiters (common in the Tuebingen files) produce an empty last column,
+        # which would otherwise make dropna() below remove every row.
+        df = df.dropna(axis=1, how='all')
 
         # Standardize column names to A, B, C...
         # Intent: This ensures that downstream causal algorithms can reference nodes consistently,
@@ -118,7 +272,143 @@ def load_causal_data(folder_path, filename):
         df.columns = [chr(65 + i) for i in range(df.shape[1])]
 
         # Ensure all data is numeric and remove rows with missing values to prevent statistical test failures.
-        return df.apply(pd.to_numeric, errors='coerce').dropna()
+        # Text columns become integer codes instead of NaN, which would have removed every row
+        # (see src.discrete.encode_columns).
+        df = encode_columns(df).dropna()
+
+    except Exception as e:
+        print(f"An error occurred while loading {filename}: {e}")
+        return None
+
+    if cache_dir is not None:
+        try:
+            _write_cache(df, cache_file, prefix)
+        except OSError as e:
+            print(f"Could not cache {filename}: {e}")
+
+    return _as_dtype(df, dtype)
+
+
+def _as_dtype(df, dtype):
+    return df if dtype is None else df.astype(dtype)
+
+
+def iter_causal_data(folder_path, filename, chunksize=DEFAULT_CHUNK_SIZE, labels=None, counts=None):
+    """
+    Streaming counterpart of load_causal_data.
+
+    INTENT: The separator, header and empty columns are sniffed once from the start of the file,
+    after which the C parser reads the file in chunks of 'chunksize' rows. Only one chunk is in
+    memory at a time, so files larger than RAM can be processed.
+    Unlike load_causal_data this generator does not catch errors, so that a caller never
+    mistakes a partially read file for a complete one.
+
+    INTENT: A chunk only holds part of a text column, so its labels cannot be coded chunk by chunk
+    like encode_columns codes a whole file. 'counts' collects what text_columns needs to find
+    those columns, and collect_labels their labels; with 'labels' they are then read as text and
+    coded by the position of their label, which gives the codes of load_causal_data.
+
+    Args:
+        labels (dict): Sorted labels of the text columns, by column name (see collect_labels).
+        counts (dict): If given, receives for every column [present values, numeric values],
+                       counted before rows with missing values are removed.
+
+    Yields:
+        pd.DataFrame: Numeric chunks with columns A, B, C..., rows with missing values removed.
+    """
+    file_path = os.path.join(folder_path, filename)
+    separator, header, usecols = sniff_layout(file_path)
+    names = [chr(65 + i) for i in range(len(usecols))]
+    labels = labels or {}
+    text_dtype = {usecols[names.index(col)]: str for col in labels}
+
+    with pd.read_csv(file_path, sep=separator, header=header, usecols=usecols, chunksize=chunksize,
+                     dtype=text_dtype or None) as reader:
+        for chunk in reader:
+            chunk.columns = names
+            yield encode_chunk(chunk, labels, counts)
+
+
+def encode_chunk(chunk, labels=None, counts=None, unknown=None):
+    """
+    Converts a chunk read by iter_causal_data (text columns of 'labels' read as str) to numbers.
+
+    Args:
+        labels (dict): Sorted labels of the text columns, by column name (see collect_labels).
+        counts (dict): See iter_causal_data.
+        unknown (set): If given, receives the text columns that hold a label missing from 'labels'
+                       (those rows are removed like any other missing value).
+
+    Returns:
+        pd.DataFrame: The numeric chunk, rows with missing values removed.
+    """
+    numeric = chunk.apply(pd.to_numeric, errors='coerce')
+    if counts is not None:
+        for col in chunk.columns:
+            present, parsed = counts.setdefault(col, [0, 0])
+            counts[col] = [present + int(chunk[col].notna().sum()), parsed + int(numeric[col].notna().sum())]
+    for col, col_labels in (labels or {}).items():
+        codes = pd.Index(col_labels).get_indexer(chunk[col])
+        if unknown is not None and np.any((codes < 0) & chunk[col].notna().to_numpy()):
+            unknown.add(col)
+        numeric[col] = np.where(codes < 0, np.nan, codes)
+    return numeric.dropna()
+
+
+def text_columns(counts):
+    """
+    Returns:
+        list: The columns of iter_causal_data's 'counts' that encode_columns would code as labels.
+    """
+    return [col for col, (present, numeric) in counts.items() if is_label_column(present, numeric)]
+
+
+def collect_labels(folder_path, filename, columns, chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Reads the given columns as text, chunk by chunk, and collects their labels.
+
+    Returns:
+        dict: column -> sorted list of its distinct labels (missing values excluded).
+    """
+    file_path = os.path.join(folder_path, filename)
+    separator, header, usecols = sniff_layout(file_path)
+    names = [chr(65 + i) for i in range(len(usecols))]
+    positions = {usecols[names.index(col)]: col for col in columns}
+
+    labels = {col: set() for col in columns}
+    with pd.read_csv(file_path, sep=separator, header=header, usecols=list(positions), chunksize=chunksize,
+                     dtype={position: str for position in positions}) as reader:
+        for chunk in reader:
+            for position, values in zip(sorted(positions), chunk.columns):
+                labels[positions[position]].update(chunk[values].dropna())
+
+    return {col: sorted(values) for col, values in labels.items()}
+
+
+@timed('load')
+def stream_sufficient_statistics(folder_path, filename, chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Accumulates the sample size, means and covariance of a data file chunk by chunk,
+    without ever holding the whole file in memory.
+
+    Returns:
+        SufficientStatistics: The statistics of all complete rows (see src.ci_tests),
+                              or None if the file is missing or cannot be parsed.
+    """
+    file_path = os.path.join(folder_path, filename)
+
+    if not os.path.exists(file_path):
+        print(f"Error: File not found at {file_path}")
+        return None
+
+    try:
+        statistics = None
+        for chunk in iter_causal_data(folder_path, filename, chunksize=chunksize):
+            if statistics is None:
+                statistics = SufficientStatistics(chunk.columns)
+            statistics.update(chunk)
+
+        return statistics
 
     except Exception as e:
         print(f"An error occurred while loading {filename}: {e}")
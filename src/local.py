@@ -0,0 +1,211 @@
+from itertools import combinations
+import networkx as nx
+from src.ci_tests import SufficientStatistics
+from src.causality import orient_edges
+from src.matrix import as_statistics
+from src.metrics import timed
+from src.refinement import run_edge_tests, apply_edge_directions
+from src.stable_pc import resolve_ci_test
+from src.sweep import PValueCache
+
+
+# ==========================================
+# Local Structure Around a Target ('python main.py --target C')
+# ==========================================
+#
+# INTENT: When only the causes and effects of one column matter, the global PC still tests every
+# pair of columns and the ANM stage fits every edge of the graph. This mode follows the local
+# algorithms MMPC and MMMB (Tsamardinos et al., 2003/2006; HITON, Aliferis et al., 2003):
+#
+#   - mmpc() grows the candidate parents/children of the target one variable at a time (always
+#     the one most strongly associated given every subset of the current candidates), drops a
+#     variable as soon as one subset separates it, then removes false positives backwards.
+#   - A variable is a neighbour only if the relation holds both ways (the target is also in its
+#     own candidate set), so mmpc() runs once more for every candidate neighbour.
+#   - The spouses (other parents of the target's children) are the neighbours of those neighbours
+#     that are dependent on the target given their separating set plus the common child.
+#
+# Only the target, its neighbours and their neighbours are ever used as test variables, so the
+# cost grows with the size of that neighbourhood instead of with the square of the number of
+# columns. The small graph over the Markov blanket is oriented like the manual PC
+# (orient_edges), and the ANM stage only tests the edges that touch the target.
+#
+# On finite samples the two searches can disagree: a true neighbour that some transient
+# candidate set happens to separate is lost here, while the global PC may keep it (and the
+# other way round).
+
+
+def _p_value(test, x, y, cond):
+    return test.result(x, y, cond)[1]
+
+
+def mmpc(test, columns, target, alpha=0.05, max_depth=None, sep_sets=None):
+    """
+    Max-Min Parents and Children: the candidate neighbours of 'target'.
+
+    Args:
+        test (PValueCache): The CI test (see src.sweep), so repeated tests are computed once.
+        columns (list): All variables.
+        target (str): The variable whose neighbours are searched.
+        alpha (float): Significance level of the tests.
+        max_depth (int): Largest conditioning set to try (None: no limit).
+        sep_sets (dict): Optional dict that receives the separating set of every variable
+                         found independent of the target, keyed by frozenset({target, x}).
+
+    Returns:
+        list: The candidate parents and children of 'target', in the order they were added.
+    """
+    max_depth = len(columns) if max_depth is None else max_depth
+    sep_sets = {} if sep_sets is None else sep_sets
+
+    # Association of each remaining candidate: the largest p-value over the subsets tested so
+    # far (a small maximum means that no subset of the current candidates separates it).
+    remaining = {x: _p_value(test, target, x, ()) for x in columns if x != target}
+    cpc = []
+
+    def separate(x, cond):
+        sep_sets.setdefault(frozenset((target, x)), set(cond))
+
+    for x in [x for x, p_value in remaining.items() if p_value >= alpha]:
+        separate(x, ())
+        del remaining[x]
+
+    # Forward phase: only the subsets that contain the newest candidate are new.
+    while remaining:
+        best = min(remaining, key=lambda x: (remaining[x], x))
+        cpc.append(best)
+        del remaining[best]
+
+        new_sets = [others + (best,) for depth in range(min(len(cpc), max_depth))
+                    for others in combinations(cpc[:-1], depth)]
+        for x in sorted(remaining):
+            for cond in new_sets:
+                remaining[x] = max(remaining[x], _p_value(test, target, x, cond))
+                if remaining[x] >= alpha:
+                    separate(x, cond)
+                    del remaining[x]
+                    break
+
+    # Backward phase: a candidate added early may be separated by candidates added after it.
+    for x in list(cpc):
+        others = [y for y in cpc if y != x]
+        for depth in range(1, min(len(others), max_depth) + 1):
+            cond = next((cond for cond in combinations(others, depth)
+                         if _p_value(test, target, x, cond) >= alpha), None)
+            if cond is not None:
+                separate(x, cond)
+                cpc.remove(x)
+                break
+
+    return cpc
+
+
+@timed('local')
+def discover_local_structure(data, target, alpha=0.05, test_name='pearsonr', max_depth=None):
+    """
+    Finds the parents, children and spouses of one variable without learning the whole graph.
+
+    Args:
+        data (pd.DataFrame | SufficientStatistics | ColumnMatrix): The data, its streamed sufficient
+                         statistics, or a memory-mapped matrix (see src.matrix). The last two always
+                         use 'cached_pearsonr'.
+        target (str): The column whose neighbourhood is searched.
+        alpha (float): Significance level of the tests.
+        test_name (str): See src.stable_pc.resolve_ci_test.
+        max_depth (int): Largest conditioning set to try (None: no limit).
+
+    Returns:
+        dict: 'dag' (nx.DiGraph over the target and its Markov blanket, oriented like the manual
+              PC), 'neighbors' (parents and children), 'spouses' (the other parents of its
+              children) and 'tests' (CI tests computed). None if the target is not a column or
+              the tests fail.
+    """
+    data = as_statistics(data)
+    columns = list(data.columns)
+    if target not in columns:
+        print(f"Error: '{target}' is not a column. Columns: {', '.join(map(str, columns))}")
+        return None
+
+    try:
+        return _discover_local_structure(data, columns, target, alpha, test_name, max_depth)
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return None
+
+
+def _discover_local_structure(data, columns, target, alpha, test_name, max_depth):
+    """
+    discover_local_structure after the checks of its arguments.
+    """
+    test = PValueCache(resolve_ci_test(test_name, data), None if isinstance(data, SufficientStatistics) else data)
+    sep_sets = {}
+
+    candidates = {target: mmpc(test, columns, target, alpha=alpha, max_depth=max_depth, sep_sets=sep_sets)}
+    for y in candidates[target]:
+        candidates[y] = mmpc(test, columns, y, alpha=alpha, max_depth=max_depth, sep_sets=sep_sets)
+
+    # Symmetry correction: a parent or child of the target has the target among its candidates.
+    neighbors = sorted(y for y in candidates[target] if target in candidates[y])
+
+    spouses = set()
+    for y in neighbors:
+        for x in candidates[y]:
+            if x == target or x in neighbors or x in spouses:
+                continue
+            sep_set = sep_sets.get(frozenset((target, x)))
+            # A common child that is not in the separating set makes x and the target dependent again.
+            if sep_set is not None and y not in sep_set and _p_value(test, target, x, sep_set | {y}) < alpha:
+                spouses.add(x)
+
+    nodes = [target] + neighbors + sorted(spouses)
+    skeleton = nx.Graph()
+    skeleton.add_nodes_from(nodes)
+    skeleton.add_edges_from((target, y) for y in neighbors)
+    for y in neighbors:
+        # Between two neighbours both candidate sets are known, so the relation must hold both ways.
+        skeleton.add_edges_from((y, x) for x in candidates[y] if x != target and x in skeleton
+                                and (x not in candidates or y in candidates[x]))
+
+    return {'dag': orient_edges(skeleton, sep_sets), 'neighbors': neighbors, 'spouses': sorted(spouses),
+            'tests': test.computed}
+
+
+def target_edges(dag, target):
+    """
+    Returns:
+        list: The edges of the DAG that touch 'target', in the DAG's edge order.
+    """
+    return [(u, v) for u, v in dag.edges() if target in (u, v)]
+
+
+def refine_target_edges(df, dag, target, alpha=0.05, method='gp', jobs=1, adaptive=False, confidence=0.9):
+    """
+    Re-orients the edges that touch 'target' according to the ANM direction test (see
+    src.refinement.refine_edges_anm). The edges between its neighbours and spouses are not tested.
+
+    Returns:
+        nx.DiGraph: The same graph object, with reversed edges where ANM disagrees.
+    """
+    edges = target_edges(dag, target)
+    results = run_edge_tests(df, edges, alpha=alpha, method=method, jobs=jobs, adaptive=adaptive,
+                             confidence=confidence)
+
+    return apply_edge_directions(dag, edges, results)
+
+
+def format_local_structure(dag, target, spouses):
+    """
+    Returns:
+        str: The parents, children, spouses and Markov blanket of 'target' in the DAG, one per line.
+    """
+    parents = sorted(dag.predecessors(target))
+    children = sorted(dag.successors(target))
+    blanket = sorted(set(parents) | set(children) | set(spouses))
+
+    def names(nodes):
+        return ", ".join(map(str, nodes)) if nodes else "(none)"
+
+    return "\n".join([f"Parents of {target}: {names(parents)}",
+                      f"Children of {target}: {names(children)}",
+                      f"Spouses of {target}: {names(sorted(spouses))}",
+                      f"Markov blanket of {target}: {names(blanket)}"])
@@ -0,0 +1,248 @@
+import atexit
+import glob
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from src.ci_tests import SufficientStatistics
+from src.loaders import DEFAULT_CHUNK_SIZE, iter_causal_data, text_columns, collect_labels, _cache_file
+from src.metrics import timed
+
+
+# ==========================================
+# Memory-Mapped Data Matrices ('python main.py --mmap')
+# ==========================================
+#
+# INTENT: Both discovery paths used to need the whole dataset as a pandas DataFrame, so a file
+# of tens of GB needed as much RAM (and pandas' copies on top). A ColumnMatrix is a numeric
+# 2-D array, usually a read-only np.memmap of a column-major .npy file, with column names:
+#
+#   - PC only needs the covariance matrix, accumulated in blocked passes over the rows
+#     (ColumnMatrix.statistics), so at most one block of rows is in memory at a time.
+#   - The ANM stage reads the two columns of an edge as views (matrix[[u, v]]); in a
+#     column-major file each column is one contiguous slice, so only those pages are read.
+#   - Pool workers map the file themselves instead of receiving a copy in shared memory.
+#
+# Text files are converted once, chunk by chunk, into such a .npy file (convert_to_matrix):
+# the chunks are appended row-major to a temporary file, then transposed block by block into
+# the column-major result, so neither step holds more than one chunk. Text columns are coded
+# like load_causal_data codes them; since that needs every label of the column, a file that has
+# them is read twice more (once for the labels, once for the rows), while numeric files are
+# still read once.
+
+# Bytes of rows materialized at once by the blocked passes.
+DEFAULT_BLOCK_BYTES = 64 * 2 ** 20
+
+
+class ColumnMatrix:
+    """
+    A numeric 2-D array (np.ndarray or np.memmap) with column names, indexed like a DataFrame.
+
+    Selecting columns (matrix[['A', 'B']]) returns another ColumnMatrix over the same array,
+    so nothing is copied until the values are read.
+    """
+
+    def __init__(self, values, columns=None, positions=None, path=None):
+        """
+        Args:
+            values (np.ndarray): The 2-D array, rows x columns.
+            columns (list): Column names (default: A, B, C..., as load_causal_data names them).
+            positions (list): Positions of the named columns in 'values' (default: all, in order).
+            path (str): The .npy file 'values' is mapped from, so worker processes can map it too.
+        """
+        if values.ndim != 2:
+            raise ValueError(f"Expected a 2-D array, got {values.ndim} dimensions.")
+
+        self.values = values
+        self.positions = list(range(values.shape[1])) if positions is None else list(positions)
+        self.columns = [chr(65 + i) for i in range(len(self.positions))] if columns is None else list(columns)
+        self.path = path
+        self._index = dict(zip(self.columns, self.positions))
+
+        if len(self.columns) != len(self.positions):
+            raise ValueError(f"{len(self.columns)} column names for {len(self.positions)} columns.")
+
+    @property
+    def shape(self):
+        return self.values.shape[0], len(self.columns)
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    def __len__(self):
+        return self.values.shape[0]
+
+    def __getitem__(self, key):
+        """
+        Returns:
+            np.ndarray | ColumnMatrix: The values of one column (a view), or a ColumnMatrix
+                                       over a list of columns.
+        """
+        if isinstance(key, (list, tuple)):
+            return ColumnMatrix(self.values, key, [self._index[col] for col in key], self.path)
+        return self.values[:, self._index[key]]
+
+    def block_rows(self, block_bytes=DEFAULT_BLOCK_BYTES):
+        return max(1, block_bytes // max(1, len(self.columns) * self.values.dtype.itemsize))
+
+    def iter_blocks(self, block_rows=None):
+        """
+        Yields:
+            np.ndarray: Consecutive blocks of rows (copies, columns in the order of 'columns').
+        """
+        block_rows = block_rows or self.block_rows()
+        contiguous = self.positions == list(range(self.values.shape[1]))
+        for start in range(0, len(self), block_rows):
+            block = self.values[start:start + block_rows]
+            yield np.array(block) if contiguous else block[:, self.positions]
+
+    def statistics(self, block_rows=None):
+        """
+        Returns:
+            SufficientStatistics: Sample size, means and covariance, accumulated block by block
+                                  (in float64, whatever the dtype of the file).
+        """
+        statistics = SufficientStatistics(self.columns)
+        for block in self.iter_blocks(block_rows):
+            statistics.update(block)
+        return statistics
+
+    def take(self, rows):
+        """
+        Returns:
+            pd.DataFrame: The given rows (positions), in memory.
+        """
+        return pd.DataFrame(self.values[np.asarray(rows)][:, self.positions], columns=self.columns)
+
+    def to_frame(self):
+        """
+        Returns:
+            pd.DataFrame: All the data in memory (only for matrices that fit).
+        """
+        return pd.DataFrame(self.values[:, self.positions], columns=self.columns)
+
+
+def as_statistics(data):
+    """
+    Returns the SufficientStatistics of a ColumnMatrix (computed in blocks), and any other data unchanged.
+    """
+    return data.statistics() if isinstance(data, ColumnMatrix) else data
+
+
+def open_matrix(path, columns=None):
+    """
+    Maps a 2-D .npy file read-only.
+
+    Returns:
+        ColumnMatrix: The matrix, or None if the file is missing or not a 2-D numeric array.
+    """
+    if not os.path.exists(path):
+        print(f"Error: File not found at {path}")
+        return None
+
+    try:
+        values = np.load(path, mmap_mode='r')
+    except (OSError, ValueError) as e:
+        print(f"An error occurred while mapping {path}: {e}")
+        return None
+
+    if values.ndim != 2 or not np.issubdtype(values.dtype, np.number):
+        print(f"Error: {path} is not a 2-D numeric array.")
+        return None
+
+    return ColumnMatrix(values, columns, path=path)
+
+
+@timed('load')
+def convert_to_matrix(folder_path, filename, output_path, dtype=np.float64, chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Converts a text data file into a column-major .npy file, holding one chunk in memory at a time.
+    Columns and rows are cleaned, and text columns coded, like load_causal_data does.
+
+    Returns:
+        str: 'output_path'.
+    """
+    temp_rows = f"{output_path}.{os.getpid()}.rows"
+    temp_output = f"{output_path}.{os.getpid()}.tmp"
+
+    def write_rows(labels=None, counts=None):
+        n_rows, n_cols = 0, None
+        with open(temp_rows, 'wb') as f:
+            for chunk in iter_causal_data(folder_path, filename, chunksize=chunksize, labels=labels, counts=counts):
+                n_cols = chunk.shape[1]
+                np.ascontiguousarray(chunk.to_numpy(dtype=dtype)).tofile(f)
+                n_rows += len(chunk)
+        return n_rows, n_cols
+
+    try:
+        counts = {}
+        n_rows, n_cols = write_rows(counts=counts)
+        # The rows of a file with text columns were written without them (their labels are
+        # missing values as numbers), so they are written again with the labels coded.
+        text = text_columns(counts)
+        if text:
+            n_rows, n_cols = write_rows(labels=collect_labels(folder_path, filename, text, chunksize=chunksize))
+
+        if not n_rows:
+            raise ValueError(f"{filename} has no complete numeric rows.")
+
+        rows = np.memmap(temp_rows, dtype=dtype, mode='r', shape=(n_rows, n_cols))
+        output = np.lib.format.open_memmap(temp_output, mode='w+', dtype=dtype, shape=(n_rows, n_cols),
+                                           fortran_order=True)
+        block_rows = max(1, DEFAULT_BLOCK_BYTES // (n_cols * np.dtype(dtype).itemsize))
+        for start in range(0, n_rows, block_rows):
+            output[start:start + block_rows] = rows[start:start + block_rows]
+        output.flush()
+        del output, rows
+
+        # Written under a temporary name first, so a concurrent reader never maps a partial file.
+        os.replace(temp_output, output_path)
+    finally:
+        for temp in (temp_rows, temp_output):
+            if os.path.exists(temp):
+                os.remove(temp)
+
+    return output_path
+
+
+def load_matrix(folder_path, filename, cache_dir, dtype=np.float64, chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Maps a data file as a ColumnMatrix. A .npy file is mapped as it is; a text file is converted
+    into '<cache_dir>/mmap' once (keyed by its path, modification time and size, like the load
+    cache of src.loaders) and the conversion is mapped. With cache_dir=None the conversion goes
+    to a temporary directory that is removed when the process exits (worker processes map the
+    file by its path, so it must outlive this call).
+
+    Returns:
+        ColumnMatrix: The matrix, or None if the file is missing or cannot be parsed.
+    """
+    file_path = os.path.join(folder_path, filename)
+    if filename.lower().endswith('.npy'):
+        return open_matrix(file_path)
+
+    if not os.path.exists(file_path):
+        print(f"Error: File not found at {file_path}")
+        return None
+
+    if cache_dir is None:
+        cache_dir = tempfile.mkdtemp(prefix='psee-mmap-')
+        atexit.register(shutil.rmtree, cache_dir, ignore_errors=True)
+
+    entry, prefix = _cache_file(file_path, os.path.join(cache_dir, 'mmap'))
+    suffix = f"-{np.dtype(dtype).name}.npy"
+    entry = os.path.splitext(entry)[0] + suffix
+    if not os.path.exists(entry):
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        # Conversions of earlier versions of the same file are stale now.
+        for stale in glob.glob(os.path.join(os.path.dirname(entry), f"{prefix}-*{suffix}")):
+            os.remove(stale)
+        print(f"Converting {filename} into a memory-mapped matrix ({entry})...")
+        try:
+            convert_to_matrix(folder_path, filename, entry, dtype=dtype, chunksize=chunksize)
+        except Exception as e:
+            print(f"An error occurred while converting {filename}: {e}")
+            return None
+
+    return open_matrix(entry)
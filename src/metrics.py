@@ -0,0 +1,137 @@
+import functools
+import json
+import os
+import time
+from contextlib import contextmanager
+
+
+# ==========================================
+# Pipeline Metrics ('python main.py --metrics text|json')
+# ==========================================
+#
+# INTENT: The pipeline only printed what it was doing, not where the time went. The loaders,
+# the PC implementations, the ANM refinement and the plotting functions record their wall and
+# CPU time here as named phases (with the 'phase' context manager or the 'timed' decorator),
+# together with the number of CI tests per conditioning depth and the size of every ANM fit.
+# Recording is cheap, so it is always on; main.py only decides whether to report it.
+#
+# Phases can be nested ('pc' contains 'pc.skeleton'), so the phase times do not add up to
+# the runtime. CPU time includes worker processes once they have exited (e.g. the ANM pool).
+
+
+def _cpu_seconds():
+    # process_time() is precise but ignores child processes, whose time os.times() only
+    # reports (at a coarser resolution) after they have been waited for.
+    times = os.times()
+    return time.process_time() + times.children_user + times.children_system
+
+
+class PipelineMetrics:
+    """
+    Collects phase timings, CI-test counts and ANM fit sizes of one run.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.phases = {}
+        self.ci_tests = {}
+        self.anm_fits = []
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Context manager that adds the wall and CPU time of its body to the phase 'name'.
+        """
+        wall_start, cpu_start = time.perf_counter(), _cpu_seconds()
+        try:
+            yield
+        finally:
+            entry = self.phases.setdefault(name, {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0})
+            entry['calls'] += 1
+            entry['wall_s'] += time.perf_counter() - wall_start
+            entry['cpu_s'] += _cpu_seconds() - cpu_start
+
+    def timed(self, name):
+        """
+        Decorator form of 'phase': every call of the function is recorded under 'name'.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.phase(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count_ci_tests(self, depth, count=1, wall_s=0.0):
+        """
+        Records 'count' CI tests conditioned on 'depth' variables, which took 'wall_s' seconds.
+        """
+        entry = self.ci_tests.setdefault(int(depth), {'count': 0, 'wall_s': 0.0})
+        entry['count'] += int(count)
+        entry['wall_s'] += wall_s
+
+    def record_anm_fit(self, edge, n_rows, method, wall_s):
+        """
+        Records one ANM direction test (one fit in each direction) on 'n_rows' rows.
+        """
+        self.anm_fits.append({'edge': f"{edge[0]}->{edge[1]}", 'rows': int(n_rows),
+                              'method': method, 'wall_s': wall_s})
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: Every metric as plain JSON types (depths become string keys).
+        """
+        return {
+            'total_wall_s': time.perf_counter() - self._start,
+            'phases': {name: dict(entry) for name, entry in self.phases.items()},
+            'ci_tests': {
+                'total': sum(entry['count'] for entry in self.ci_tests.values()),
+                'by_depth': {str(depth): dict(self.ci_tests[depth]) for depth in sorted(self.ci_tests)},
+            },
+            'anm_fits': {
+                'count': len(self.anm_fits),
+                'total_rows': sum(fit['rows'] for fit in self.anm_fits),
+                'fits': list(self.anm_fits),
+            },
+        }
+
+    def to_json(self, indent=None):
+        return json.dumps(self.as_dict(), indent=indent)
+
+    def report(self):
+        """
+        Returns:
+            str: A human-readable summary, ready to print.
+        """
+        metrics = self.as_dict()
+        lines = [f"\n--- Pipeline metrics: {metrics['total_wall_s']:.2f}s ---"]
+
+        for name, entry in metrics['phases'].items():
+            lines.append(f"{name:<20}: {entry['wall_s']:.3f}s wall, {entry['cpu_s']:.3f}s CPU "
+                         f"({entry['calls']} call{'s' if entry['calls'] != 1 else ''})")
+
+        if metrics['ci_tests']['total']:
+            per_depth = ", ".join(f"depth {depth}: {entry['count']}"
+                                  for depth, entry in metrics['ci_tests']['by_depth'].items())
+            lines.append(f"{'CI tests':<20}: {metrics['ci_tests']['total']} ({per_depth})")
+
+        if metrics['anm_fits']['count']:
+            sizes = [fit['rows'] for fit in self.anm_fits]
+            lines.append(f"{'ANM fits':<20}: {len(sizes)} on {min(sizes)}-{max(sizes)} rows")
+
+        return "\n".join(lines)
+
+
+# The metrics of the current process. Worker processes have their own instance, which is
+# discarded, so results computed in pools are recorded by the parent (see src.refinement).
+METRICS = PipelineMetrics()
+
+phase = METRICS.phase
+timed = METRICS.timed
+count_ci_tests = METRICS.count_ci_tests
+record_anm_fit = METRICS.record_anm_fit
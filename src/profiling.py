@@ -0,0 +1,124 @@
+import sys
+import time
+
+
+# ==========================================
+# Import Profiling ('python main.py --profile-import')
+# ==========================================
+#
+# INTENT: Short runs spend most of their time importing libraries. The profiler times every
+# module that is imported while it is active, so a regression (e.g. a heavy library imported at
+# module level again) shows up as a line in the report instead of as a vague slowdown.
+# It works like 'python -X importtime', but can be switched on from the command line of main.py
+# and groups the result by top-level package.
+
+
+class _TimingFinder:
+    """
+    Meta path finder that finds nothing itself: it asks the other finders for the module spec
+    and wraps the loader of that spec, so the module's execution is timed.
+    """
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        self.profiler._wrap_loader(name, spec.loader)
+        return spec
+
+
+class ImportProfiler:
+    """
+    Measures how long each module takes to import while the profiler is active.
+
+    'self_times' excludes the time spent importing other modules from within the module,
+    'total_times' includes it (like the two columns of 'python -X importtime').
+    """
+
+    def __init__(self):
+        self.self_times = {}
+        self.total_times = {}
+        self.active = False
+        self._stack = []
+        self._finder = _TimingFinder(self)
+
+    def start(self):
+        """
+        Returns:
+            ImportProfiler: self, so the profiler can be created and started in one line.
+        """
+        if not self.active:
+            sys.meta_path.insert(0, self._finder)
+            self.active = True
+        return self
+
+    def stop(self):
+        if self.active:
+            sys.meta_path.remove(self._finder)
+            self.active = False
+        return self
+
+    def _wrap_loader(self, name, loader):
+        # Built-in and frozen modules use classes as loaders; patching those would affect every
+        # later import of such modules, and they are fast anyway.
+        if loader is None or isinstance(loader, type) or not hasattr(loader, 'exec_module'):
+            return
+
+        exec_module = loader.exec_module
+
+        def timed_exec_module(module):
+            if not self.active:
+                return exec_module(module)
+
+            self._stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return exec_module(module)
+            finally:
+                elapsed = time.perf_counter() - start
+                nested = self._stack.pop()
+                self.total_times[name] = elapsed
+                self.self_times[name] = elapsed - nested
+                if self._stack:
+                    self._stack[-1] += elapsed
+
+        try:
+            loader.exec_module = timed_exec_module
+        except AttributeError:
+            pass
+
+    def by_package(self):
+        """
+        Returns:
+            dict: Import time in seconds per top-level package, sorted from slowest to fastest.
+        """
+        totals = {}
+        for name, seconds in self.self_times.items():
+            package = name.partition('.')[0]
+            totals[package] = totals.get(package, 0.0) + seconds
+
+        return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+    def report(self, top=15):
+        """
+        Returns:
+            str: The 'top' slowest packages and the total import time, ready to print.
+        """
+        packages = self.by_package()
+        total = sum(packages.values())
+
+        lines = [f"\n--- Import profile: {total:.2f}s importing {len(self.self_times)} modules ---"]
+        for package, seconds in list(packages.items())[:top]:
+            lines.append(f"{package:<20}: {seconds:.3f}s ({seconds / total * 100 if total else 0:.0f}%)")
+
+        return "\n".join(lines)
@@ -0,0 +1,219 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from threadpoolctl import threadpool_limits
+from src.causality import check_causal_direction_anm, check_causal_direction_anm_adaptive
+from src.matrix import ColumnMatrix
+from src.metrics import timed, record_anm_fit
+
+
+# ==========================================
+# Phase 2: Direction Refinement (Hybrid ANM)
+# ==========================================
+#
+# INTENT: Every ANM edge test is independent and CPU-bound, so the tests are spread over
+# a process pool. The data is copied once into a shared memory block and every worker
+# maps it as a NumPy array, so the DataFrame columns are never pickled per task.
+
+# Per-worker view of the shared data, set by _attach_shared_data.
+_worker_data = {}
+
+# First element of the spec of a memory-mapped file, in place of a shared memory block name.
+MAPPED_FILE = 'file'
+
+
+def share_dataframe(df):
+    """
+    Copies the numeric values of a DataFrame into a new shared memory block.
+
+    The block is laid out column-major (Fortran order), so each column is one contiguous slice.
+
+    A ColumnMatrix mapped from a file (see src.matrix) is not copied: every worker maps the same
+    file, whose pages the operating system shares between the processes.
+
+    Returns:
+        tuple: (SharedMemory, spec) where spec = (name, shape, dtype string, column names)
+               is everything a worker needs to attach the block. The caller owns the block
+               and must close() and unlink() it. For a mapped file the block is None.
+    """
+    if isinstance(df, ColumnMatrix) and df.path is not None:
+        return None, (MAPPED_FILE, df.path, df.positions, df.columns)
+
+    values = df.to_numpy()
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    shared = np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf, order='F')
+    shared[:] = values
+
+    spec = (shm.name, values.shape, values.dtype.str, list(df.columns))
+    return shm, spec
+
+
+def attach_shared_data(spec):
+    """
+    Maps a block created by share_dataframe into this process.
+
+    Returns:
+        tuple: (SharedMemory, np.ndarray, column names). The array is a zero-copy view
+               (for a mapped file, a read-only np.memmap and no SharedMemory).
+    """
+    name, shape, dtype, columns = spec
+    if name == MAPPED_FILE:
+        path, positions = shape, dtype
+        values = np.load(path, mmap_mode='r')
+        if positions != list(range(values.shape[1])):
+            values = values[:, positions]
+        return None, values, columns
+
+    shm = shared_memory.SharedMemory(name=name)
+    values = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, order='F')
+    return shm, values, columns
+
+
+def _attach_shared_data(spec, blas_threads):
+    """
+    Pool initializer: attaches the shared block once per worker instead of once per task.
+    """
+    # The GP fits use multithreaded BLAS; without a limit every worker would try to use
+    # every core and the pool would be slower than the sequential loop.
+    _worker_data['limits'] = threadpool_limits(limits=blas_threads)
+
+    shm, values, columns = attach_shared_data(spec)
+    _worker_data['shm'] = shm
+    _worker_data['values'] = values
+    _worker_data['index'] = {col: i for i, col in enumerate(columns)}
+
+
+def _edge_pair(df, u, v):
+    """
+    The two columns of an edge without copying them: df[[u, v]] of a DataFrame copies the pair
+    for every edge, while a DataFrame over the column arrays shares their memory.
+    """
+    if isinstance(df, ColumnMatrix):
+        return df[[u, v]]
+    return pd.DataFrame({u: df[u].to_numpy(), v: df[v].to_numpy()}, copy=False)
+
+
+def _timed_edge_test(pair_df, alpha, method, adaptive, confidence):
+    """
+    Returns:
+        tuple: ((direction, p_forward, p_backward), rows per fit, seconds)
+    """
+    start = time.perf_counter()
+    if adaptive:
+        direction, p_forward, p_backward, n_used = check_causal_direction_anm_adaptive(
+            pair_df, alpha=alpha, method=method, confidence=confidence)
+    else:
+        direction, p_forward, p_backward = check_causal_direction_anm(df=pair_df, alpha=alpha, method=method)
+        n_used = len(pair_df)
+
+    return (direction, p_forward, p_backward), n_used, time.perf_counter() - start
+
+
+def _run_edge_test_shared(task):
+    u, v, alpha, method, adaptive, confidence = task
+    values, index = _worker_data['values'], _worker_data['index']
+    pair_df = pd.DataFrame({u: values[:, index[u]], v: values[:, index[v]]}, copy=False)
+
+    return _timed_edge_test(pair_df, alpha, method, adaptive, confidence)
+
+
+@timed('anm')
+def run_timed_edge_tests(df, edges, alpha=0.05, method='gp', jobs=1, adaptive=False, confidence=0.9):
+    """
+    run_edge_tests with the cost of every test: each edge also reports the rows per fit and the
+    seconds it took (e.g. for src.store).
+
+    Returns:
+        list: One ((direction, p_forward, p_backward), rows per fit, seconds) tuple per edge.
+    """
+    edges = list(edges)
+    if not edges:
+        return []
+
+    if jobs <= 1 or len(edges) == 1:
+        timed_results = [_timed_edge_test(_edge_pair(df, u, v), alpha, method, adaptive, confidence)
+                         for u, v in edges]
+    else:
+        workers = min(jobs, len(edges))
+        blas_threads = max(1, (os.cpu_count() or 1) // workers)
+
+        shm, spec = share_dataframe(df)
+        try:
+            tasks = [(u, v, alpha, method, adaptive, confidence) for u, v in edges]
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=_attach_shared_data,
+                                     initargs=(spec, blas_threads)) as pool:
+                # map() yields results in task order, whatever order the workers finish in.
+                timed_results = list(pool.map(_run_edge_test_shared, tasks))
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    # Workers return their fit sizes and times, so the fits are recorded here in the parent process.
+    for edge, (_, n_used, wall_s) in zip(edges, timed_results):
+        record_anm_fit(edge, n_used, method, wall_s)
+
+    return timed_results
+
+
+def run_edge_tests(df, edges, alpha=0.05, method='gp', jobs=1, adaptive=False, confidence=0.9):
+    """
+    Runs the ANM direction test on every edge.
+
+    Args:
+        df (pd.DataFrame): The full dataset.
+        edges (list): (u, v) tuples of column names, e.g. list(dag.edges()).
+        alpha (float): Significance level for the ANM tests.
+        method (str): ANM backend, see check_causal_direction_anm.
+        jobs (int): Number of worker processes. 1 runs everything in this process.
+        adaptive (bool): Use check_causal_direction_anm_adaptive, which fits on growing random
+                         subsamples and stops once the direction is stable at 'confidence'.
+        confidence (float): Confidence of the adaptive mode.
+
+    Returns:
+        list: One (direction, p_forward, p_backward) tuple per edge, in the order of 'edges'.
+    """
+    timed_results = run_timed_edge_tests(df, edges, alpha=alpha, method=method, jobs=jobs,
+                                         adaptive=adaptive, confidence=confidence)
+    return [result for result, _, _ in timed_results]
+
+
+def refine_edges_anm(df, dag, alpha=0.05, method='gp', jobs=1, adaptive=False, confidence=0.9):
+    """
+    Re-orients every edge of the DAG according to the ANM direction test.
+
+    The tests run in parallel, but the flips are applied afterwards in the original
+    edge order, so the resulting graph does not depend on 'jobs'.
+
+    Returns:
+        nx.DiGraph: The same graph object, with reversed edges where ANM disagrees.
+    """
+    current_edges = list(dag.edges())
+    results = run_edge_tests(df, current_edges, alpha=alpha, method=method, jobs=jobs,
+                             adaptive=adaptive, confidence=confidence)
+
+    return apply_edge_directions(dag, current_edges, results)
+
+
+def apply_edge_directions(dag, edges, results):
+    """
+    Applies ANM verdicts (as returned by run_edge_tests) to the DAG, in the order of 'edges'.
+
+    Returns:
+        nx.DiGraph: The same graph object, with reversed edges where ANM disagrees.
+    """
+    for (u, v), (direction, _, _) in zip(edges, results):
+        # If ANM evidence suggests the reverse of the PC orientation, we flip it.
+        # This correction is what allows the 'Fork' data to be correctly visualized.
+        if direction == "B --> A":  # 'B' represents the second node in the pair (v)
+            print(f"  [ANM Correction] Reversing edge {u}->{v} to {v}->{u}")
+            dag.remove_edge(u, v)
+            dag.add_edge(v, u)
+        else:
+            print(f"  [ANM Confirmed] Direction: {u}->{v}")
+
+    return dag
@@ -0,0 +1,229 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+import networkx as nx
+import pandas as pd
+from threadpoolctl import threadpool_limits
+from src.ci_tests import SufficientStatistics, PartialCorrelationTest
+from src.causality import orient_edges
+from src.discrete import ContingencyTest, parse_contingency_name
+from src.kernel_ci import KernelCITest, parse_kci_name
+from src.matrix import as_statistics
+from src.metrics import timed, count_ci_tests
+from src.refinement import share_dataframe, attach_shared_data
+
+
+# ==========================================
+# Stable PC with any CI test, in parallel ('python main.py --pc-variant stable')
+# ==========================================
+#
+# INTENT: pgmpy's PC tests one edge after the other and removes an edge as soon as a test
+# accepts independence, so later tests condition on neighbourhoods that depend on the order of
+# the columns. This variant follows the order-independent 'stable' PC (Colombo & Maathuis, 2014):
+# the adjacency sets are frozen at the start of each conditioning depth, every edge of that depth
+# is tested against the frozen sets, and edges are only removed once all tests are done. Because
+# the edge tests of a depth no longer depend on each other, they run concurrently in a process
+# pool. The data is shared with the workers once, as in the ANM refinement (src.refinement).
+#
+# The native run_pc_algo_manual is the same algorithm with batched Fisher-z tests; this module
+# exists for the tests that cannot be batched ('pearsonr', 'chi_square', 'g_sq', ...).
+
+# Per-worker CI test and data, set by _init_worker.
+_worker_state = {}
+
+
+def resolve_ci_test(test_name, data):
+    """
+    Returns a callable with pgmpy's CI-test signature for a test name.
+
+    Args:
+        test_name (str | callable): 'cached_pearsonr', 'fisher-z', a kernel test name ('kci', see
+                         src.kernel_ci), a contingency test name ('chi_square', 'g_sq', see
+                         src.discrete), or the name of a test in pgmpy.estimators.CITests.
+                         A callable (e.g. src.sweep.PValueCache) is returned as it is.
+        data (pd.DataFrame | SufficientStatistics): The data the test will run on.
+    """
+    if callable(test_name):
+        return test_name
+
+    if parse_kci_name(test_name) is not None and not isinstance(data, SufficientStatistics):
+        return KernelCITest.from_name(test_name, data)
+
+    if parse_contingency_name(test_name) is not None and not isinstance(data, SufficientStatistics):
+        return ContingencyTest.from_name(test_name, data)
+
+    if test_name in ('cached_pearsonr', 'fisher-z') or isinstance(data, SufficientStatistics):
+        statistics = data if isinstance(data, SufficientStatistics) else SufficientStatistics.from_data(data)
+        return PartialCorrelationTest(statistics, method='fisher-z' if test_name == 'fisher-z' else 'pearsonr')
+
+    from pgmpy.estimators import CITests
+    test = getattr(CITests, test_name, None)
+    if not callable(test):
+        raise ValueError(f"Unknown CI test '{test_name}'.")
+
+    return test
+
+
+def _init_worker(spec, statistics, test_name, alpha, blas_threads):
+    """
+    Pool initializer: attaches the shared data (or takes the statistics) and builds the test once.
+    """
+    _worker_state['limits'] = threadpool_limits(limits=blas_threads)
+
+    if spec is not None:
+        shm, values, columns = attach_shared_data(spec)
+        _worker_state['shm'] = shm
+        data = pd.DataFrame(values, columns=columns, copy=False)
+    else:
+        data = statistics
+
+    _worker_state['data'] = None if isinstance(data, SufficientStatistics) else data
+    _worker_state['test'] = resolve_ci_test(test_name, data)
+    _worker_state['alpha'] = alpha
+
+
+def _test_edge(task):
+    """
+    Tests one edge against every conditioning set of the current depth, drawn from the frozen
+    neighbourhoods of both endpoints, and stops at the first set that separates them.
+
+    Returns:
+        tuple: (separating set or None, number of tests run, seconds spent)
+    """
+    x, y, candidates, depth = task
+    test, data, alpha = _worker_state['test'], _worker_state['data'], _worker_state['alpha']
+
+    start = time.perf_counter()
+    n_tests = 0
+    seen = set()
+    for others in candidates:
+        for cond in combinations(others, depth):
+            # The same set can occur on both sides (common neighbours); it is tested once.
+            if cond in seen:
+                continue
+            seen.add(cond)
+            n_tests += 1
+
+            if test(x, y, list(cond), data=data, boolean=True, significance_level=alpha):
+                return set(cond), n_tests, time.perf_counter() - start
+
+    return None, n_tests, time.perf_counter() - start
+
+
+@timed('pc.skeleton')
+def estimate_skeleton_stable(data, test_name='pearsonr', alpha=0.05, jobs=1, max_depth=None):
+    """
+    Skeleton phase of the stable PC algorithm with any CI test, with the edge tests of each
+    conditioning depth spread over 'jobs' worker processes.
+
+    The result does not depend on 'jobs' or on the order of the columns: the conditioning sets
+    of an edge are tried in sorted order, against neighbourhoods that only change between depths.
+
+    Args:
+        data (pd.DataFrame | SufficientStatistics | ColumnMatrix): The data, its streamed sufficient
+                         statistics, or a memory-mapped matrix (see src.matrix) whose statistics
+                         are accumulated in blocks. The last two always use 'cached_pearsonr'.
+        test_name (str): See resolve_ci_test.
+        alpha (float): Significance level of the tests.
+        jobs (int): Number of worker processes. 1 runs every test in this process.
+        max_depth (int): Largest conditioning set to try (None: no limit).
+
+    Returns:
+        tuple: (nx.Graph skeleton, dict of separating sets keyed by frozenset({u, v}))
+    """
+    data = as_statistics(data)
+    columns = sorted(data.columns)
+    adjacent = {col: set(columns) - {col} for col in columns}
+    sep_sets = {}
+
+    # Resolving the test here reports an unknown name before any worker starts, and imports
+    # pgmpy once in this process, so forked workers inherit it instead of importing it again.
+    test = resolve_ci_test(test_name, data)
+
+    pool = None
+    shm = None
+    if jobs > 1 and len(columns) > 2:
+        blas_threads = max(1, (os.cpu_count() or 1) // jobs)
+        if isinstance(data, SufficientStatistics):
+            spec, statistics = None, data
+        else:
+            shm, spec = share_dataframe(data)
+            statistics = None
+        pool = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                   initargs=(spec, statistics, test_name, alpha, blas_threads))
+    else:
+        _worker_state.update(data=None if isinstance(data, SufficientStatistics) else data,
+                             test=test, alpha=alpha)
+
+    try:
+        depth = 0
+        while max_depth is None or depth <= max_depth:
+            tasks = []
+            for x, y in combinations(columns, 2):
+                if y not in adjacent[x]:
+                    continue
+                candidates = [sorted(adjacent[x] - {y}), sorted(adjacent[y] - {x})]
+                if any(len(others) >= depth for others in candidates):
+                    tasks.append((x, y, candidates, depth))
+
+            if not tasks:
+                break
+
+            if pool is None:
+                results = map(_test_edge, tasks)
+            else:
+                # Several edges per task message; map() keeps the order of 'tasks'.
+                results = pool.map(_test_edge, tasks, chunksize=max(1, len(tasks) // (4 * jobs)))
+
+            # Edges are only removed after the whole depth has been tested.
+            removed = []
+            for (x, y, _, _), (sep_set, n_tests, seconds) in zip(tasks, list(results)):
+                count_ci_tests(depth, n_tests, seconds)
+                if sep_set is not None:
+                    removed.append((x, y))
+                    sep_sets[frozenset((x, y))] = sep_set
+
+            for x, y in removed:
+                adjacent[x].discard(y)
+                adjacent[y].discard(x)
+
+            depth += 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+        _worker_state.clear()
+
+    skeleton = nx.Graph()
+    skeleton.add_nodes_from(data.columns)
+    skeleton.add_edges_from((x, y) for x in columns for y in adjacent[x] if x < y)
+
+    return skeleton, sep_sets
+
+
+@timed('pc')
+def run_pc_algo_stable(data, alpha=0.05, test_name='pearsonr', jobs=1, max_depth=None, sep_sets=None):
+    """
+    Runs the order-independent stable PC algorithm with any CI test, in parallel.
+
+    The skeleton comes from estimate_skeleton_stable; the edges are then oriented like in
+    run_pc_algo_manual (v-structures, Meek's rules and a consistent extension to a DAG).
+    'sep_sets', if a dict, receives the separating sets of the skeleton phase.
+
+    Returns:
+        nx.DiGraph: The estimated DAG, or None if the tests fail.
+    """
+    try:
+        print(f"Running stable PC Algorithm ({jobs} worker{'s' if jobs != 1 else ''})...")
+        skeleton, found_sep_sets = estimate_skeleton_stable(data, test_name=test_name, alpha=alpha, jobs=jobs,
+                                                            max_depth=max_depth)
+        if sep_sets is not None:
+            sep_sets.update(found_sep_sets)
+        return orient_edges(skeleton, found_sep_sets)
+
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return None
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import time
+import networkx as nx
+import numpy as np
+from src.causality import _anm_direction
+from src.metrics import phase
+from src.refinement import run_timed_edge_tests, apply_edge_directions
+
+
+# ==========================================
+# Result Store ('python main.py', disabled with '--no-store')
+# ==========================================
+#
+# INTENT: Rerunning main.py on the same data with the same settings repeated the PC search and
+# every ANM fit. The store keeps the result of each pipeline stage as a small JSON entry,
+# addressed by a hash of the data values (not of the file name or date, so a copied or touched
+# file still hits) and by the parameters the stage depends on:
+#
+#     <store>/<data hash>/pc-<key>.json   DAG, separating sets and runtime of one PC run,
+#                                         keyed by PC variant, CI test and alpha.
+#     <store>/<data hash>/anm-<key>.json  p-values, rows per fit and runtime of every edge tested,
+#                                         keyed by ANM backend (and adaptive confidence).
+#
+# The ANM p-values do not depend on the ANM alpha, which only turns them into a verdict, and
+# an edge test does not depend on which PC settings produced the edge. A sweep over the ANM
+# alpha therefore runs no fit after the first run, and a sweep over the PC alpha only fits the
+# edges it has not seen yet. Entries are written atomically, like the load cache of src.loaders.
+
+STORE_VERSION = 2
+
+# Default location of the store.
+DEFAULT_STORE_DIR = os.path.join('results', '.store')
+
+
+def data_hash(df):
+    """
+    Returns the content hash of a DataFrame: column names, dtypes and values.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in df.dtypes.items()]).encode('utf-8'))
+    digest.update(str(df.shape).encode('utf-8'))
+    for col in df.columns:
+        # Column by column, so the hash needs no copy of the whole table in one dtype.
+        digest.update(np.ascontiguousarray(df[col].to_numpy()))
+
+    return digest.hexdigest()
+
+
+def _entry_path(store_dir, digest, stage, params):
+    key = hashlib.sha1(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(store_dir, digest, f"{stage}-{key}.json")
+
+
+def load_entry(store_dir, digest, stage, params):
+    """
+    Returns:
+        dict: The stored record of a stage, or None if there is no (readable, current) entry.
+    """
+    path = _entry_path(store_dir, digest, stage, params)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, encoding='utf-8') as f:
+            record = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable store entry {path}: {e}")
+        return None
+
+    if record.get('version') != STORE_VERSION or record.get('params') != params:
+        return None
+    return record
+
+
+def save_entry(store_dir, digest, stage, params, record):
+    """
+    Writes the record of a stage (adding the version and parameters it is keyed by).
+    """
+    path = _entry_path(store_dir, digest, stage, params)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': STORE_VERSION, 'stage': stage, 'params': params, **record}, f)
+    os.replace(temp_path, path)
+
+
+def run_pc_stored(df, store_dir, digest, alpha=0.05, test_name='pearsonr', pc_variant='pgmpy', jobs=1):
+    """
+    Runs the PC algorithm (run_pc_algo_library or run_pc_algo_stable), or returns its stored result.
+
+    Args:
+        store_dir (str): The store folder.
+        digest (str): data_hash(df), computed once by the caller for all stages.
+        jobs (int): Worker processes of the stable PC. Not part of the key: the result does not
+                    depend on it.
+
+    Returns:
+        nx.DiGraph: The estimated DAG, or None if the tests fail (failures are not stored).
+    """
+    params = {'variant': pc_variant, 'test': test_name, 'alpha': alpha}
+    with phase('store'):
+        record = load_entry(store_dir, digest, 'pc', params)
+
+    if record is not None:
+        print(f"Reusing the stored PC result ({record['timings']['pc_s']:.2f}s when it was computed).")
+        dag = nx.DiGraph()
+        dag.add_nodes_from(record['nodes'])
+        dag.add_edges_from(tuple(edge) for edge in record['edges'])
+        return dag
+
+    sep_sets = {}
+    start = time.perf_counter()
+    if pc_variant == 'stable':
+        from src.stable_pc import run_pc_algo_stable
+        dag = run_pc_algo_stable(data=df, alpha=alpha, test_name=test_name, jobs=jobs, sep_sets=sep_sets)
+    else:
+        from src.causality import run_pc_algo_library
+        dag = run_pc_algo_library(data=df, alpha=alpha, test_name=test_name, sep_sets=sep_sets)
+    pc_s = time.perf_counter() - start
+
+    if dag is not None:
+        with phase('store'):
+            save_entry(store_dir, digest, 'pc', params, {
+                'nodes': list(dag.nodes()),
+                'edges': [list(edge) for edge in dag.edges()],
+                'sep_sets': [[*sorted(pair), sorted(cond)] for pair, cond in sep_sets.items()],
+                'timings': {'pc_s': pc_s},
+            })
+
+    return dag
+
+
+def refine_edges_stored(df, dag, store_dir, digest, alpha=0.05, method='gp', jobs=1, adaptive=False,
+                        confidence=0.9):
+    """
+    refine_edges_anm that only fits the edges without stored p-values, and stores the new ones.
+    The verdicts are derived from the p-values at 'alpha', so any ANM alpha reuses the same fits.
+
+    Returns:
+        nx.DiGraph: The same graph object, with reversed edges where ANM disagrees.
+    """
+    params = {'method': method, 'adaptive': adaptive}
+    if adaptive:
+        params['confidence'] = confidence
+
+    with phase('store'):
+        record = load_entry(store_dir, digest, 'anm', params)
+    tested = {} if record is None else {(entry['cause'], entry['effect']): entry for entry in record['edges']}
+
+    current_edges = list(dag.edges())
+    pending = [edge for edge in current_edges if edge not in tested]
+    if len(pending) < len(current_edges):
+        print(f"Reusing stored ANM p-values for {len(current_edges) - len(pending)} of {len(current_edges)} edges.")
+
+    if pending:
+        timed_results = run_timed_edge_tests(df, pending, alpha=alpha, method=method, jobs=jobs,
+                                             adaptive=adaptive, confidence=confidence)
+        for (u, v), ((_, p_forward, p_backward), n_used, wall_s) in zip(pending, timed_results):
+            tested[(u, v)] = {'cause': u, 'effect': v, 'p_forward': float(p_forward),
+                              'p_backward': float(p_backward), 'rows': int(n_used), 'wall_s': wall_s}
+
+        with phase('store'):
+            save_entry(store_dir, digest, 'anm', params, {'edges': list(tested.values())})
+
+    results = []
+    for edge in current_edges:
+        p_forward, p_backward = tested[edge]['p_forward'], tested[edge]['p_backward']
+        results.append((_anm_direction(p_forward, p_backward, alpha), p_forward, p_backward))
+
+    return apply_edge_directions(dag, current_edges, results)
@@ -0,0 +1,161 @@
+import networkx as nx
+import pandas as pd
+from src.ci_tests import SufficientStatistics
+from src.causality import PGMPY_SEQUENTIAL, _counted_ci_test, orient_edges
+from src.matrix import as_statistics
+from src.metrics import timed
+from src.stable_pc import resolve_ci_test, estimate_skeleton_stable
+
+
+# ==========================================
+# Alpha Sweep ('python main.py --alpha-sweep 0.01 0.05 0.1')
+# ==========================================
+#
+# INTENT: Choosing a significance level meant one full run per candidate alpha, although the
+# p-value of a CI test does not depend on alpha; only the decision 'p >= alpha' does. The sweep
+# runs PC once per alpha with a CI test that remembers the p-value of every (x, y | S) it has
+# computed, so each test is computed at most once across the whole sweep. Every alpha still
+# replays the complete skeleton search and orientation (the tests it needs differ: a larger
+# alpha removes fewer edges and reaches deeper conditioning sets), but only the tests that no
+# earlier alpha needed are computed. The report lists how the graph changes from one alpha to
+# the next.
+
+
+class PValueCache:
+    """
+    CI test with pgmpy's signature that computes every p-value once and decides at any alpha.
+
+    The tests are symmetric in x and y, so (x, y | S) and (y, x | S) share one entry.
+    """
+
+    def __init__(self, test, data):
+        self.test = _counted_ci_test(test)
+        self.data = data
+        self.results = {}
+        self.calls = 0
+
+    @property
+    def computed(self):
+        return len(self.results)
+
+    def result(self, X, Y, Z):
+        """
+        Returns:
+            tuple: The statistic of the underlying test ((statistic, p-value, ...)).
+        """
+        key = (*sorted((X, Y)), frozenset(Z))
+        if key not in self.results:
+            self.results[key] = tuple(self.test(X, Y, list(Z), data=self.data, boolean=False))
+
+        return self.results[key]
+
+    def __call__(self, X, Y, Z, data=None, boolean=True, significance_level=0.05, **kwargs):
+        self.calls += 1
+        result = self.result(X, Y, Z)
+
+        # pgmpy's tests accept independence at p >= alpha.
+        if boolean:
+            return result[1] >= significance_level
+        return result
+
+
+def _graph_changes(previous, current):
+    """
+    Returns:
+        tuple: (added, removed, reversed) edge lists of 'current' compared to 'previous'.
+    """
+    previous_edges, current_edges = set(previous.edges()), set(current.edges())
+    reversed_edges = sorted((u, v) for u, v in current_edges - previous_edges if (v, u) in previous_edges)
+    added = sorted((u, v) for u, v in current_edges - previous_edges if (v, u) not in previous_edges)
+    removed = sorted((u, v) for u, v in previous_edges - current_edges if (v, u) not in current_edges)
+
+    return added, removed, reversed_edges
+
+
+@timed('sweep')
+def run_alpha_sweep(data, alphas, test_name='pearsonr', pc_variant='pgmpy'):
+    """
+    Runs PC at every significance level in 'alphas', computing each CI test only once.
+
+    Args:
+        data (pd.DataFrame | SufficientStatistics | ColumnMatrix): The data, its streamed
+                         sufficient statistics or a memory-mapped matrix (see src.matrix). The
+                         last two always use 'cached_pearsonr'.
+        alphas (list): The significance levels. They are run in increasing order.
+        test_name (str): See src.stable_pc.resolve_ci_test.
+        pc_variant (str): 'pgmpy' (pgmpy's PC, as run_pc_algo_library) or 'stable' (the
+                          order-independent PC of src.stable_pc, run in this process).
+
+    Returns:
+        list: One dict per alpha with 'alpha', 'dag' (nx.DiGraph), 'tests' (CI tests the PC run
+              asked for), 'new_tests' (those of them no earlier alpha had needed) and 'added'/'removed'/'reversed' (edges compared to the
+              previous alpha).
+    """
+    data = as_statistics(data)
+    cache = PValueCache(resolve_ci_test(test_name, data), None if isinstance(data, SufficientStatistics) else data)
+
+    if pc_variant == 'pgmpy':
+        from pgmpy.estimators import PC
+        # The cache brings its own data, so pgmpy only needs the column names.
+        est = PC(pd.DataFrame(columns=data.columns, dtype=float))
+
+    results = []
+    previous = None
+    for alpha in sorted(alphas):
+        calls_before, computed_before = cache.calls, cache.computed
+        if pc_variant == 'stable':
+            skeleton, sep_sets = estimate_skeleton_stable(data, test_name=cache, alpha=alpha, jobs=1)
+            dag = orient_edges(skeleton, sep_sets)
+        else:
+            # Sequential, so the cache is filled in this process (see PGMPY_SEQUENTIAL).
+            dag = nx.DiGraph(est.estimate(return_type='dag', significance_level=alpha, ci_test=cache,
+                                          show_progress=False, **PGMPY_SEQUENTIAL))
+
+        added, removed, reversed_edges = _graph_changes(previous, dag) if previous is not None else ([], [], [])
+        results.append({'alpha': alpha, 'dag': dag, 'tests': cache.calls - calls_before,
+                        'new_tests': cache.computed - computed_before,
+                        'added': added, 'removed': removed, 'reversed': reversed_edges})
+        previous = dag
+
+    return results
+
+
+def sweep_table(results):
+    """
+    Returns:
+        pd.DataFrame: One row per directed edge found at any alpha ('cause->effect'), one column
+                      per alpha, 1 where the edge is in that graph.
+    """
+    edges = sorted({edge for result in results for edge in result['dag'].edges()})
+    table = pd.DataFrame({result['alpha']: [int(result['dag'].has_edge(u, v)) for u, v in edges]
+                          for result in results}, index=[f"{u}->{v}" for u, v in edges], dtype=int)
+    table.index.name = 'edge'
+    table.columns.name = 'alpha'
+
+    return table
+
+
+def format_sweep_report(results):
+    """
+    Returns:
+        str: One line per alpha: edges, newly computed tests and the changes to the previous alpha.
+    """
+    def edges_text(sign, edges):
+        return [f"{sign}{u}->{v}" for u, v in edges]
+
+    lines = [f"{'alpha':<10}{'edges':>6}{'tests':>7}{'computed':>10}  changes"]
+    for i, result in enumerate(results):
+        changes = (edges_text('+', result['added']) + edges_text('-', result['removed'])
+                   + edges_text('~', result['reversed']))
+        if i == 0:
+            text = "(first)"
+        else:
+            text = " ".join(changes) if changes else "none"
+        lines.append(f"{result['alpha']:<10g}{result['dag'].number_of_edges():>6}{result['tests']:>7}"
+                     f"{result['new_tests']:>10}  {text}")
+
+    total = sum(result['tests'] for result in results)
+    computed = sum(result['new_tests'] for result in results)
+    lines.append(f"(+ added, - removed, ~ reversed, compared to the previous alpha; "
+                 f"{computed} of {total} CI tests computed)")
+    return "\n".join(lines)
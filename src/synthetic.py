@@ -0,0 +1,215 @@
+import os
+import numpy as np
+import pandas as pd
+import networkx as nx
+from scipy.linalg import solve_triangular
+
+
+# ==========================================
+# Synthetic Data Generator (Linear SEMs on random DAGs)
+# ==========================================
+#
+# INTENT: '3v_generate_synthetic.py' and '4v_generate_synthetic.py' remain as the scripts that
+# produced the datasets in data/synthetic. This module generates the same kind of data as a
+# library, for any number of nodes and rows: a DAG is drawn from one of the families below,
+# and the rows of the linear structural equation model X = X W + E are obtained from the noise
+# with a single triangular solve per DAG, X = E (I - W)^-1, followed by one matrix product per
+# block of rows. All randomness comes from one numpy.random.Generator, so a seed reproduces
+# both the graph and the data.
+
+DAG_FAMILIES = ('random', 'chain', 'fork', 'collider')
+NOISE_TYPES = ('gaussian', 'uniform', 'laplace', 'exponential', 'student_t')
+
+# Rows generated (and written) at once.
+BLOCK_SIZE = 100000
+
+
+def random_dag(n_nodes, density=0.1, family='random', weight_range=(0.5, 2.0), rng=None):
+    """
+    Draws a weighted DAG.
+
+    Args:
+        n_nodes (int): Number of nodes, named X1, X2, ...
+        density (float): Probability of every possible edge (only used by the 'random' family).
+        family (str): 'random' (Erdos-Renyi over a random node order), 'chain' (X1 -> X2 -> ...),
+                      'fork' (X1 causes every other node) or 'collider' (every node causes the last one).
+        weight_range (tuple): Edge weights are drawn uniformly from this range, with a random sign.
+        rng (np.random.Generator): Source of randomness (or a seed).
+
+    Returns:
+        nx.DiGraph: The DAG, with the edge weights in the 'weight' attribute.
+    """
+    rng = np.random.default_rng(rng)
+    nodes = [f"X{i + 1}" for i in range(n_nodes)]
+
+    if family == 'random':
+        order = rng.permutation(n_nodes)
+        upper = np.triu(rng.random((n_nodes, n_nodes)) < density, k=1)
+        edges = [(nodes[order[i]], nodes[order[j]]) for i, j in zip(*np.nonzero(upper))]
+    elif family == 'chain':
+        edges = list(zip(nodes[:-1], nodes[1:]))
+    elif family == 'fork':
+        edges = [(nodes[0], node) for node in nodes[1:]]
+    elif family == 'collider':
+        edges = [(node, nodes[-1]) for node in nodes[:-1]]
+    else:
+        raise ValueError(f"Unknown DAG family '{family}'. Options: {', '.join(DAG_FAMILIES)}.")
+
+    weights = rng.uniform(*weight_range, size=len(edges)) * rng.choice([-1.0, 1.0], size=len(edges))
+
+    dag = nx.DiGraph()
+    dag.add_nodes_from(nodes)
+    dag.add_weighted_edges_from((u, v, w) for (u, v), w in zip(edges, weights))
+    return dag
+
+
+def sample_noise(kind, size, rng):
+    """
+    Draws zero-mean, unit-variance noise of the given type.
+    Non-Gaussian noise makes the direction of every edge identifiable for ANM.
+    """
+    if kind == 'gaussian':
+        return rng.standard_normal(size)
+    elif kind == 'uniform':
+        return rng.uniform(-np.sqrt(3), np.sqrt(3), size)
+    elif kind == 'laplace':
+        return rng.laplace(0.0, 1 / np.sqrt(2), size)
+    elif kind == 'exponential':
+        return rng.exponential(1.0, size) - 1.0
+    elif kind == 'student_t':
+        # 5 degrees of freedom: heavy tails with a finite variance of 5 / 3.
+        return rng.standard_t(5, size) / np.sqrt(5 / 3)
+
+    raise ValueError(f"Unknown noise type '{kind}'. Options: {', '.join(NOISE_TYPES)}.")
+
+
+def mixing_matrix(dag, standardize=True):
+    """
+    Returns the matrix M with X = E @ M for the linear SEM of the DAG (unit-variance noise).
+
+    The nodes are sorted topologically, which makes I - W upper triangular, so M = (I - W)^-1
+    takes one triangular solve. With 'standardize', the columns of M are scaled so that every
+    variable has unit variance. Otherwise variances grow along causal paths, and sorting the
+    variables by variance alone would already reveal the causal order.
+    """
+    order = list(nx.topological_sort(dag))
+    position = {node: i for i, node in enumerate(order)}
+    n_nodes = len(order)
+
+    weights = np.zeros((n_nodes, n_nodes))
+    for u, v, w in dag.edges(data='weight', default=1.0):
+        weights[position[u], position[v]] = w
+
+    mixing = solve_triangular(np.eye(n_nodes) - weights, np.eye(n_nodes))
+
+    if standardize:
+        mixing /= np.sqrt(np.sum(mixing ** 2, axis=0))
+
+    # Back to the order of dag.nodes(), so the columns match the node names.
+    columns = [position[node] for node in dag.nodes()]
+    return mixing[np.ix_(columns, columns)]
+
+
+def standardized_weights(dag):
+    """
+    Returns a copy of the DAG whose edge weights hold in the units of the standardized data.
+
+    Standardizing divides every variable by its standard deviation s, so the structural equation
+    X_v = w X_u + ... becomes X_v / s_v = (w * s_u / s_v) X_u / s_u + ..., and each weight is
+    rescaled by s_u / s_v. The standard deviations are the column norms of the unstandardized
+    mixing matrix (the noise has unit variance).
+    """
+    scales = dict(zip(dag.nodes(), np.sqrt(np.sum(mixing_matrix(dag, standardize=False) ** 2, axis=0))))
+
+    scaled = dag.copy()
+    for u, v, data in scaled.edges(data=True):
+        data['weight'] = data.get('weight', 1.0) * scales[u] / scales[v]
+    return scaled
+
+
+def iter_samples(dag, n_samples, noise='gaussian', standardize=True, block_size=BLOCK_SIZE, rng=None):
+    """
+    Generates the rows of the DAG's linear SEM block by block.
+
+    Yields:
+        pd.DataFrame: Blocks of at most 'block_size' rows, one column per node.
+    """
+    rng = np.random.default_rng(rng)
+    mixing = mixing_matrix(dag, standardize=standardize)
+    columns = list(dag.nodes())
+
+    for start in range(0, n_samples, block_size):
+        rows = min(block_size, n_samples - start)
+        yield pd.DataFrame(sample_noise(noise, (rows, len(columns)), rng) @ mixing, columns=columns)
+
+
+def generate_dataset(n_nodes, n_samples, density=0.1, family='random', noise='gaussian', standardize=True,
+                     seed=None):
+    """
+    Draws a DAG and samples a dataset from it in memory.
+
+    Returns:
+        tuple: (pd.DataFrame, nx.DiGraph ground truth). With 'standardize', the weights of the
+               ground truth are those of the standardized data (see standardized_weights).
+    """
+    dag_rng, noise_rng = np.random.default_rng(seed).spawn(2)
+    dag = random_dag(n_nodes, density=density, family=family, rng=dag_rng)
+    blocks = iter_samples(dag, n_samples, noise=noise, standardize=standardize, rng=noise_rng)
+    df = pd.concat(blocks, ignore_index=True)
+
+    return df, standardized_weights(dag) if standardize else dag
+
+
+def write_dataset(save_path, n_nodes, n_samples, density=0.1, family='random', noise='gaussian',
+                  standardize=True, seed=None, block_size=BLOCK_SIZE, float_format='%.6g'):
+    """
+    Draws a DAG and streams a dataset sampled from it to a .csv or .parquet file, one block at a
+    time, so the rows never have to fit in memory. The ground truth edges are written next to it
+    as '<name>_truth.csv' (columns cause, effect, weight). With 'standardize', the weights are
+    those of the standardized data that is written (see standardized_weights).
+
+    Parquet output needs the optional 'pyarrow' package.
+
+    Returns:
+        nx.DiGraph: The ground truth DAG.
+    """
+    dag_rng, noise_rng = np.random.default_rng(seed).spawn(2)
+    dag = random_dag(n_nodes, density=density, family=family, rng=dag_rng)
+    blocks = iter_samples(dag, n_samples, noise=noise, standardize=standardize, block_size=block_size,
+                          rng=noise_rng)
+
+    directory = os.path.dirname(save_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    base, extension = os.path.splitext(save_path)
+    if extension.lower() == '.parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Writing Parquet files requires 'pyarrow' (pip install pyarrow).")
+
+        writer = None
+        try:
+            for block in blocks:
+                table = pa.Table.from_pandas(block, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(save_path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        # np.savetxt formats a block several times faster than DataFrame.to_csv.
+        with open(save_path, 'w', newline='') as f:
+            f.write(','.join(dag.nodes()) + '\n')
+            for block in blocks:
+                np.savetxt(f, block.to_numpy(), fmt=float_format, delimiter=',')
+
+    if standardize:
+        dag = standardized_weights(dag)
+    truth = pd.DataFrame([(u, v, w) for u, v, w in dag.edges(data='weight')], columns=['cause', 'effect', 'weight'])
+    truth.to_csv(f"{base}_truth.csv", index=False)
+
+    return dag
@@ -0,0 +1,83 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import unittest
+import shutil
+import tempfile
+import networkx as nx
+from src.adjacency import (SparseDAG, to_csr, csr_to_bitset, bitset_to_csr, bitset_has_edge,
+                           format_edge_list, parse_edge_list, write_edge_list, read_edge_list)
+from src.causality import get_adjacency_matrix, get_matrix
+from src.graphs import graph_to_dot, export_graph_text
+
+
+class TestSparseAdjacency(unittest.TestCase):
+    def setUp(self):
+        self.graph = nx.DiGraph([('B', 'A'), ('A', 'C'), ('C', 'D')])
+        self.graph.add_node('E')
+
+    def test_matches_dense_matrix(self):
+        dag = SparseDAG.from_graph(self.graph)
+        self.assertTrue(dag.to_dense().equals(get_adjacency_matrix(self.graph)))
+        self.assertEqual(to_csr(self.graph).nnz, 3)
+        self.assertTrue(dag.has_edge('B', 'A'))
+        self.assertFalse(dag.has_edge('A', 'B'))
+        self.assertListEqual(dag.predecessors('C'), ['A'])
+        self.assertTrue(nx.utils.graphs_equal(dag.to_graph(), self.graph))
+
+        # The matrix functions read a SparseDAG directly, in any node order.
+        unsorted = SparseDAG.from_graph(self.graph, nodes=['E', 'D', 'C', 'B', 'A'])
+        self.assertTrue(get_adjacency_matrix(unsorted).equals(get_adjacency_matrix(self.graph)))
+        self.assertTrue((get_matrix(unsorted) == nx.to_numpy_array(self.graph, nodelist=unsorted.nodes())).all())
+
+    def test_bitset_round_trip(self):
+        # 10 nodes need two bytes per row.
+        graph = nx.relabel_nodes(nx.gnm_random_graph(10, 30, directed=True, seed=0), str)
+        matrix = to_csr(graph)
+        bits = csr_to_bitset(matrix)
+
+        self.assertEqual(bits.shape, (10, 2))
+        self.assertEqual((bitset_to_csr(bits) != matrix).nnz, 0)
+        nodes = sorted(graph.nodes())
+        for u, v in [('0', '9'), ('9', '0'), ('3', '8')]:
+            self.assertEqual(bitset_has_edge(bits, nodes.index(u), nodes.index(v)), graph.has_edge(u, v))
+
+
+class TestEdgeList(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.graph = nx.DiGraph([('X1', 'X2'), ('X3', 'X2')])
+        self.graph.add_node('X4')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_round_trip(self):
+        path = os.path.join(self.temp_dir, 'graph.edges')
+        write_edge_list(self.graph, path)
+        dag = read_edge_list(path)
+
+        self.assertListEqual(dag.nodes(), ['X1', 'X2', 'X3', 'X4'])
+        self.assertListEqual(dag.edges(), [('X1', 'X2'), ('X3', 'X2')])
+        # The exports take the sparse graph as it is.
+        self.assertEqual(graph_to_dot(dag), graph_to_dot(self.graph))
+
+        export_path = os.path.join(self.temp_dir, 'copy.edges')
+        export_graph_text(dag, export_path)
+        with open(export_path) as f, open(path) as original:
+            self.assertEqual(f.read(), original.read())
+
+    def test_rejects_malformed_text(self):
+        text = format_edge_list(self.graph)
+        with self.assertRaises(ValueError):
+            parse_edge_list(text.replace('psee-edges', 'edges'))
+        with self.assertRaises(ValueError):
+            parse_edge_list(text.rsplit('\n', 2)[0])
+        with self.assertRaises(ValueError):
+            parse_edge_list(text.replace('2 1\n', '2 7\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
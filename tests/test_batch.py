@@ -0,0 +1,138 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import unittest
+import shutil
+import tempfile
+import pandas as pd
+from contextlib import redirect_stdout
+from unittest import mock
+from pgmpy.estimators import PC
+from src.batch import collect_inputs, output_names, run_batch
+from src.synthetic import write_dataset
+import main
+
+
+class TestBatchInputs(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for name in ('pair0001.txt', 'pair0001_des.txt', 'pairmeta.txt', 'README', 'data.csv', 'data_truth.csv'):
+            with open(os.path.join(self.temp_dir, name), 'w') as f:
+                f.write("1 2\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_directory_skips_non_data_files(self):
+        files = [os.path.basename(path) for path in collect_inputs([self.temp_dir])]
+        self.assertListEqual(files, ['data.csv', 'pair0001.txt'])
+
+    def test_glob_and_manifest(self):
+        manifest = os.path.join(self.temp_dir, 'list.lst')
+        with open(manifest, 'w') as f:
+            f.write("# comment\n\ndata.csv\n")
+
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                files = collect_inputs([os.path.join(self.temp_dir, 'pair0*.txt'), 'no_such_*.csv'], manifest=manifest)
+
+        # An explicit pattern is taken as given; only directories are filtered.
+        self.assertListEqual([os.path.basename(path) for path in files],
+                             ['data.csv', 'pair0001.txt', 'pair0001_des.txt'])
+
+    def test_duplicate_names_get_their_folder(self):
+        names = output_names([os.path.join('a', 'x.csv'), os.path.join('b', 'x.csv'), os.path.join('b', 'y.csv')])
+        self.assertListEqual(names, ['a_x', 'b_x', 'y'])
+
+
+class TestBatchRun(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for n_nodes in (3, 6):
+            write_dataset(os.path.join(self.temp_dir, 'data', f"nodes_{n_nodes}.csv"), n_nodes, 500,
+                          family='chain', seed=n_nodes)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_writes_results_and_summary(self):
+        output_dir = os.path.join(self.temp_dir, 'results')
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                summary = run_batch([os.path.join(self.temp_dir, 'data')], output_dir=output_dir, jobs=1,
+                                    test_name='cached_pearsonr', anm_method=None, graph_format='dot')
+
+        self.assertListEqual(list(summary['status']), ['ok', 'ok'])
+        self.assertListEqual(list(summary['n_vars']), [3, 6])
+        self.assertTrue(os.path.exists(os.path.join(output_dir, 'nodes_6.dot')))
+
+        adjacency = pd.read_csv(os.path.join(output_dir, 'nodes_6_adjacency.csv'), index_col=0)
+        self.assertEqual(adjacency.shape, (6, 6))
+        self.assertEqual(int(adjacency.to_numpy().sum()), summary['n_edges'][1])
+
+        saved = pd.read_csv(os.path.join(output_dir, 'summary.csv'))
+        self.assertListEqual(list(saved['name']), ['nodes_3', 'nodes_6'])
+        self.assertTrue(saved['anm_s'].isna().all())
+
+    def test_pgmpy_runs_sequentially_in_workers(self):
+        # pgmpy's default would start a pool of n_cpu processes inside every batch worker.
+        estimate = PC.estimate
+        calls = []
+
+        def recorded(est, *args, **kwargs):
+            calls.append(kwargs)
+            return estimate(est, *args, **kwargs)
+
+        with mock.patch.object(PC, 'estimate', recorded):
+            with open(os.devnull, 'w') as fnull:
+                with redirect_stdout(fnull):
+                    run_batch([os.path.join(self.temp_dir, 'data')], output_dir=os.path.join(self.temp_dir, 'out'),
+                              jobs=1, anm_method=None, graph_format='edges')
+
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(all(call['n_jobs'] == 1 and call['variant'] != 'parallel' for call in calls))
+
+    def test_anm_alpha_reaches_the_refinement(self):
+        # With uniform noise ANM reverses the PC orientation of this chain; at an ANM alpha of 0 no
+        # HSIC test rejects, so no edge can be reversed.
+        data_dir = os.path.join(self.temp_dir, 'uniform')
+        write_dataset(os.path.join(data_dir, 'chain.csv'), 4, 1000, family='chain', noise='uniform', seed=0)
+        edges = {}
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                for name, options in (('pc', {'anm_method': None}), ('anm', {'anm_method': 'nystrom'}),
+                                      ('anm_0', {'anm_method': 'nystrom', 'anm_alpha': 0.0})):
+                    summary = run_batch([data_dir], output_dir=os.path.join(self.temp_dir, name), jobs=1,
+                                        test_name='cached_pearsonr', graph_format='edges', **options)
+                    edges[name] = summary['edges'][0]
+
+        self.assertNotEqual(edges['anm'], edges['pc'])
+        self.assertEqual(edges['anm_0'], edges['pc'])
+
+
+class TestBatchCommandLine(unittest.TestCase):
+    def parse(self, *argv):
+        with mock.patch.object(sys, 'argv', ['main.py', *argv]), mock.patch.object(main, 'run') as run:
+            main.main()
+        return run.call_args.args[0]
+
+    def test_options_before_batch_are_kept(self):
+        args = self.parse('--alpha', '0.01', '--jobs', '2', '--ci-test', 'fisher-z', '--anm-method', 'nystrom',
+                          'batch', 'data/pairs')
+        self.assertEqual((args.alpha, args.jobs, args.ci_test, args.anm_method), (0.01, 2, 'fisher-z', 'nystrom'))
+
+    def test_options_after_batch(self):
+        args = self.parse('batch', 'data/pairs', '--alpha', '0.01', '--anm-method', 'none', '--no-store')
+        self.assertEqual((args.alpha, args.anm_method, args.no_store), (0.01, 'none', True))
+
+    def test_defaults(self):
+        batch = self.parse('batch', 'data/pairs')
+        single = self.parse()
+        self.assertEqual((batch.alpha, batch.jobs, batch.ci_test, batch.format), (0.05, None, 'pearsonr', 'png'))
+        self.assertEqual((single.alpha, single.jobs, single.anm_method), (0.05, 1, 'gp'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import unittest
+from src.loaders import load_pair_metadata
+from src.bench import run_pair, summarize
+
+
+class TestBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.data_folder = os.path.join(parent_dir, 'data', 'pairs')
+        self.metadata = load_pair_metadata(self.data_folder)
+
+    def test_run_pair_record(self):
+        record = run_pair(self.data_folder, 'pair0001.txt', self.metadata['pair0001.txt'], method='nystrom')
+        self.assertEqual(record['status'], 'ok')
+        self.assertEqual(record['truth'], 'A --> B')
+        self.assertEqual(record['n_rows'], 349)
+        self.assertGreater(record['runtime_s'], 0)
+        self.assertGreater(record['peak_mem_mb'], 0)
+
+    def test_multidimensional_pair_is_skipped(self):
+        record = run_pair(self.data_folder, 'pair0052.txt', self.metadata['pair0052.txt'], method='nystrom')
+        self.assertEqual(record['status'], 'skipped')
+
+    def test_weighted_accuracy(self):
+        records = [
+            {'status': 'ok', 'correct': True, 'weight': 0.75, 'runtime_s': 1.0, 'peak_mem_mb': 2.0},
+            {'status': 'ok', 'correct': False, 'weight': 0.25, 'runtime_s': 1.0, 'peak_mem_mb': 1.0},
+            {'status': 'skipped', 'correct': None, 'weight': 1.0, 'runtime_s': None, 'peak_mem_mb': None},
+        ]
+        summary = summarize(records)
+        self.assertEqual(summary['n_scored'], 2)
+        self.assertAlmostEqual(summary['accuracy'], 0.5)
+        self.assertAlmostEqual(summary['weighted_accuracy'], 0.75)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import unittest
+import numpy as np
+import pandas as pd
+import networkx as nx
+from unittest import mock
+from pgmpy.estimators import PC
+from src.bootstrap import bootstrap_edge_frequencies, resample_edges
+from src.graphs import graph_to_dot, edge_widths
+
+
+class TestBootstrapFrequencies(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        A = rng.normal(size=400)
+        B = rng.normal(size=400)
+        C = A + B + 0.5 * rng.normal(size=400)
+        self.df = pd.DataFrame({'A': A, 'B': B, 'C': C})
+
+    def test_collider_is_stable_and_independent_of_jobs(self):
+        sequential, n_sequential = bootstrap_edge_frequencies(self.df, n_resamples=6, anm_method=None, jobs=1)
+        parallel, n_parallel = bootstrap_edge_frequencies(self.df, n_resamples=6, anm_method=None, jobs=2)
+
+        self.assertEqual((n_sequential, n_parallel), (6, 6))
+        pd.testing.assert_frame_equal(sequential, parallel)
+        self.assertListEqual(list(sequential.index), ['A', 'B', 'C'])
+        self.assertEqual(sequential.loc['A', 'C'], 1.0)
+        self.assertEqual(sequential.loc['B', 'C'], 1.0)
+        self.assertEqual(sequential.loc['A', 'B'] + sequential.loc['B', 'A'], 0.0)
+
+    def test_pgmpy_runs_sequentially_in_workers(self):
+        # pgmpy's default would start a pool of n_cpu processes inside every bootstrap worker.
+        estimate = PC.estimate
+        calls = []
+
+        def recorded(est, *args, **kwargs):
+            calls.append(kwargs)
+            return estimate(est, *args, **kwargs)
+
+        with mock.patch.object(PC, 'estimate', recorded):
+            self.assertIsNotNone(resample_edges(self.df, 0, test_name='pearsonr', anm_method=None))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((calls[0]['variant'], calls[0]['n_jobs']), ('stable', 1))
+
+    def test_frequencies_become_edge_widths(self):
+        graph = nx.DiGraph([('A', 'C'), ('B', 'C')])
+        frequencies = pd.DataFrame(0.0, index=['A', 'B', 'C'], columns=['A', 'B', 'C'])
+        frequencies.loc['A', 'C'] = 1.0
+        frequencies.loc['B', 'C'] = 0.25
+
+        widths = edge_widths(graph, frequencies)
+        self.assertGreater(widths[0], widths[1])
+        self.assertIn('"B" -> "C" [penwidth=', graph_to_dot(graph, edge_frequencies=frequencies))
+        self.assertIn('label="25%"', graph_to_dot(graph, edge_frequencies=frequencies))
+
+
+if __name__ == '__main__':
+    unittest.main()
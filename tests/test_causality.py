@@ -10,6 +10,8 @@ import networkx as nx
 from contextlib import redirect_stdout, redirect_stderr
 from src.loaders import load_tuebingen_pair, get_all_ground_truths
 from src.causality import run_pc_algo_library, get_adjacency_matrix, check_causal_direction_anm
+from src.causality import run_pc_algo_manual, check_independence, partial_correlations, orient_edges
+from src.causality import check_causal_direction_anm_adaptive, required_agreement
 import warnings
 from sklearn.exceptions import ConvergenceWarning
 warnings.filterwarnings("ignore", category=ConvergenceWarning)
@@ -79,6 +81,138 @@ class TestCausalityStructure(unittest.TestCase):
         self.assertEqual(matrix.loc['X', 'Y'], 1)
 
 
+
+class TestNativeANM(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        A = rng.uniform(-2, 2, 2000)
+        B = A ** 3 + rng.uniform(-1, 1, 2000)
+        self.df = pd.DataFrame({'A': A, 'B': B})
+
+    def test_native_recovers_direction(self):
+        direction, p_forward, p_backward = check_causal_direction_anm(self.df, alpha=0.05, method='nystrom')
+        self.assertTrue(direction.startswith("A --> B"))
+        self.assertGreater(p_forward, p_backward)
+
+    def test_native_is_deterministic(self):
+        first = check_causal_direction_anm(self.df, method='nystrom')
+        second = check_causal_direction_anm(self.df, method='nystrom')
+        self.assertEqual(first, second)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            check_causal_direction_anm(self.df, method='svm')
+
+    def test_agrees_with_gp_on_short_pairs(self):
+        # The 20 shortest two-variable Tuebingen pairs (at most 192 rows), where the exact 'gp' backend is cheap.
+        # On these pairs the ordering of the p-values agrees 17 times and the verdict 15 times (see
+        # cause_or_effect_native for the agreement on every pair).
+        from src.loaders import load_causal_data
+        folder = os.path.join(parent_dir, 'data', 'pairs')
+        names = ['pair0098.txt', 'pair0102.txt', 'pair0103.txt', 'pair0104.txt', 'pair0108.txt',
+                 'pair0106.txt', 'pair0090.txt', 'pair0089.txt', 'pair0091.txt', 'pair0092.txt',
+                 'pair0064.txt', 'pair0048.txt', 'pair0056.txt', 'pair0057.txt', 'pair0058.txt',
+                 'pair0059.txt', 'pair0060.txt', 'pair0061.txt', 'pair0062.txt', 'pair0063.txt']
+        order = verdict = 0
+        for name in names:
+            with open(os.devnull, 'w') as fnull:
+                with redirect_stdout(fnull):
+                    df = load_causal_data(folder, name)
+                    native = check_causal_direction_anm(df, method='nystrom')
+                    exact = check_causal_direction_anm(df, method='gp')
+            order += np.sign(native[1] - native[2]) == np.sign(exact[1] - exact[2])
+            verdict += native[0] == exact[0]
+
+        self.assertGreaterEqual(order, 17)
+        self.assertGreaterEqual(verdict, 15)
+
+
+class TestAdaptiveANM(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        A = rng.uniform(-2, 2, 20000)
+        B = A ** 3 + rng.uniform(-1, 1, 20000)
+        self.df = pd.DataFrame({'A': A, 'B': B})
+
+    def test_required_agreement(self):
+        self.assertEqual(required_agreement(0.9), 5)
+        self.assertEqual(required_agreement(0.5), 2)
+
+    def test_clear_pair_stops_early(self):
+        direction, p_forward, p_backward, n_used = check_causal_direction_anm_adaptive(
+            self.df, method='nystrom', start_size=500)
+        self.assertTrue(direction.startswith("A --> B"))
+        self.assertGreater(p_forward, p_backward)
+        self.assertEqual(n_used, 500)
+
+    def test_short_pair_uses_every_row(self):
+        short = self.df.iloc[:300]
+        adaptive = check_causal_direction_anm_adaptive(short, method='nystrom', start_size=500)
+        self.assertEqual(adaptive[3], 300)
+        self.assertEqual(adaptive[:3], check_causal_direction_anm(short, method='nystrom'))
+
+    def test_unstable_pair_falls_back_to_every_row(self):
+        rng = np.random.default_rng(3)
+        independent = pd.DataFrame({'A': rng.normal(size=600), 'B': rng.normal(size=600)})
+        adaptive = check_causal_direction_anm_adaptive(independent, method='nystrom')
+        self.assertEqual(adaptive[3], 600)
+        self.assertEqual(adaptive[:3], check_causal_direction_anm(independent, method='nystrom'))
+
+        # A cap stops the growth, and the unstable ordering is not reported as a direction.
+        capped = check_causal_direction_anm_adaptive(independent, method='nystrom', max_size=200)
+        self.assertEqual((capped[0], capped[3]), ("Inconclusive", 200))
+
+
+class TestManualPC(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        A = rng.normal(size=1000)
+        B = rng.normal(size=1000)
+        C = 1.5 * A + 2 * B + rng.normal(scale=0.5, size=1000)
+        self.collider = pd.DataFrame({'A': A, 'B': B, 'C': C})
+
+    def test_partial_correlation_matches_residuals(self):
+        X = self.collider.to_numpy()
+        corr = np.corrcoef(X, rowvar=False)
+        r = partial_correlations(corr, [0], [1], [[2]])[0]
+
+        # Reference: correlate the residuals of A and B after regressing out C
+        design = np.column_stack([np.ones(len(X)), X[:, 2]])
+        res_a = X[:, 0] - design @ np.linalg.lstsq(design, X[:, 0], rcond=None)[0]
+        res_b = X[:, 1] - design @ np.linalg.lstsq(design, X[:, 1], rcond=None)[0]
+        self.assertAlmostEqual(r, np.corrcoef(res_a, res_b)[0, 1], places=10)
+
+    def test_check_independence(self):
+        self.assertTrue(check_independence(self.collider, 'A', 'B'))
+        self.assertFalse(check_independence(self.collider, 'A', 'B', cond_set=['C']))
+
+    def test_collider_is_oriented(self):
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                dag = run_pc_algo_manual(self.collider, alpha=0.05)
+
+        self.assertIsInstance(dag, nx.DiGraph)
+        self.assertSetEqual(set(dag.edges()), {('A', 'C'), ('B', 'C')})
+        matrix = get_adjacency_matrix(dag)
+        self.assertEqual(matrix.loc['A', 'C'], 1)
+
+    def test_two_variable_edge_points_to_first_node(self):
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                dag = orient_edges(nx.Graph([('A', 'B')]), {})
+        self.assertEqual(list(dag.edges()), [('B', 'A')])
+
+    def test_matches_library_on_synthetic_data(self):
+        from src.loaders import load_causal_data
+        folder = os.path.join(parent_dir, 'data', 'synthetic', '4-variables')
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                df = load_causal_data(folder, 'fork_data_4var.csv')
+                manual = run_pc_algo_manual(df)
+                library = run_pc_algo_library(df)
+
+        self.assertSetEqual(set(manual.edges()), set(library.edges()))
+
 # class TestCausalBenchmark(unittest.TestCase):
 #     @classmethod
 #     def setUpClass(cls):
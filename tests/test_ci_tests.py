@@ -0,0 +1,122 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import unittest
+import warnings
+import numpy as np
+from scipy import stats
+import pandas as pd
+from contextlib import redirect_stdout
+from unittest import mock
+from pgmpy.estimators.CITests import pearsonr
+from src.ci_tests import SufficientStatistics, PartialCorrelationTest
+from src.causality import run_pc_algo_library, run_pc_algo_manual
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+
+class TestSufficientStatistics(unittest.TestCase):
+    def test_matches_numpy(self):
+        rng = np.random.default_rng(3)
+        df = pd.DataFrame(rng.normal(size=(500, 3)), columns=['A', 'B', 'C'])
+        stats_ = SufficientStatistics.from_data(df)
+
+        self.assertEqual(stats_.n, 500)
+        np.testing.assert_allclose(stats_.mean, df.mean().to_numpy())
+        np.testing.assert_allclose(stats_.covariance, np.cov(df.to_numpy(), rowvar=False))
+        np.testing.assert_allclose(stats_.correlation, np.corrcoef(df.to_numpy(), rowvar=False))
+
+    def test_merged_chunks_match_single_pass(self):
+        # A large offset makes naive sum-of-products accumulation lose most of its precision
+        rng = np.random.default_rng(5)
+        df = pd.DataFrame(1e6 + rng.normal(size=(1000, 3)), columns=['A', 'B', 'C'])
+        expected = SufficientStatistics.from_data(df)
+
+        chunked = SufficientStatistics(df.columns)
+        for start in range(0, 1000, 300):
+            chunked.update(df.iloc[start:start + 300])
+
+        left = SufficientStatistics.from_data(df.iloc[:123])
+        merged = left.merge(SufficientStatistics.from_data(df.iloc[123:]))
+
+        for stats_ in (chunked, merged):
+            self.assertEqual(stats_.n, 1000)
+            np.testing.assert_allclose(stats_.mean, expected.mean)
+            np.testing.assert_allclose(stats_.m2, expected.m2, rtol=1e-9)
+
+
+class TestPartialCorrelationTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        A = rng.normal(size=800)
+        C = A + rng.normal(size=800)
+        B = C + rng.normal(size=800)
+        self.df = pd.DataFrame({'A': A, 'B': B, 'C': C})
+        self.ci_test = PartialCorrelationTest(SufficientStatistics.from_data(self.df), cache_size=2)
+
+    def test_matches_pgmpy_pearsonr(self):
+        for cond in ([], ['C']):
+            expected = pearsonr('A', 'B', cond, self.df, boolean=False)
+            coef, p_value = self.ci_test('A', 'B', cond, boolean=False)
+            # pgmpy regresses on Z without an intercept, hence the small tolerance.
+            self.assertAlmostEqual(coef, expected[0], places=5)
+            self.assertAlmostEqual(p_value, expected[1], places=5)
+
+    def test_cache_is_symmetric_and_bounded(self):
+        self.ci_test.test('A', 'B', ['C'])
+        self.ci_test.test('B', 'A', ['C'])
+        self.assertEqual(self.ci_test.hits, 1)
+
+        self.ci_test.test('A', 'C')
+        self.ci_test.test('B', 'C')
+        self.assertEqual(len(self.ci_test.cache), 2)
+        self.assertNotIn(('A', 'B', frozenset(['C'])), self.ci_test.cache)
+
+    def test_pc_with_cached_test(self):
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                reference = run_pc_algo_library(self.df, test_name='pearsonr')
+                cached = run_pc_algo_library(self.df, test_name='cached_pearsonr')
+                streamed = run_pc_algo_library(SufficientStatistics.from_data(self.df))
+
+        self.assertSetEqual(set(cached.edges()), set(reference.edges()))
+        self.assertSetEqual(set(streamed.edges()), set(reference.edges()))
+
+    def test_cache_is_filled_in_this_process(self):
+        # pgmpy's default variant would pickle the test into one worker per CI test on a
+        # multi-core machine, so its cache would never be filled where PC runs.
+        tests = []
+
+        def make_test(*args, **kwargs):
+            tests.append(PartialCorrelationTest(*args, **kwargs))
+            return tests[-1]
+
+        with mock.patch('joblib._parallel_backends.cpu_count', return_value=4), \
+                mock.patch('src.causality.PartialCorrelationTest', side_effect=make_test):
+            with open(os.devnull, 'w') as fnull:
+                with redirect_stdout(fnull):
+                    run_pc_algo_library(self.df, test_name='cached_pearsonr')
+
+        self.assertEqual(len(tests), 1)
+        self.assertGreater(tests[0].misses, 0)
+        self.assertGreater(tests[0].hits, 0)
+
+    def test_fisher_z(self):
+        test = PartialCorrelationTest(SufficientStatistics.from_data(self.df), method='fisher-z')
+        coef, p_value = test('A', 'B', ['C'], boolean=False)
+        z = np.arctanh(coef) * np.sqrt(len(self.df) - 1 - 3)
+        self.assertAlmostEqual(p_value, 2 * stats.norm.sf(abs(z)), places=10)
+
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                library = run_pc_algo_library(self.df, test_name='fisher-z')
+                manual = run_pc_algo_manual(self.df)
+        self.assertSetEqual({frozenset(e) for e in library.edges()}, {frozenset(e) for e in manual.edges()})
+
+        with self.assertRaises(ValueError):
+            PartialCorrelationTest(SufficientStatistics.from_data(self.df), method='spearman')
+
+
+if __name__ == '__main__':
+    unittest.main()
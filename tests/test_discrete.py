@@ -0,0 +1,113 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import shutil
+import tempfile
+import unittest
+import warnings
+import numpy as np
+import pandas as pd
+from contextlib import redirect_stdout
+import src.discrete as discrete
+from src.causality import run_pc_algo_library
+from src.discrete import (ContingencyTest, contingency_name, discretize, encode_columns, infer_column_types,
+                          parse_contingency_name)
+from src.loaders import load_causal_data
+
+
+class TestColumnTypes(unittest.TestCase):
+    def test_infer_and_encode(self):
+        raw = pd.DataFrame({'A': ['1.5', '2.25', 'n/a', '4.0'], 'B': ['red', 'green', 'red', None],
+                            'C': [1, 2, 1, 2], 'D': [True, False, True, True]})
+        df = encode_columns(raw)
+        self.assertTrue(np.isnan(df['A'][2]))
+        self.assertEqual(df['B'].tolist()[:3], [1.0, 0.0, 1.0])
+        self.assertTrue(np.isnan(df['B'][3]))
+        self.assertEqual(df['D'].tolist(), [1, 0, 1, 1])
+
+        types = infer_column_types(df.dropna())
+        self.assertEqual(types, {'A': 'continuous', 'B': 'discrete', 'C': 'discrete', 'D': 'discrete'})
+        self.assertEqual(infer_column_types(raw)['B'], 'categorical')
+
+    def test_discretize(self):
+        codes = discretize(np.arange(1000.0), bins=4)
+        self.assertEqual(np.bincount(codes).tolist(), [250, 250, 250, 250])
+        # Tied quantiles collapse into fewer bins.
+        self.assertEqual(discretize(np.r_[np.zeros(900), np.arange(100.0)], bins=4).max(), 1)
+
+    def test_loader_keeps_text_columns(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            pd.DataFrame({'x': [0.5, 1.5, 2.5, 3.5], 'color': ['red', 'blue', 'red', 'blue']}).to_csv(
+                os.path.join(temp_dir, 'mixed.csv'), index=False)
+            with open(os.devnull, 'w') as fnull:
+                with redirect_stdout(fnull):
+                    df = load_causal_data(temp_dir, 'mixed.csv')
+            self.assertEqual(df.shape, (4, 2))
+            self.assertEqual(df['B'].tolist(), [1, 0, 1, 0])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_names(self):
+        self.assertEqual(contingency_name('g_sq'), 'g_sq')
+        self.assertEqual(parse_contingency_name(contingency_name('chi_square', 8)), ('chi_square', 8))
+        self.assertIsNone(parse_contingency_name('pearsonr'))
+        with self.assertRaises(ValueError):
+            parse_contingency_name('g_sq:1')
+
+
+class TestContingencyTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 3000
+        A = rng.integers(0, 3, n)
+        B = (A + rng.integers(0, 2, n)) % 3
+        C = (B + (rng.random(n) < 0.3)) % 2
+        self.df = pd.DataFrame({'A': A, 'B': B, 'C': C, 'D': rng.integers(0, 4, n), 'E': rng.integers(0, 2, n)})
+        self.cases = [('A', 'C', []), ('A', 'C', ['B']), ('A', 'D', ['B', 'E']), ('A', 'B', ['C', 'D', 'E'])]
+
+    def test_matches_pgmpy(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            from pgmpy.estimators.CITests import chi_square, g_sq
+
+        for statistic, reference in (('chi_square', chi_square), ('g_sq', g_sq)):
+            test = ContingencyTest(self.df, statistic=statistic)
+            for x, y, z in self.cases:
+                value, p_value, dof = test.test(x, y, z)
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    expected = reference(x, y, z, self.df, boolean=False)
+                self.assertAlmostEqual(value, expected[0], places=6)
+                self.assertEqual(dof, expected[2])
+                if expected[1] > 1e-12:
+                    self.assertAlmostEqual(p_value, expected[1], places=8)
+
+    def test_blocks_of_strata_give_the_same_result(self):
+        expected = ContingencyTest(self.df).test('A', 'B', ['C', 'D', 'E'])
+        limit = discrete.MAX_TABLE_CELLS
+        discrete.MAX_TABLE_CELLS = 20
+        try:
+            value, p_value, dof = ContingencyTest(self.df).test('B', 'A', ['E', 'D', 'C'])
+        finally:
+            discrete.MAX_TABLE_CELLS = limit
+
+        self.assertAlmostEqual(value, expected[0], places=6)
+        self.assertEqual(dof, expected[2])
+
+    def test_pc_on_mixed_data(self):
+        # A discrete chain A -> B -> C plus a continuous child of C.
+        df = self.df[['A', 'B', 'C']].copy()
+        df['F'] = df['C'] + np.random.default_rng(1).normal(scale=0.3, size=len(df))
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                dag = run_pc_algo_library(df, test_name='chi_square')
+
+        skeleton = {frozenset(edge) for edge in dag.edges()}
+        self.assertSetEqual(skeleton, {frozenset('AB'), frozenset('BC'), frozenset('CF')})
+
+
+if __name__ == '__main__':
+    unittest.main()
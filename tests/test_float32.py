@@ -0,0 +1,62 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import unittest
+import numpy as np
+from contextlib import redirect_stdout
+from src.anm import cause_or_effect_native, fit_sparse_gp
+from src.causality import run_pc_algo_library
+from src.ci_tests import SufficientStatistics
+from src.loaders import load_causal_data
+from src.refinement import refine_edges_anm
+
+
+class TestFloat32Mode(unittest.TestCase):
+    def setUp(self):
+        self.datasets = [(os.path.join(parent_dir, 'data', 'synthetic', folder), filename)
+                         for folder, filename in (('3-variables', 'chain_data.csv'), ('3-variables', 'fork_data.csv'),
+                                                  ('3-variables', 'collider_data.csv'),
+                                                  ('4-variables', 'chain_data_4var.csv'),
+                                                  ('4-variables', 'fork_data_4var.csv'),
+                                                  ('4-variables', 'collider_data_4var.csv'))]
+        self.datasets += [(os.path.join(parent_dir, 'data', 'pairs'), f"pair000{i}.txt") for i in range(1, 6)]
+
+    def load(self, folder, filename, dtype=None):
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                return load_causal_data(folder, filename, dtype=dtype)
+
+    def test_loader_and_statistics(self):
+        df = self.load(*self.datasets[0], dtype='float32')
+        self.assertTrue(all(dtype == np.float32 for dtype in df.dtypes))
+
+        expected = SufficientStatistics.from_data(self.load(*self.datasets[0]))
+        statistics = SufficientStatistics.from_data(df)
+        np.testing.assert_allclose(statistics.correlation, expected.correlation, atol=1e-6)
+
+    def test_anm_stays_float32(self):
+        rng = np.random.default_rng(0)
+        x = rng.uniform(-1, 1, 3000)
+        y = x ** 3 + 0.1 * rng.uniform(-1, 1, 3000)
+        self.assertEqual(fit_sparse_gp(x.astype(np.float32), y.astype(np.float32)).dtype, np.float32)
+
+        p_64 = cause_or_effect_native(x, y)
+        p_32 = cause_or_effect_native(x.astype(np.float32), y.astype(np.float32))
+        np.testing.assert_allclose(p_32, p_64, atol=1e-3)
+
+    def test_dags_match_float64_on_bundled_datasets(self):
+        for folder, filename in self.datasets:
+            dags = []
+            for dtype in (None, 'float32'):
+                df = self.load(folder, filename, dtype=dtype)
+                with open(os.devnull, 'w') as fnull:
+                    with redirect_stdout(fnull):
+                        dag = run_pc_algo_library(df, test_name='cached_pearsonr')
+                        dags.append(set(refine_edges_anm(df, dag, method='nystrom').edges()))
+            self.assertSetEqual(dags[1], dags[0], filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import unittest
+import shutil
+import tempfile
+import xml.etree.ElementTree as ET
+import networkx as nx
+from contextlib import redirect_stdout
+from src.graphs import draw_causal_graph, graph_to_dot, graph_to_svg, export_graph_text
+
+
+class TestGraphExport(unittest.TestCase):
+    def setUp(self):
+        self.graph = nx.DiGraph([('A', 'C'), ('B', 'C')])
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_headless_rendering(self):
+        save_path = os.path.join(self.temp_dir, 'collider.png')
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                draw_causal_graph(self.graph, save_path=save_path, show=False)
+
+        self.assertGreater(os.path.getsize(save_path), 0)
+        # Headless mode must not register figures with pyplot, where they would never be freed
+        if 'matplotlib.pyplot' in sys.modules:
+            self.assertEqual(sys.modules['matplotlib.pyplot'].get_fignums(), [])
+
+    def test_dot_lists_every_edge(self):
+        dot = graph_to_dot(self.graph, title='Collider "test"')
+        self.assertTrue(dot.startswith('digraph "Collider \\"test\\"" {'))
+        self.assertIn('"A" -> "C";', dot)
+        self.assertIn('"B" -> "C";', dot)
+
+    def test_svg_is_valid_xml(self):
+        root = ET.fromstring(graph_to_svg(self.graph, title='A & B'))
+        ns = '{http://www.w3.org/2000/svg}'
+        self.assertEqual(len(root.findall(f'{ns}line')), 2)
+        self.assertEqual(len(root.findall(f'{ns}circle')), 3)
+
+    def test_export_by_extension(self):
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                for name in ('graph.dot', 'graph.svg'):
+                    export_graph_text(self.graph, os.path.join(self.temp_dir, name))
+
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, 'graph.dot')))
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, 'graph.svg')))
+        with self.assertRaises(ValueError):
+            export_graph_text(self.graph, os.path.join(self.temp_dir, 'graph.txt'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import unittest
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from contextlib import redirect_stdout
+from src.incremental import run_incremental
+from src.causality import run_pc_algo_manual
+from src.refinement import refine_edges_anm
+from src.loaders import load_causal_data
+
+
+class TestIncrementalDiscovery(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.temp_dir, 'state.npz')
+        self.rng = np.random.default_rng(7)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def sample(self, n, strength=1.0):
+        # Collider A -> B <- C plus B -> D
+        A = self.rng.normal(size=n)
+        C = self.rng.normal(size=n)
+        B = strength * (A + C) + self.rng.normal(size=n)
+        D = B + self.rng.normal(size=n)
+        return pd.DataFrame({'x1': A, 'x2': B, 'x3': C, 'x4': D})
+
+    def write(self, df, append=False):
+        with open(os.path.join(self.temp_dir, 'daily.csv'), 'a' if append else 'w', newline='') as f:
+            df.to_csv(f, index=False, header=not append)
+
+    def run_both(self, **kwargs):
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                dag, report = run_incremental(self.temp_dir, 'daily.csv', self.state_path, **kwargs)
+                full = run_pc_algo_manual(load_causal_data(self.temp_dir, 'daily.csv'))
+        return dag, report, full
+
+    def test_append_matches_full_rerun(self):
+        self.write(self.sample(2000))
+        _, report, _ = self.run_both(anm_method=None)
+        self.assertEqual(report['new_rows'], 2000)
+
+        self.write(self.sample(300), append=True)
+        dag, report, full = self.run_both(anm_method=None)
+
+        self.assertEqual(report['new_rows'], 300)
+        self.assertEqual(report['total_rows'], 2300)
+        self.assertFalse(report['skeleton_rerun'])
+        self.assertSetEqual(set(dag.edges()), set(full.edges()))
+
+    def test_crossing_alpha_reruns_skeleton(self):
+        # Too few, too weakly dependent rows at first: the edges only appear after the append
+        self.write(self.sample(20, strength=0.05))
+        self.run_both(anm_method=None)
+
+        self.write(self.sample(3000), append=True)
+        dag, report, full = self.run_both(anm_method=None)
+
+        self.assertGreater(report['decisions_flipped'], 0)
+        self.assertTrue(report['skeleton_rerun'])
+        self.assertSetEqual(set(dag.edges()), set(full.edges()))
+
+    def test_rewritten_file_starts_over(self):
+        self.write(self.sample(500))
+        self.run_both(anm_method=None)
+
+        self.write(self.sample(400))
+        _, report, _ = self.run_both(anm_method=None)
+        self.assertEqual(report['new_rows'], 400)
+        self.assertEqual(report['total_rows'], 400)
+
+    def test_anm_p_values_are_reused_on_unchanged_rows(self):
+        self.write(self.sample(1000))
+        _, report, _ = self.run_both(anm_method='nystrom')
+        self.assertEqual(report['anm_reused'], 0)
+        n_edges = report['anm_tested']
+
+        # Same rows, another ANM alpha: the p-values are reused and the verdicts derived again.
+        for anm_alpha in (0.05, 1e-6):
+            dag, report, full = self.run_both(anm_method='nystrom', anm_alpha=anm_alpha)
+            self.assertEqual(report['anm_tested'], 0)
+            self.assertEqual(report['anm_reused'], n_edges)
+            with open(os.devnull, 'w') as fnull:
+                with redirect_stdout(fnull):
+                    expected = refine_edges_anm(load_causal_data(self.temp_dir, 'daily.csv'), full,
+                                                alpha=anm_alpha, method='nystrom')
+            self.assertSetEqual(set(dag.edges()), set(expected.edges()))
+
+        # Appended rows change every column, so the edges are tested again unless reuse is asked for.
+        self.write(self.sample(100), append=True)
+        _, report, _ = self.run_both(anm_method='nystrom', reuse_anm=True)
+        self.assertEqual(report['anm_tested'], 0)
+
+        self.write(self.sample(100), append=True)
+        _, report, _ = self.run_both(anm_method='nystrom')
+        self.assertEqual(report['anm_tested'], n_edges)
+
+    def test_text_columns_are_coded_like_the_loader(self):
+        def labelled(n):
+            df = self.sample(n)
+            df['x1'] = np.where(df['x1'] > 0, 'high', 'low')
+            return df
+
+        self.write(labelled(1000))
+        _, report, _ = self.run_both(anm_method='nystrom')
+        self.assertEqual(report['total_rows'], 1000)
+
+        # The ANM stage sees the same rows, so its p-values are reused on a rerun.
+        _, report, _ = self.run_both(anm_method='nystrom')
+        self.assertEqual(report['anm_tested'], 0)
+
+        # Known labels are appended incrementally; a new label recodes the file from scratch.
+        self.write(labelled(200), append=True)
+        dag, report, full = self.run_both(anm_method=None)
+        self.assertEqual(report['new_rows'], 200)
+        self.assertSetEqual(set(dag.edges()), set(full.edges()))
+
+        extra = labelled(200)
+        extra.loc[:99, 'x1'] = 'medium'
+        self.write(extra, append=True)
+        dag, report, full = self.run_both(anm_method=None)
+        self.assertEqual(report['new_rows'], 1400)
+        self.assertSetEqual(set(dag.edges()), set(full.edges()))
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                self.assertEqual(report['total_rows'], len(load_causal_data(self.temp_dir, 'daily.csv')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import unittest
+import numpy as np
+import pandas as pd
+from contextlib import redirect_stdout
+from src.causality import run_pc_algo_library
+from src.ci_tests import PartialCorrelationTest, SufficientStatistics
+from src.kernel_ci import KernelCITest, kci_name, parse_kci_name
+from src.stable_pc import run_pc_algo_stable
+
+
+class TestKernelCITest(unittest.TestCase):
+    def setUp(self):
+        # W -> V is quadratic (no correlation); X -> Z -> Y is a nonlinear chain.
+        rng = np.random.default_rng(3)
+        n = 500
+        W = rng.normal(size=n)
+        V = W ** 2 + 0.3 * rng.normal(size=n)
+        X = rng.normal(size=n)
+        Z = np.tanh(2 * X) + 0.3 * rng.normal(size=n)
+        Y = np.sin(2 * Z) + 0.3 * rng.normal(size=n)
+        self.df = pd.DataFrame({'W': W, 'V': V, 'X': X, 'Y': Y, 'Z': Z})
+
+    def test_names(self):
+        self.assertEqual(kci_name(), 'kci')
+        self.assertEqual(kci_name('nystrom', 50), 'kci:nystrom:50')
+        self.assertEqual(parse_kci_name('kci'), ('rff', 100))
+        self.assertEqual(parse_kci_name(kci_name('nystrom', 50)), ('nystrom', 50))
+        self.assertIsNone(parse_kci_name('pearsonr'))
+        with self.assertRaises(ValueError):
+            parse_kci_name('kci:exact:10')
+
+    def test_detects_nonlinear_dependence(self):
+        linear = PartialCorrelationTest(SufficientStatistics.from_data(self.df))
+        self.assertGreater(linear.test('W', 'V')[1], 0.05)
+
+        for approximation in ('rff', 'nystrom'):
+            test = KernelCITest(self.df, approximation=approximation, rank=50)
+            self.assertLess(test.test('W', 'V')[1], 0.01)
+            self.assertLess(test.test('X', 'Y')[1], 0.01)
+            self.assertGreater(test.test('X', 'Y', ['Z'])[1], 0.05)
+            self.assertGreater(test.test('W', 'X')[1], 0.05)
+
+    def test_conditional_calibration_on_large_samples(self):
+        # X <- Z -> Y with nonlinear mechanisms: X and Y are independent given Z. An error of the
+        # regression on Z grows with n, so the rejection rate is checked well above n = 500.
+        n, alpha = 3000, 0.05
+        for approximation in ('rff', 'nystrom'):
+            rejections = 0
+            for seed in range(20):
+                rng = np.random.default_rng(seed)
+                Z = rng.normal(size=n)
+                df = pd.DataFrame({'X': np.sin(2 * Z) + 0.3 * rng.normal(size=n),
+                                   'Y': Z ** 2 + 0.3 * rng.normal(size=n), 'Z': Z})
+                rejections += KernelCITest(df, approximation=approximation).test('X', 'Y', ['Z'])[1] < alpha
+            self.assertLessEqual(rejections, 3, approximation)
+
+    def test_symmetric_and_cached(self):
+        test = KernelCITest(self.df, rank=50)
+        forward = test('X', 'Y', ['Z'], boolean=False)
+        self.assertEqual(test('Y', 'X', ['Z'], boolean=False), forward)
+        self.assertEqual((test.misses, test.hits), (1, 1))
+
+        # The features are seeded by the variables, so a fresh test gives the same p-value.
+        self.assertEqual(KernelCITest(self.df, rank=50).test('Y', 'X', ['Z']), forward)
+        self.assertEqual(test('X', 'Y', ['Z'], significance_level=0.05), forward[1] >= 0.05)
+
+    def test_pc_finds_nonlinear_edges(self):
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                library = run_pc_algo_library(self.df, test_name=kci_name(rank=50))
+                stable = run_pc_algo_stable(self.df, test_name=kci_name(rank=50))
+
+        for dag in (library, stable):
+            skeleton = {frozenset(edge) for edge in dag.edges()}
+            self.assertSetEqual(skeleton, {frozenset('WV'), frozenset('XZ'), frozenset('ZY')})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,7 +8,11 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
-from src.loaders import load_tuebingen_pair, load_causal_data
+import numpy as np
+import shutil
+import tempfile
+from src.loaders import load_tuebingen_pair, load_causal_data, load_pair_metadata, get_meta_ground_truth
+from src.loaders import iter_causal_data, stream_sufficient_statistics
 
 
 class TestTuebingenLoader(unittest.TestCase):
@@ -160,6 +164,104 @@ class TestRobustCausalLoader(unittest.TestCase):
             df = load_causal_data(self.synthetic_folder, filename)
             self.assertTrue(pd.api.types.is_float_dtype(df['A']))
 
+    def test_whitespace_aligned_files(self):
+        # pair0069 has trailing tabs and pair0065 leading spaces; both used to load as empty/None
+        for filename in ['pair0069.txt', 'pair0065.txt']:
+            df = load_causal_data(self.pairs_folder, filename)
+            self.assertEqual(list(df.columns), ['A', 'B'])
+            self.assertGreater(len(df), 1000)
+
+
+class TestPairMetadata(unittest.TestCase):
+
+    def setUp(self):
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.pairs_folder = os.path.join(project_root, 'data', 'pairs')
+
+    def test_metadata_covers_all_pairs(self):
+        metadata = load_pair_metadata(self.pairs_folder)
+        self.assertEqual(len(metadata), 108)
+        self.assertDictEqual(metadata['pair0001.txt'], {'cause': (1, 1), 'effect': (2, 2), 'weight': 0.166})
+
+    def test_meta_ground_truth(self):
+        metadata = load_pair_metadata(self.pairs_folder)
+        self.assertEqual(get_meta_ground_truth(metadata['pair0001.txt']), 'A --> B')
+        self.assertEqual(get_meta_ground_truth(metadata['pair0047.txt']), 'B --> A')
+        self.assertEqual(get_meta_ground_truth(metadata['pair0052.txt']), 'Unknown')
+
+
+class TestStreamingLoader(unittest.TestCase):
+
+    def setUp(self):
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.pairs_folder = os.path.join(project_root, 'data', 'pairs')
+        self.synthetic_folder = os.path.join(project_root, 'data', 'synthetic', '3-variables')
+
+    def test_chunks_match_full_load(self):
+        # pair0069 has trailing tabs, collider_data.csv a header row
+        for folder, filename in [(self.pairs_folder, 'pair0069.txt'), (self.synthetic_folder, 'collider_data.csv')]:
+            df = load_causal_data(folder, filename)
+            chunks = list(iter_causal_data(folder, filename, chunksize=100))
+
+            self.assertGreater(len(chunks), 1)
+            streamed = pd.concat(chunks)
+            self.assertEqual(list(streamed.columns), list(df.columns))
+            np.testing.assert_allclose(streamed.to_numpy(), df.to_numpy())
+
+    def test_streamed_statistics_match_full_load(self):
+        df = load_causal_data(self.synthetic_folder, 'collider_data.csv')
+        stats_ = stream_sufficient_statistics(self.synthetic_folder, 'collider_data.csv', chunksize=77)
+
+        self.assertEqual(stats_.n, len(df))
+        np.testing.assert_allclose(stats_.mean, df.mean().to_numpy())
+        np.testing.assert_allclose(stats_.covariance, np.cov(df.to_numpy(), rowvar=False))
+
+    def test_stream_missing_file(self):
+        self.assertIsNone(stream_sufficient_statistics(self.pairs_folder, 'no_such_file.txt'))
+
+
+class TestParsedDataCache(unittest.TestCase):
+
+    def setUp(self):
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, 'cache')
+        shutil.copy(os.path.join(project_root, 'data', 'synthetic', '3-variables', 'collider_data.csv'), self.temp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_cached_load_matches_parse(self):
+        parsed = load_causal_data(self.temp_dir, 'collider_data.csv')
+        first = load_causal_data(self.temp_dir, 'collider_data.csv', cache_dir=self.cache_dir)
+        cached = load_causal_data(self.temp_dir, 'collider_data.csv', cache_dir=self.cache_dir)
+
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        # The column is a view into the mapped file, not a copy
+        base = cached['A'].to_numpy()
+        while base is not None and not isinstance(base, np.memmap):
+            base = base.base
+        self.assertIsInstance(base, np.memmap)
+        self.assertEqual(list(cached.columns), ['A', 'B', 'C'])
+        np.testing.assert_array_equal(first.to_numpy(), parsed.to_numpy())
+        np.testing.assert_array_equal(cached.to_numpy(), parsed.to_numpy())
+
+        # The mapping is copy-on-write, so edits never reach the cache file
+        cached.loc[0, 'A'] = 1e9
+        reloaded = load_causal_data(self.temp_dir, 'collider_data.csv', cache_dir=self.cache_dir)
+        self.assertEqual(reloaded.loc[0, 'A'], parsed.iloc[0, 0])
+
+    def test_edited_file_invalidates_cache(self):
+        load_causal_data(self.temp_dir, 'collider_data.csv', cache_dir=self.cache_dir)
+
+        file_path = os.path.join(self.temp_dir, 'collider_data.csv')
+        with open(file_path, 'a') as f:
+            f.write('1.0,2.0,3.0\n')
+
+        df = load_causal_data(self.temp_dir, 'collider_data.csv', cache_dir=self.cache_dir)
+        self.assertEqual(df.iloc[-1].tolist(), [1.0, 2.0, 3.0])
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,71 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import unittest
+import numpy as np
+import pandas as pd
+from contextlib import redirect_stdout
+from src.causality import estimate_skeleton
+from src.ci_tests import SufficientStatistics
+from src.local import discover_local_structure, refine_target_edges, target_edges
+from src.synthetic import generate_dataset
+
+
+class TestLocalStructure(unittest.TestCase):
+    def setUp(self):
+        # E -> A -> T <- B, T -> C <- D, and an unrelated F.
+        rng = np.random.default_rng(0)
+        n = 3000
+        E = rng.uniform(-1, 1, n)
+        A = E + 0.5 * rng.uniform(-1, 1, n)
+        B = rng.uniform(-1, 1, n)
+        T = A + B + 0.5 * rng.uniform(-1, 1, n)
+        D = rng.uniform(-1, 1, n)
+        C = T + D + 0.5 * rng.uniform(-1, 1, n)
+        F = rng.uniform(-1, 1, n)
+        self.df = pd.DataFrame({'A': A, 'B': B, 'C': C, 'D': D, 'E': E, 'F': F, 'T': T})
+
+    def discover(self, df, target, **kwargs):
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                return discover_local_structure(df, target, **kwargs)
+
+    def test_markov_blanket(self):
+        for test_name in ('cached_pearsonr', 'pearsonr'):
+            result = self.discover(self.df, 'T', test_name=test_name)
+            self.assertEqual(result['neighbors'], ['A', 'B', 'C'])
+            self.assertEqual(result['spouses'], ['D'])
+            # The v-structures orient every edge of the blanket.
+            self.assertSetEqual(set(result['dag'].edges()), {('A', 'T'), ('B', 'T'), ('T', 'C'), ('D', 'C')})
+
+    def test_neighbors_match_global_pc_with_fewer_tests(self):
+        df, _ = generate_dataset(100, 5000, density=0.02, seed=1)
+        statistics = SufficientStatistics.from_data(df)
+        test_log = []
+        skeleton, _ = estimate_skeleton(statistics.correlation, statistics.n, statistics.columns, test_log=test_log)
+
+        result = self.discover(df, 'X4', test_name='cached_pearsonr')
+        self.assertEqual(result['neighbors'], sorted(skeleton.neighbors('X4')))
+        self.assertLess(result['tests'], sum(len(tests) for tests, _ in test_log) / 5)
+
+    def test_anm_only_on_target_edges(self):
+        dag = self.discover(self.df, 'T', test_name='cached_pearsonr')['dag']
+        self.assertEqual(sorted(target_edges(dag, 'T')), [('A', 'T'), ('B', 'T'), ('T', 'C')])
+
+        dag.remove_edge('D', 'C')
+        dag.add_edge('C', 'D')
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                refine_target_edges(self.df, dag, 'T', method='nystrom')
+        # The edge between the child and the spouse is left as it was.
+        self.assertTrue(dag.has_edge('C', 'D'))
+        self.assertEqual(len(target_edges(dag, 'T')), 3)
+
+    def test_unknown_target(self):
+        self.assertIsNone(self.discover(self.df, 'Z'))
+
+
+if __name__ == '__main__':
+    unittest.main()
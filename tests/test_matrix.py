@@ -0,0 +1,110 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from contextlib import redirect_stdout
+from src.causality import run_pc_algo_library, run_pc_algo_manual
+from src.ci_tests import SufficientStatistics
+from src.loaders import load_causal_data
+from src.matrix import ColumnMatrix, load_matrix, open_matrix
+from src.refinement import run_edge_tests
+
+
+class TestColumnMatrix(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        n = 2000
+        A = rng.uniform(-1, 1, n)
+        B = A ** 3 + 0.2 * rng.uniform(-1, 1, n)
+        C = B + 0.5 * rng.normal(size=n)
+        D = rng.normal(size=n)
+        pd.DataFrame({'A': A, 'B': B, 'C': C, 'D': D}).to_csv(os.path.join(self.temp_dir, 'data.csv'), index=False)
+
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                self.df = load_causal_data(self.temp_dir, 'data.csv')
+                self.matrix = load_matrix(self.temp_dir, 'data.csv', os.path.join(self.temp_dir, 'cache'),
+                                          chunksize=300)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_conversion_matches_loader(self):
+        self.assertIsInstance(self.matrix.values, np.memmap)
+        self.assertTrue(self.matrix.values.flags['F_CONTIGUOUS'])
+        self.assertEqual(self.matrix.columns, list(self.df.columns))
+        np.testing.assert_array_equal(self.matrix.to_frame().to_numpy(), self.df.to_numpy())
+
+        # The second load maps the conversion instead of parsing the file again.
+        reloaded = load_matrix(self.temp_dir, 'data.csv', os.path.join(self.temp_dir, 'cache'))
+        self.assertEqual(reloaded.path, self.matrix.path)
+
+    def test_text_columns_are_coded_like_the_loader(self):
+        rng = np.random.default_rng(1)
+        labels = rng.choice(['low', 'mid', 'high'], size=700)
+        labels[[3, 400]] = ''
+        df = pd.DataFrame({'A': rng.normal(size=700), 'Group': labels, 'C': rng.normal(size=700)})
+        df.to_csv(os.path.join(self.temp_dir, 'text.csv'), index=False)
+
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                expected = load_causal_data(self.temp_dir, 'text.csv')
+                # Without a cache directory the conversion goes to a temporary one.
+                matrix = load_matrix(self.temp_dir, 'text.csv', None, chunksize=128)
+
+        self.assertEqual(len(expected), 698)
+        self.assertFalse(matrix.path.startswith(self.temp_dir))
+        np.testing.assert_array_equal(matrix.to_frame().to_numpy(), expected.to_numpy())
+
+    def test_columns_are_views(self):
+        pair = self.matrix[['C', 'A']]
+        self.assertEqual(pair.columns, ['C', 'A'])
+        self.assertTrue(np.shares_memory(pair['C'], self.matrix.values))
+        np.testing.assert_array_equal(pair.take([0, 5]).to_numpy(), self.df[['C', 'A']].iloc[[0, 5]].to_numpy())
+
+    def test_blocked_statistics(self):
+        expected = SufficientStatistics.from_data(self.df)
+        statistics = self.matrix.statistics(block_rows=128)
+        self.assertEqual(statistics.n, expected.n)
+        np.testing.assert_allclose(statistics.covariance, expected.covariance)
+
+        # float32 files are accumulated in float64.
+        path = os.path.join(self.temp_dir, 'data32.npy')
+        np.save(path, self.df.to_numpy(dtype=np.float32))
+        statistics = open_matrix(path).statistics(block_rows=128)
+        np.testing.assert_allclose(statistics.correlation, expected.correlation, atol=1e-6)
+
+    def test_discovery_matches_dataframe(self):
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                for run_pc, kwargs in ((run_pc_algo_library, {'test_name': 'cached_pearsonr'}),
+                                       (run_pc_algo_manual, {})):
+                    self.assertSetEqual(set(run_pc(self.matrix, **kwargs).edges()),
+                                        set(run_pc(self.df, **kwargs).edges()))
+
+                edges = [('A', 'B'), ('B', 'C')]
+                expected = run_edge_tests(self.df, edges, method='nystrom')
+                self.assertEqual(run_edge_tests(self.matrix, edges, method='nystrom'), expected)
+                # Workers map the file instead of a shared memory copy.
+                self.assertEqual(run_edge_tests(self.matrix, edges, method='nystrom', jobs=2), expected)
+
+    def test_invalid_files(self):
+        path = os.path.join(self.temp_dir, 'vector.npy')
+        np.save(path, np.arange(5.0))
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                self.assertIsNone(open_matrix(path))
+                self.assertIsNone(open_matrix(os.path.join(self.temp_dir, 'missing.npy')))
+        with self.assertRaises(ValueError):
+            ColumnMatrix(np.zeros((3, 2)), columns=['A'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import json
+import time
+import unittest
+import numpy as np
+import pandas as pd
+from contextlib import redirect_stdout
+from unittest import mock
+from src.metrics import PipelineMetrics, METRICS
+from src.causality import run_pc_algo_library, run_pc_algo_manual
+from src.refinement import run_edge_tests
+
+
+class TestPipelineMetrics(unittest.TestCase):
+    def test_phase_and_decorator_accumulate(self):
+        metrics = PipelineMetrics()
+
+        @metrics.timed('work')
+        def work():
+            time.sleep(0.01)
+            return 'done'
+
+        self.assertEqual(work(), 'done')
+        with metrics.phase('work'):
+            pass
+
+        entry = metrics.as_dict()['phases']['work']
+        self.assertEqual(entry['calls'], 2)
+        self.assertGreaterEqual(entry['wall_s'], 0.01)
+
+    def test_phase_is_recorded_when_the_body_raises(self):
+        metrics = PipelineMetrics()
+        with self.assertRaises(ValueError):
+            with metrics.phase('failing'):
+                raise ValueError("boom")
+
+        self.assertEqual(metrics.phases['failing']['calls'], 1)
+
+    def test_json_round_trip(self):
+        metrics = PipelineMetrics()
+        metrics.count_ci_tests(0, 3)
+        metrics.count_ci_tests(1, 2)
+        metrics.record_anm_fit(('A', 'B'), 500, 'nystrom', 0.1)
+
+        data = json.loads(metrics.to_json())
+        self.assertEqual(data['ci_tests']['total'], 5)
+        self.assertEqual(data['ci_tests']['by_depth']['1']['count'], 2)
+        self.assertEqual(data['anm_fits']['fits'][0], {'edge': 'A->B', 'rows': 500, 'method': 'nystrom', 'wall_s': 0.1})
+
+
+class TestPipelineInstrumentation(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        a = rng.normal(size=500)
+        b = rng.normal(size=500)
+        self.df = pd.DataFrame({'A': a, 'B': b, 'C': a + b + 0.5 * rng.uniform(size=500)})
+        METRICS.reset()
+
+    def test_native_pc_counts_tests_per_depth(self):
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                run_pc_algo_manual(self.df)
+
+        data = METRICS.as_dict()
+        # 3 variables: 6 ordered pairs at depth 0. A-B is removed, so at depth 1 only C has a
+        # second neighbour to condition on: C-A given B and C-B given A.
+        self.assertEqual(data['ci_tests']['by_depth']['0']['count'], 6)
+        self.assertEqual(data['ci_tests']['by_depth']['1']['count'], 2)
+        for name in ('pc', 'pc.skeleton', 'pc.orientation'):
+            self.assertEqual(data['phases'][name]['calls'], 1)
+
+    def test_pgmpy_pc_counts_tests_on_several_cores(self):
+        # pgmpy's default variant would count the tests in its worker processes only.
+        with mock.patch('joblib._parallel_backends.cpu_count', return_value=4):
+            with open(os.devnull, 'w') as fnull:
+                with redirect_stdout(fnull):
+                    run_pc_algo_library(self.df, test_name='cached_pearsonr')
+
+        by_depth = METRICS.as_dict()['ci_tests']['by_depth']
+        self.assertGreater(by_depth['0']['count'], 0)
+        self.assertGreater(by_depth['1']['count'], 0)
+        self.assertGreater(by_depth['0']['wall_s'], 0)
+
+    def test_anm_fits_are_recorded_for_workers(self):
+        edges = [('A', 'C'), ('B', 'C')]
+        run_edge_tests(self.df, edges, method='nystrom', jobs=2)
+
+        fits = METRICS.as_dict()['anm_fits']
+        self.assertEqual([fit['edge'] for fit in fits['fits']], ['A->C', 'B->C'])
+        self.assertEqual(fits['total_rows'], 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import unittest
+import shutil
+import subprocess
+import tempfile
+from src.profiling import ImportProfiler
+
+
+class TestImportProfiler(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.temp_dir, 'psee_profiled_module.py'), 'w') as f:
+            f.write("import time\ntime.sleep(0.05)\nVALUE = 1\n")
+        sys.path.insert(0, self.temp_dir)
+
+    def tearDown(self):
+        sys.path.remove(self.temp_dir)
+        sys.modules.pop('psee_profiled_module', None)
+        shutil.rmtree(self.temp_dir)
+
+    def test_times_new_imports(self):
+        profiler = ImportProfiler().start()
+        try:
+            import psee_profiled_module
+        finally:
+            profiler.stop()
+
+        self.assertEqual(psee_profiled_module.VALUE, 1)
+        self.assertGreaterEqual(profiler.self_times['psee_profiled_module'], 0.05)
+        self.assertIn('psee_profiled_module', profiler.report())
+        self.assertNotIn(profiler._finder, sys.meta_path)
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_heavy_libraries_load_on_first_use(self):
+        # A fresh interpreter, since this test process has imported everything already
+        code = ("import sys; import src.causality, src.refinement, src.graphs, src.loaders; "
+                "print(sorted({'pgmpy', 'causallearn', 'matplotlib', 'torch'} & set(sys.modules)))")
+        result = subprocess.run([sys.executable, '-c', code], cwd=parent_dir, capture_output=True, text=True)
+        self.assertEqual(result.stdout.strip(), '[]', result.stderr)
+
+    def test_help_and_missing_file_skip_pandas(self):
+        # --profile-import lists every package imported during the run, one per line.
+        for args in (['--help'], ['--pair', 'missing_pair.txt']):
+            result = subprocess.run([sys.executable, 'main.py', '--profile-import', *args], cwd=parent_dir,
+                                    capture_output=True, text=True)
+            self.assertIn('Import profile', result.stdout, result.stderr)
+            packages = {line.split(':')[0].strip() for line in result.stdout.split('Import profile')[1].splitlines()}
+            self.assertTrue(packages.isdisjoint({'pandas', 'scipy', 'pgmpy'}), args)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import unittest
+import numpy as np
+import pandas as pd
+import networkx as nx
+from contextlib import redirect_stdout
+from src.refinement import share_dataframe, attach_shared_data, run_edge_tests, refine_edges_anm
+
+
+class TestSharedData(unittest.TestCase):
+    def test_shared_block_round_trip(self):
+        df = pd.DataFrame({'A': [1.0, 2.0, 3.0], 'B': [4.0, 5.0, 6.0]})
+        shm, spec = share_dataframe(df)
+        try:
+            view_shm, values, columns = attach_shared_data(spec)
+            self.assertListEqual(columns, ['A', 'B'])
+            np.testing.assert_array_equal(values, df.to_numpy())
+            view_shm.close()
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+class TestParallelRefinement(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        A = rng.uniform(-2, 2, 500)
+        B = A ** 3 + rng.uniform(-1, 1, 500)
+        C = np.tanh(A) + rng.uniform(-0.2, 0.2, 500)
+        self.df = pd.DataFrame({'A': A, 'B': B, 'C': C})
+
+    def test_parallel_matches_sequential(self):
+        edges = [('A', 'B'), ('B', 'A'), ('A', 'C')]
+        sequential = run_edge_tests(self.df, edges, method='nystrom', jobs=1)
+        parallel = run_edge_tests(self.df, edges, method='nystrom', jobs=2)
+        self.assertEqual(sequential, parallel)
+
+    def test_flips_follow_edge_order(self):
+        dag = nx.DiGraph([('B', 'A'), ('A', 'C')])
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                refined = refine_edges_anm(self.df, dag, method='nystrom', jobs=2)
+
+        self.assertTrue(refined.has_edge('A', 'B'))
+        self.assertEqual(refined.number_of_edges(), 2)
+
+    def test_adaptive_mode_is_reproducible(self):
+        edges = [('A', 'B'), ('A', 'C')]
+        sequential = run_edge_tests(self.df, edges, method='nystrom', jobs=1, adaptive=True)
+        parallel = run_edge_tests(self.df, edges, method='nystrom', jobs=2, adaptive=True)
+        self.assertEqual(sequential, parallel)
+
+
+if __name__ == '__main__':
+    unittest.main()
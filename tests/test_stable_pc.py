@@ -0,0 +1,58 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import unittest
+import warnings
+import numpy as np
+import pandas as pd
+from src.ci_tests import SufficientStatistics
+from src.causality import estimate_skeleton
+from src.stable_pc import estimate_skeleton_stable
+
+
+def edge_set(graph):
+    return {frozenset(edge) for edge in graph.edges()}
+
+
+class TestStablePC(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        A = rng.normal(size=1000)
+        B = 0.8 * A + rng.normal(size=1000)
+        C = 0.8 * A + rng.normal(size=1000)
+        D = 0.7 * B + 0.7 * C + rng.normal(size=1000)
+        E = rng.normal(size=1000)
+        self.df = pd.DataFrame({'A': A, 'B': B, 'C': C, 'D': D, 'E': E})
+
+    def skeleton(self, data, **kwargs):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return estimate_skeleton_stable(data, **kwargs)
+
+    def test_result_does_not_depend_on_jobs_or_column_order(self):
+        sequential, sep_sets = self.skeleton(self.df, jobs=1)
+        parallel, parallel_sep_sets = self.skeleton(self.df, jobs=2)
+        reversed_order, _ = self.skeleton(self.df[self.df.columns[::-1]], jobs=1)
+
+        self.assertEqual(edge_set(sequential), {frozenset(e) for e in [('A', 'B'), ('A', 'C'), ('B', 'D'), ('C', 'D')]})
+        self.assertEqual(edge_set(parallel), edge_set(sequential))
+        self.assertEqual(edge_set(reversed_order), edge_set(sequential))
+        self.assertEqual(parallel_sep_sets, sep_sets)
+        self.assertEqual(sep_sets[frozenset(('A', 'D'))], {'B', 'C'})
+
+    def test_matches_native_fisher_z_skeleton(self):
+        statistics = SufficientStatistics.from_data(self.df)
+        native, _ = estimate_skeleton(statistics.correlation, statistics.n, statistics.columns)
+        streamed, _ = self.skeleton(statistics, jobs=2)
+
+        self.assertEqual(edge_set(streamed), edge_set(native))
+
+    def test_unknown_test_name(self):
+        with self.assertRaises(ValueError):
+            self.skeleton(self.df, test_name='no_such_test')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import json
+import glob
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import networkx as nx
+from contextlib import redirect_stdout
+from unittest import mock
+from src.metrics import METRICS
+from src.refinement import run_edge_tests
+from src.store import data_hash, run_pc_stored, refine_edges_stored
+
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.store_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        C = rng.uniform(-2, 2, 500)
+        A = 2 * C + rng.uniform(-1, 1, 500)
+        B = -C + rng.uniform(-1, 1, 500)
+        self.df = pd.DataFrame({'A': A, 'B': B, 'C': C})
+        self.digest = data_hash(self.df)
+
+    def tearDown(self):
+        shutil.rmtree(self.store_dir)
+
+    def run_quietly(self, func, *args, **kwargs):
+        METRICS.reset()
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                return func(*args, **kwargs)
+
+    def test_hash_follows_the_values(self):
+        self.assertEqual(data_hash(self.df.copy()), self.digest)
+        changed = self.df.copy()
+        changed.iloc[0, 0] += 1e-9
+        self.assertNotEqual(data_hash(changed), self.digest)
+
+    def test_pc_result_is_reused(self):
+        # The separating sets are collected by the CI test, so they must also be complete when
+        # pgmpy could use several cores.
+        with mock.patch('joblib._parallel_backends.cpu_count', return_value=4):
+            dag = self.run_quietly(run_pc_stored, self.df, self.store_dir, self.digest, test_name='cached_pearsonr')
+        self.assertIn('pc', METRICS.phases)
+
+        stored = self.run_quietly(run_pc_stored, self.df, self.store_dir, self.digest, test_name='cached_pearsonr')
+        self.assertNotIn('pc', METRICS.phases)
+        self.assertListEqual(list(stored.nodes()), list(dag.nodes()))
+        self.assertListEqual(list(stored.edges()), list(dag.edges()))
+
+        # The fork A <- C -> B: A and B are separated by C.
+        with open(glob.glob(os.path.join(self.store_dir, self.digest, 'pc-*.json'))[0]) as f:
+            self.assertListEqual(json.load(f)['sep_sets'], [['A', 'B', ['C']]])
+
+        # A different alpha is a different entry.
+        self.run_quietly(run_pc_stored, self.df, self.store_dir, self.digest, alpha=0.01, test_name='cached_pearsonr')
+        self.assertIn('pc', METRICS.phases)
+
+    def test_anm_alpha_sweep_reuses_fits(self):
+        dag = nx.DiGraph([('A', 'C'), ('C', 'B')])
+        self.run_quietly(refine_edges_stored, self.df, dag.copy(), self.store_dir, self.digest, method='nystrom')
+        self.assertEqual(len(METRICS.anm_fits), 2)
+
+        for alpha in (0.01, 0.2):
+            refined = self.run_quietly(refine_edges_stored, self.df, dag.copy(), self.store_dir, self.digest,
+                                       alpha=alpha, method='nystrom')
+            self.assertEqual(len(METRICS.anm_fits), 0)
+
+            direct = self.run_quietly(run_edge_tests, self.df, list(dag.edges()), alpha=alpha, method='nystrom')
+            expected = [(v, u) if direction == "B --> A" else (u, v)
+                        for (u, v), (direction, _, _) in zip(dag.edges(), direct)]
+            self.assertListEqual(sorted(refined.edges()), sorted(expected))
+
+        # Only the new edge is fitted.
+        dag.add_edge('A', 'B')
+        self.run_quietly(refine_edges_stored, self.df, dag.copy(), self.store_dir, self.digest, method='nystrom')
+        self.assertListEqual([fit['edge'] for fit in METRICS.anm_fits], ['A->B'])
+
+
+if __name__ == '__main__':
+    unittest.main()
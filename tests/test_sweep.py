@@ -0,0 +1,63 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import unittest
+import numpy as np
+import pandas as pd
+from contextlib import redirect_stdout
+from unittest import mock
+from src.causality import run_pc_algo_library
+from src.stable_pc import run_pc_algo_stable
+from src.sweep import PValueCache, run_alpha_sweep, sweep_table
+
+
+class TestAlphaSweep(unittest.TestCase):
+    def setUp(self):
+        # A weak edge (D -> C) that only survives the larger alphas.
+        rng = np.random.default_rng(0)
+        A = rng.normal(size=400)
+        B = A + rng.normal(size=400)
+        D = rng.normal(size=400)
+        C = B + 0.15 * D + rng.normal(size=400)
+        self.df = pd.DataFrame({'A': A, 'B': B, 'C': C, 'D': D})
+        self.alphas = [0.001, 0.05, 0.2]
+
+    def sweep(self, **kwargs):
+        with open(os.devnull, 'w') as fnull:
+            with redirect_stdout(fnull):
+                return run_alpha_sweep(self.df, self.alphas, **kwargs)
+
+    def test_matches_separate_runs(self):
+        for pc_variant, run_pc in (('pgmpy', run_pc_algo_library), ('stable', run_pc_algo_stable)):
+            results = self.sweep(test_name='cached_pearsonr', pc_variant=pc_variant)
+            with open(os.devnull, 'w') as fnull:
+                with redirect_stdout(fnull):
+                    for result in results:
+                        expected = run_pc(self.df, alpha=result['alpha'], test_name='cached_pearsonr')
+                        self.assertSetEqual(set(result['dag'].edges()), set(expected.edges()))
+
+    def test_each_test_is_computed_once(self):
+        # With several cores pgmpy's default variant would fill the cache in worker processes only.
+        with mock.patch('joblib._parallel_backends.cpu_count', return_value=4):
+            results = self.sweep(test_name='cached_pearsonr')
+        self.assertTrue(all(result['tests'] > 0 for result in results))
+        self.assertGreater(results[0]['new_tests'], 0)
+        self.assertLess(sum(result['new_tests'] for result in results), sum(result['tests'] for result in results))
+
+        table = sweep_table(results)
+        self.assertListEqual(list(table.columns), self.alphas)
+        self.assertEqual(table.loc[[name for name in table.index if 'D' in name]].to_numpy().sum(axis=0)[0], 0)
+        self.assertGreater(table.to_numpy().sum(axis=0)[-1], table.to_numpy().sum(axis=0)[0])
+
+    def test_cache_is_symmetric(self):
+        from src.stable_pc import resolve_ci_test
+        cache = PValueCache(resolve_ci_test('cached_pearsonr', self.df), self.df)
+        self.assertEqual(cache('A', 'C', ['B'], significance_level=0.05), cache('C', 'A', ('B',)))
+        self.assertEqual(cache.computed, 1)
+        self.assertEqual(cache.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
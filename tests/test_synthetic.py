@@ -0,0 +1,91 @@
+import os
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+import unittest
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import networkx as nx
+from contextlib import redirect_stdout
+from src.synthetic import random_dag, mixing_matrix, generate_dataset, write_dataset, NOISE_TYPES
+from src.causality import run_pc_algo_manual
+from src.loaders import load_causal_data
+
+
+class TestRandomDag(unittest.TestCase):
+    def test_families(self):
+        self.assertEqual(set(random_dag(4, family='chain').edges()), {('X1', 'X2'), ('X2', 'X3'), ('X3', 'X4')})
+        self.assertEqual(set(random_dag(3, family='fork').edges()), {('X1', 'X2'), ('X1', 'X3')})
+        self.assertEqual(set(random_dag(3, family='collider').edges()), {('X1', 'X3'), ('X2', 'X3')})
+
+        dag = random_dag(100, density=0.05, rng=0)
+        self.assertTrue(nx.is_directed_acyclic_graph(dag))
+        self.assertAlmostEqual(dag.number_of_edges() / (100 * 99 / 2), 0.05, delta=0.01)
+
+    def test_mixing_matrix_solves_the_sem(self):
+        dag = random_dag(6, density=0.5, rng=1)
+        weights = nx.to_numpy_array(dag, nodelist=list(dag.nodes()))
+        mixing = mixing_matrix(dag, standardize=False)
+        np.testing.assert_allclose(mixing @ (np.eye(6) - weights), np.eye(6), atol=1e-12)
+
+
+class TestGenerateDataset(unittest.TestCase):
+    def test_seed_reproduces_data(self):
+        first, dag_1 = generate_dataset(5, 1000, density=0.5, seed=3)
+        second, dag_2 = generate_dataset(5, 1000, density=0.5, seed=3)
+        self.assertEqual(set(dag_1.edges()), set(dag_2.edges()))
+        np.testing.assert_array_equal(first.to_numpy(), second.to_numpy())
+
+    def test_unit_variance_for_every_noise_type(self):
+        for noise in NOISE_TYPES:
+            df, _ = generate_dataset(5, 20000, family='chain', noise=noise, seed=4)
+            np.testing.assert_allclose(df.var().to_numpy(), 1.0, atol=0.05, err_msg=noise)
+
+    def test_pc_recovers_the_skeleton(self):
+        for family in ('chain', 'fork', 'collider'):
+            df, dag = generate_dataset(5, 5000, family=family, seed=5)
+            with open(os.devnull, 'w') as fnull:
+                with redirect_stdout(fnull):
+                    estimate = run_pc_algo_manual(df)
+
+            skeleton = {frozenset(edge) for edge in dag.edges()}
+            self.assertSetEqual({frozenset(edge) for edge in estimate.edges()}, skeleton, family)
+
+    def test_streamed_csv_round_trip(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            dag = write_dataset(os.path.join(temp_dir, 'stress.csv'), 12, 2500, density=0.2, seed=6, block_size=1000)
+            df = load_causal_data(temp_dir, 'stress.csv')
+            truth = pd.read_csv(os.path.join(temp_dir, 'stress_truth.csv'))
+        finally:
+            shutil.rmtree(temp_dir)
+
+        expected, _ = generate_dataset(12, 2500, density=0.2, seed=6)
+        self.assertEqual(df.shape, (2500, 12))
+        np.testing.assert_allclose(df.to_numpy(), expected.to_numpy(), atol=1e-4)
+        self.assertEqual(len(truth), dag.number_of_edges())
+
+    def test_truth_weights_match_the_written_data(self):
+        for standardize in (True, False):
+            temp_dir = tempfile.mkdtemp()
+            try:
+                write_dataset(os.path.join(temp_dir, 'sem.csv'), 6, 50000, density=0.5, seed=7,
+                              standardize=standardize)
+                df = pd.read_csv(os.path.join(temp_dir, 'sem.csv'))
+                truth = pd.read_csv(os.path.join(temp_dir, 'sem_truth.csv'))
+            finally:
+                shutil.rmtree(temp_dir)
+
+            # Regressing every effect on its causes recovers the weights of the truth file.
+            for effect, edges in truth.groupby('effect'):
+                causes = df[edges['cause']].to_numpy()
+                coefficients = np.linalg.lstsq(causes, df[effect].to_numpy(), rcond=None)[0]
+                np.testing.assert_allclose(coefficients, edges['weight'].to_numpy(), atol=0.03,
+                                           err_msg=f"{effect}, standardize={standardize}")
+
+
+if __name__ == '__main__':
+    unittest.main()